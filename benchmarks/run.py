@@ -0,0 +1,320 @@
+"""
+Data-path benchmarks for Expense Tracker Pro (no window needed).
+
+    python -m benchmarks.run                       # 10k, 100k and 1M rows
+    python -m benchmarks.run --sizes 10000 --repeat 5
+    python -m benchmarks.run --backend sqlite
+    python -m benchmarks.run --compare benchmarks/results/old.json
+
+Each size gets a synthetic ledger (benchmarks/synthetic.py) in a temporary
+data folder. The real ExpenseTrackerApp methods are timed on an app object
+that skips the Tk setup (only open_data() runs), so nothing here depends on
+a display. Results go to benchmarks/results/ as JSON; --compare prints the
+change against an earlier results file.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+
+import numpy as np
+
+from src.expense_tracker_gui import APP_VERSION, LOADED_DAYS, ExpenseTrackerApp
+from src.csv_io import CsvExportJob, export_rows
+from src.indexes import MISSING_TS
+from src.storage import BackgroundWriter, open_store
+
+from .synthetic import generate
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+RANGES = ("7", "30", "90", "all")
+SORT_MODES = (None, "amount_asc", "amount_desc", "date_new", "date_old")
+PAGE_ROWS = 10  # about what fits in the window
+SEARCHES = ("coffee", "uber", "bill", "taxi to airport", "zzz-no-match")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# ---- setup ----
+
+def write_ledger(data_dir, expenses, backend):
+    with open(os.path.join(data_dir, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({"storage_backend": backend}, f)
+    writer = BackgroundWriter()
+    store = open_store(backend, data_dir, writer)
+    for i, exp in enumerate(expenses, 1):
+        exp.id = i
+    store.compact(expenses)
+    store.close()
+    writer.close()
+
+
+def open_app(data_dir, attach_all=True):
+    """An ExpenseTrackerApp with its data loaded but no window (every month attached by default)."""
+    app = ExpenseTrackerApp.__new__(ExpenseTrackerApp)
+    app._startup_marks = []
+    app.open_data(data_dir)
+    if attach_all:
+        attach_all_months(app)
+    app.search_query = ""
+    app.current_category_filter = "All"
+    app.current_date_filter = "all"
+    app.current_sort_mode = None
+    app.charts_range = "30"
+    app.dashboard_range = "30"
+    return app
+
+
+def attach_all_months(app):
+    """What the All Expenses page does when it asks for everything."""
+    app._attach_older(MISSING_TS)
+    app._install_ledger()
+
+
+def close_app(app):
+    # same order as safe_close(): the store queues its last writes first
+    app.store.close()
+    app.writer.close()
+
+
+# ---- timing ----
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+        self.size = self.backend = None
+
+    def time(self, name, fn):
+        """Run fn `repeat` times; fn returns the number of rows it produced."""
+        runs, rows = [], None
+        for _ in range(self.repeat):
+            t0 = time.perf_counter()
+            rows = fn()
+            runs.append((time.perf_counter() - t0) * 1000)
+        self.results.append({
+            "size": self.size,
+            "backend": self.backend,
+            "name": name,
+            "rows": rows,
+            "runs_ms": [round(ms, 3) for ms in runs],
+            "min_ms": round(min(runs), 3),
+            "median_ms": round(statistics.median(runs), 3),
+        })
+        print(f"  {name:<44}{min(runs):>11.2f} ms   (rows: {rows})")
+
+
+def bench_size(bench, size, backend, seed):
+    bench.size, bench.backend = size, backend
+    print(f"\n{size:,} expenses ({backend})")
+    data_dir = tempfile.mkdtemp(prefix="etp-bench-")
+    try:
+        expenses = generate(size, seed)
+        write_ledger(data_dir, expenses, backend)
+        descriptions = [e.description for e in expenses[:: max(1, size // 1000)]][:1000]
+        del expenses
+
+        # ---- load / save ----
+        def load(attach_all=False):
+            app = open_app(data_dir, attach_all)
+            close_app(app)
+            return len(app.expenses)
+
+        bench.time("load_expenses + indexes (startup)", load)
+        bench.time("load + attach all months + indexes", lambda: load(attach_all=True))
+
+        def load_and_open_list():
+            # what opening All Expenses costs: it starts on the months loaded at startup
+            app = open_app(data_dir, attach_all=False)
+            app.current_date_filter = LOADED_DAYS
+            rows = app.get_expense_pager().rows_from(None, PAGE_ROWS)
+            close_app(app)
+            return len(rows)
+
+        bench.time("load + first All Expenses page", load_and_open_list)
+
+        app = open_app(data_dir)
+        try:
+            def load_only(decode=False):
+                store = open_store(backend, data_dir, None)
+                app.store, old = store, app.store
+                try:
+                    data = app.load_expenses()
+                    return sum(1 for _ in data) if decode else len(data)
+                finally:
+                    app.store = old
+                    store.close()
+
+            bench.time("load_expenses", load_only)
+            bench.time("load_expenses + decode loaded rows", lambda: load_only(decode=True))
+
+            def save():
+                app.save_expenses()
+                app.writer.flush()
+                return len(app.expenses)
+
+            bench.time("save_expenses", save)
+
+            # ---- view: search, date filters, sort modes ----
+            def view(search="", date="all", sort=None):
+                app.search_query, app.current_date_filter, app.current_sort_mode = search, date, sort
+                return len(app.get_filtered_sorted_expenses())
+
+            for q in SEARCHES:
+                bench.time(f"view search={q!r}", lambda q=q: view(search=q))
+            for r in RANGES:
+                bench.time(f"view date={r}", lambda r=r: view(date=r))
+            for mode in SORT_MODES:
+                bench.time(f"view sort={mode}", lambda m=mode: view(sort=m))
+
+            # ---- view pages: what the list reads (first page, a jump, the next page) ----
+            def pages(date="all", sort=None, page=PAGE_ROWS):
+                app.search_query, app.current_date_filter, app.current_sort_mode = "", date, sort
+                pager = app.get_expense_pager()
+                rows = pager.rows_from(None, page)
+                cursor = pager.seek(len(pager) // 2)
+                rows += pager.rows_from(cursor, page + 1)
+                rows += pager.rows_from(pager.cursor(rows[-1]), page) if rows else []
+                return len(rows)
+
+            for mode in SORT_MODES:
+                bench.time(f"view pages sort={mode}", lambda m=mode: pages(sort=m))
+            bench.time("view pages date=30 sort=amount_desc", lambda: pages(date="30", sort="amount_desc"))
+            view()
+
+            # ---- dashboard / charts ----
+            # the DateIndex range lookup _filter_by_range used to do; same name so old results compare
+            def filter_by_range(r):
+                return len(app.table.since(app._range_start(r)) if r != "all" else list(app.expenses))
+
+            for r in RANGES:
+                bench.time(f"_filter_by_range {r}", lambda r=r: filter_by_range(r))
+
+            def dashboard(r):
+                total, count, unique_days, by_cat = app.rollups.summary(app._range_start(r), app.table)
+                Counter(by_cat).most_common(1)
+                app.expenses.latest(20)
+                return count
+
+            for r in RANGES:
+                bench.time(f"dashboard {r}", lambda r=r: dashboard(r))
+
+            def category_chart(r):
+                app.charts_range = r
+                totals = app.get_chart_category_totals()
+                sorted(totals.items(), key=lambda x: x[1], reverse=True)
+                return len(totals)
+
+            def line_chart(r):
+                app.charts_range = r
+                days, values = app.rollups.daily_totals(app._range_start(r), app.table)
+                return len(days)
+
+            for r in RANGES:
+                bench.time(f"chart pie/bar data {r}", lambda r=r: category_chart(r))
+                bench.time(f"chart line data {r}", lambda r=r: line_chart(r))
+
+            # ---- categorisation ----
+            def guess():
+                for d in descriptions:
+                    app.guess_category(d)
+                return len(descriptions)
+
+            bench.time(f"guess_category x{len(descriptions)}", guess)
+
+            # ---- export (what export_to_csv does after the dialogs) ----
+            csv_path = os.path.join(data_dir, "export.csv")
+
+            def export():
+                source = list(app.expenses)
+                job = CsvExportJob(csv_path, export_rows(source, app.get_currency_symbol()), len(source))
+                job.start().join()
+                if job.error:
+                    raise RuntimeError(job.error)
+                return job.done
+
+            bench.time("export_to_csv (entire ledger)", export)
+        finally:
+            close_app(app)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+# ---- results ----
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(RESULTS_DIR),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "app_version": APP_VERSION,
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, old_path):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = {(r["size"], r["backend"], r["name"]): r for r in json.load(f)["results"]}
+    print(f"\nChange against {old_path} (min time, >1.0 is slower):")
+    for r in results:
+        before = old.get((r["size"], r["backend"], r["name"]))
+        if before and before["min_ms"] > 0:
+            ratio = r["min_ms"] / before["min_ms"]
+            flag = "  <-- slower" if ratio > 1.2 else ""
+            print(f"  {r['size']:>9,} {r['name']:<44}{ratio:>7.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma separated ledger sizes (default: %(default)s)")
+    parser.add_argument("--backend", default="json", help="json, sqlite or json,sqlite")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement, the minimum is kept")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<version>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    bench = Bench(args.repeat)
+    started = datetime.now()
+    for backend in args.backend.split(","):
+        for size in (int(s.replace("_", "")) for s in args.sizes.split(",")):
+            bench_size(bench, size, backend.strip(), args.seed)
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{APP_VERSION}-{started.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "time": started.strftime("%Y-%m-%d %H:%M:%S"),
+            "environment": environment(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "results": bench.results,
+        }, f, indent=2)
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(bench.results, args.compare)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
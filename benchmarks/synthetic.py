@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+
+from src.expense import Expense
+
+
+# ------------------------------------------------------------
+# Synthetic ledgers for the benchmarks.
+#
+# Shaped like a real ledger rather than uniform noise: a few categories make
+# up most rows, amounts are log-normal per category, descriptions repeat a
+# small set of merchants (some with reference numbers, some free text), and
+# dates cover the last few years with more spending on weekends and in the
+# afternoon. The same seed always gives the same ledger.
+# ------------------------------------------------------------
+
+# category -> (share of rows, median amount, merchants / phrases)
+CATEGORIES = {
+    "Food": (0.34, 12.0, [
+        "Lidl groceries", "Continente", "Pingo Doce", "coffee", "Starbucks coffee", "lunch with team",
+        "pizza night", "McDonald's", "sushi takeaway", "bakery", "restaurant dinner", "supermarket run",
+    ]),
+    "Transport": (0.18, 9.0, [
+        "Uber", "Bolt ride", "metro card top-up", "train ticket", "fuel Galp", "parking",
+        "taxi to airport", "bus pass", "toll highway",
+    ]),
+    "Shopping": (0.14, 35.0, [
+        "Amazon order", "Zara", "IKEA", "Worten electronics", "new shoes", "birthday gift",
+        "book store", "phone case",
+    ]),
+    "Bills": (0.10, 60.0, [
+        "electricity bill", "water bill", "internet", "phone plan", "rent", "insurance",
+        "gym membership",
+    ]),
+    "Entertainment": (0.09, 15.0, [
+        "Netflix", "Spotify", "cinema tickets", "concert", "Steam game", "bowling", "museum",
+    ]),
+    "Health": (0.05, 25.0, [
+        "pharmacy", "dentist", "doctor appointment", "vitamins", "physio session",
+    ]),
+    "Other": (0.10, 20.0, [
+        "misc", "cash withdrawal", "donation", "haircut", "laundry", "post office", "",
+    ]),
+}
+
+YEARS = 3
+WEEKDAY_WEIGHT = (1.0, 0.9, 0.9, 1.0, 1.3, 1.7, 1.4)  # Mon..Sun
+
+
+def generate(n, seed=42, now=None):
+    """n Expense records (no ids yet), oldest first, ending at `now`."""
+    rng = random.Random(seed)
+    now = now or datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=365 * YEARS)
+    span = int((now - start).total_seconds())
+
+    names = list(CATEGORIES)
+    shares = [CATEGORIES[c][0] for c in names]
+
+    stamps = []
+    while len(stamps) < n:
+        t = start + timedelta(seconds=rng.randrange(span))
+        if rng.random() * max(WEEKDAY_WEIGHT) < WEEKDAY_WEIGHT[t.weekday()]:
+            # most spending happens between 8:00 and 22:00, peaking in the afternoon
+            hour = min(23, max(0, int(rng.gauss(15, 3.5))))
+            stamps.append(t.replace(hour=hour))
+    stamps.sort()
+
+    out = []
+    for t, cat in zip(stamps, rng.choices(names, shares, k=n)):
+        _, median, phrases = CATEGORIES[cat]
+        desc = rng.choice(phrases)
+        r = rng.random()
+        if r < 0.15 and desc:
+            desc = f"{desc} #{rng.randrange(10000, 99999)}"
+        elif r < 0.20:
+            desc = f"{desc} {rng.choice(('w/ friends', 'for home', 'again', 'weekend', 'work trip'))}".strip()
+        amount = round(rng.lognormvariate(0, 0.8) * median, 2)
+        out.append(Expense(amount, desc, cat, t.strftime("%Y-%m-%d %H:%M:%S")))
+    return out
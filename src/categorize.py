@@ -0,0 +1,93 @@
+from collections import deque
+
+
+# ------------------------------------------------------------
+# Keyword-based category guessing.
+#
+# The keyword table is compiled once into an Aho–Corasick automaton, flattened
+# into a DFA (one dict lookup per character, no failure-link walking), so a
+# description is classified in a single pass no matter how many keywords the
+# user adds. Earlier categories in the table win, like the old nested scan.
+# ------------------------------------------------------------
+
+DEFAULT_CATEGORY_KEYWORDS = {
+    "Food": ["restaurant", "dinner", "lunch", "groceries", "cafe", "coffee"],
+    "Transport": ["uber", "bus", "taxi", "train", "fuel", "gas", "petrol"],
+    "Shopping": ["amazon", "store", "shopping", "clothes"],
+    "Entertainment": ["netflix", "spotify", "cinema", "movie", "game"],
+    "Bills": ["electricity", "water", "internet", "rent", "bill"],
+    "Health": ["pharmacy", "doctor", "gym", "health"],
+    "Travel": ["hotel", "flight", "airbnb", "booking.com", "trip"],
+}
+
+
+def parse_keyword_table(text):
+    """Parse "Category: kw1, kw2" lines (as edited in Settings) into a table."""
+    table = {}
+    for line in text.splitlines():
+        if ":" not in line:
+            continue
+        cat, words = line.split(":", 1)
+        cat = cat.strip().title()
+        words = [w.strip().lower() for w in words.split(",") if w.strip()]
+        if cat and words:
+            table.setdefault(cat, []).extend(words)
+    return table
+
+
+def format_keyword_table(table):
+    return "\n".join(f"{cat}: {', '.join(words)}" for cat, words in table.items())
+
+
+class KeywordMatcher:
+    """Classifies descriptions against a {category: [keywords]} table."""
+
+    def __init__(self, table):
+        self.categories = [str(c).title() for c in table]
+        none = len(self.categories)
+
+        # trie; out[s] = best (lowest) category rank of any keyword ending at s
+        goto, out = [{}], [none]
+        for rank, words in enumerate(table.values()):
+            for word in words:
+                word = str(word).strip().lower()
+                if not word:
+                    continue
+                s = 0
+                for ch in word:
+                    nxt = goto[s].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        out.append(none)
+                        nxt = goto[s][ch] = len(goto) - 1
+                    s = nxt
+                out[s] = min(out[s], rank)
+
+        # failure links in BFS order, then flatten them into full transition rows
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            f = fail[s]  # shallower than s, so its row is already complete
+            delta[s] = {**delta[f], **goto[s]}
+            out[s] = min(out[s], out[f])
+            for ch, t in goto[s].items():
+                fail[t] = delta[f].get(ch, 0)
+                queue.append(t)
+
+        self._delta = delta
+        self._out = out
+        self._none = none
+
+    def classify(self, desc, default="Other"):
+        delta, out = self._delta, self._out
+        best, s = self._none, 0
+        for ch in str(desc).lower():
+            s = delta[s].get(ch, 0)
+            if out[s] < best:
+                best = out[s]
+                if not best:
+                    break
+        return self.categories[best] if best < self._none else default
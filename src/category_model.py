@@ -0,0 +1,132 @@
+import json
+import math
+import re
+
+
+# ------------------------------------------------------------
+# Local category model: multinomial naive Bayes over description words.
+#
+# Only counts are stored, so learning and forgetting an expense are O(words)
+# and the model never needs retraining. Suggestions only look at the words of
+# the query. Everything stays on disk next to expenses.json; nothing leaves
+# the machine.
+# ------------------------------------------------------------
+
+_WORD = re.compile(r"[^\W\d_]{2,}")
+
+
+def tokens(desc):
+    """Lowercase words of a description (digits / reference numbers dropped)."""
+    return _WORD.findall(str(desc).lower())
+
+
+class CategoryModel:
+    """
+    Counts per category: documents, words and word occurrences. "Other" rows
+    are not learned; "Other" means "don't know", not a real category.
+    """
+
+    VERSION = 1
+
+    def __init__(self, expenses=()):
+        self.docs = {}   # category -> number of expenses learned
+        self.total = {}  # category -> number of words learned
+        self.words = {}  # word -> {category: count}
+        self.dirty = False
+        self.from_file = False  # counts came from a saved model, not from training
+        self.partial = False    # trained on part of the ledger: never saved, retrained once it is all there
+        for e in expenses:
+            self.add(e)
+
+    @staticmethod
+    def _category(exp):
+        return None if exp.category == "Other" else exp.category
+
+    def _apply(self, exp, sign):
+        cat = self._category(exp)
+        if cat is None:
+            return
+        self.dirty = True
+        self._bump(self.docs, cat, sign)
+        for w in tokens(exp.description):
+            self._bump(self.total, cat, sign)
+            counts = self.words.get(w)
+            if counts is None:
+                counts = self.words[w] = {}
+            self._bump(counts, cat, sign)
+            if not counts:
+                del self.words[w]
+
+    @staticmethod
+    def _bump(counts, key, sign):
+        n = counts.get(key, 0) + sign
+        if n > 0:
+            counts[key] = n
+        else:
+            counts.pop(key, None)
+
+    def add(self, exp):
+        self._apply(exp, 1)
+
+    def remove(self, exp):
+        self._apply(exp, -1)
+
+    def rows(self):
+        return sum(self.docs.values())
+
+    def predict(self, desc):
+        """Most likely category for a description, or None if no word is known."""
+        known = [c for c in map(self.words.get, tokens(desc)) if c]
+        if not known:
+            return None
+
+        # tuple() snapshots are safe to take while the Tk thread keeps learning
+        docs = tuple(self.docs.items())
+        vocab = len(self.words)
+        ndocs = sum(n for _, n in docs)
+        best, best_score = None, -math.inf
+        for cat, n in docs:
+            denom = self.total.get(cat, 0) + vocab
+            score = math.log(n / ndocs)
+            for counts in known:
+                score += math.log((counts.get(cat, 0) + 1) / denom)
+            if score > best_score:
+                best, best_score = cat, score
+        return best
+
+    # ---- persistence ----
+
+    def to_dict(self):
+        return {"version": self.VERSION, "docs": self.docs, "total": self.total, "words": self.words}
+
+    @staticmethod
+    def learned_rows(rollups):
+        """Rows a model of the whole ledger has learned, from its Rollups (no rows decoded)."""
+        return rollups.count - rollups.by_cat.get("Other", (0, 0))[1]
+
+    @classmethod
+    def load(cls, path, expenses, rows=None):
+        """
+        Load saved counts if they still match the ledger (same number of learned
+        rows); otherwise train from the ledger in one pass. When only part of
+        the ledger is loaded, `rows` is what the whole ledger has (learned_rows)
+        and a model trained here is marked partial.
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == cls.VERSION:
+                model = cls()
+                model.docs, model.total, model.words = data["docs"], data["total"], data["words"]
+                model.from_file = True
+                if rows is None:
+                    rows = sum(1 for e in expenses if cls._category(e) is not None)
+                if model.rows() == rows:
+                    return model
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+        model = cls(expenses)
+        model.dirty = True
+        model.partial = rows is not None and model.rows() != rows
+        return model
@@ -0,0 +1,235 @@
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ------------------------------------------------------------
+# Chart drawing + off-main-thread rendering.
+#
+# The draw_* functions only touch the Axes they are given, so they can run
+# on the render thread. Data is prepared on the Tk thread (from the indexes)
+# and passed in as plain lists/arrays.
+# ------------------------------------------------------------
+
+BG = "#2b2d31"
+
+
+def draw_pie(ax, data, cur):
+    labels, values = data
+
+    def autopct(pct):
+        return f"{pct:.1f}%" if pct >= 5 else ""
+
+    ax.pie(
+        values,
+        labels=labels,
+        autopct=autopct,
+        textprops={"color": "white", "fontsize": 9},
+    )
+    ax.set_title(f"Spending by Category ({cur})", color="white")
+
+
+def draw_bar(ax, data, cur):
+    labels, values = data
+    ax.bar(labels, values)
+
+    ax.set_title(f"Category Spending ({cur})", color="white")
+    ax.set_ylabel(cur, color="white")
+    ax.tick_params(axis="x", rotation=45, labelcolor="white")
+    ax.tick_params(axis="y", labelcolor="white")
+
+
+# ---- level of detail for the daily line chart ----
+
+LINE_MAX_POINTS = 400   # LTTB kicks in above this many buckets
+DAY_BUCKETS_UP_TO = 120  # span in days
+WEEK_BUCKETS_UP_TO = 730
+LINE_TITLES = {"day": "Daily", "week": "Weekly", "month": "Monthly"}
+
+
+def bucket_series(days, values):
+    """
+    Re-bucket a daily series (day numbers since 1970-01-01, sorted) by day,
+    week or month depending on its span. Returns (datetime64[D] starts, sums, unit).
+    """
+    days = np.asarray(days, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if not len(days):
+        return days.astype("datetime64[D]"), values, "day"
+
+    span = int(days[-1] - days[0])
+    if span <= DAY_BUCKETS_UP_TO:
+        return days.astype("datetime64[D]"), values, "day"
+
+    if span <= WEEK_BUCKETS_UP_TO:
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        keys = (days - 4) // 7 * 7 + 4
+        unit = "week"
+    else:
+        keys = days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+        unit = "month"
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    return keys[starts].astype("datetime64[D]"), np.add.reduceat(values, starts), unit
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[avg_start:avg_end].mean()
+        avg_y = y[avg_start:avg_end].mean()
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep.append(a)
+    keep.append(n - 1)
+    return np.asarray(keep)
+
+
+def draw_line(ax, data, cur):
+    import matplotlib.dates as mdates
+
+    dates, values, unit = bucket_series(*data)
+    if len(dates) > LINE_MAX_POINTS:
+        keep = lttb(dates.astype(np.int64), values, LINE_MAX_POINTS)
+        dates, values = dates[keep], values[keep]
+
+    ax.plot(dates, values, marker="o" if len(dates) <= 60 else None, markersize=4)
+
+    locator = mdates.AutoDateLocator(maxticks=10)
+    ax.xaxis.set_major_locator(locator)
+    ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+
+    ax.set_title(f"{LINE_TITLES[unit]} Spending ({cur})", color="white")
+    ax.set_xlabel("Date", color="white")
+    ax.set_ylabel(cur, color="white")
+
+    ax.tick_params(axis="x", rotation=45, labelcolor="white")
+    ax.tick_params(axis="y", labelcolor="white")
+
+    # Optional: subtle grid
+    ax.grid(color="#444", linestyle="--", linewidth=0.5, alpha=0.3)
+
+
+DRAW = {"pie": draw_pie, "bar": draw_bar, "line": draw_line}
+
+
+class ChartRenderer:
+    """
+    Renders charts to an Agg buffer on a worker thread and caches the images.
+
+    Cache keys are (chart type, range, currency, width, height); each entry
+    remembers the ledger version it was drawn from, so a changed ledger makes
+    it stale without having to invalidate anything explicitly. Only the most
+    recent request is kept — clicking through charts quickly never queues up
+    renders nobody will see.
+    """
+
+    CACHE_SIZE = 24
+    DPI = 100
+
+    def __init__(self):
+        self.cache = OrderedDict()  # key -> (version, PIL image); Tk thread only
+        self._cond = threading.Condition()
+        self._job = None
+        self._busy = False
+        self._results = queue.Queue()
+        self._thread = None
+        self._figure = None  # owned by the render thread, reused for every chart
+        self._canvas = None
+
+    # ---- Tk thread ----
+
+    def get(self, key, version):
+        hit = self.cache.get(key)
+        if hit is None or hit[0] != version:
+            return None
+        self.cache.move_to_end(key)
+        return hit[1]
+
+    def request(self, key, version, kind, data, cur, size):
+        with self._cond:
+            self._job = (key, version, kind, data, cur, size)
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="chart-render", daemon=True)
+            self._thread.start()
+
+    def pending(self):
+        with self._cond:
+            return self._job is not None or self._busy or not self._results.empty()
+
+    def poll(self):
+        """
+        Move finished renders into the cache and return them as (key, version,
+        image, error); a failed render has image None and the exception.
+        """
+        done = []
+        while True:
+            try:
+                key, version, image, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if image is not None:  # failures are not cached, asking again retries
+                self.cache[key] = (version, image)
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.CACHE_SIZE:
+                    self.cache.popitem(last=False)
+            done.append((key, version, image, error))
+        return done
+
+    # ---- render thread ----
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._job is None:
+                    self._cond.wait()
+                job, self._job = self._job, None
+                self._busy = True
+            key, version, kind, data, cur, size = job
+            image = error = None
+            try:
+                image = self.render(kind, data, cur, size)
+            except Exception as e:
+                print("Error rendering chart:", e)
+                error = e
+            self._results.put((key, version, image, error))
+            with self._cond:
+                self._busy = False
+
+    def render(self, kind, data, cur, size):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from PIL import Image
+
+        if self._figure is None:
+            self._figure = Figure(facecolor=BG, dpi=self.DPI)
+            self._canvas = FigureCanvasAgg(self._figure)
+
+        fig = self._figure
+        w, h = size
+        fig.set_size_inches(w / self.DPI, h / self.DPI)
+        fig.clear()
+        ax = fig.add_subplot(111)
+        ax.set_facecolor(BG)
+        DRAW[kind](ax, data, cur)
+
+        self._canvas.draw()
+        width, height = self._canvas.get_width_height()
+        return Image.frombuffer("RGBA", (width, height), self._canvas.buffer_rgba(), "raw", "RGBA", 0, 1).copy()
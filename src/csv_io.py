@@ -0,0 +1,303 @@
+import os
+import io
+import csv
+import math
+import queue
+import threading
+from datetime import datetime
+
+from .expense import Expense
+
+
+# ------------------------------------------------------------
+# CSV export (runs on a worker thread, no Tk here)
+# ------------------------------------------------------------
+
+CSV_COLUMNS = ["Amount", "Currency", "Category", "Description", "Date"]
+
+
+def export_rows(expenses, currency):
+    """Generate CSV rows lazily from any iterable of expenses."""
+    for exp in expenses:
+        yield (
+            f"{exp.amount:.2f}",
+            currency,
+            exp.category,
+            exp.description,
+            exp.date,
+        )
+
+
+class CsvExportCancelled(Exception):
+    pass
+
+
+class CsvExportJob:
+    """
+    Streams rows into a CSV file on a background thread.
+
+    Rows are formatted into an in-memory chunk and written every CHUNK_ROWS
+    rows; progress (done/total) can be polled from the Tk thread and cancel()
+    stops the job at the next chunk boundary. Output goes to "<path>.part"
+    and is only renamed into place once complete.
+    """
+
+    CHUNK_ROWS = 5000
+
+    def __init__(self, path, rows, total):
+        self.path = path
+        self.rows = rows
+        self.total = total
+        self.done = 0
+        self.finished = False
+        self.cancelled = False
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="csv-export", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _run(self):
+        tmp = self.path + ".part"
+        try:
+            with open(tmp, "w", newline="", encoding="utf-8") as f:
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                writer.writerow(CSV_COLUMNS)
+
+                n = 0
+                for row in self.rows:
+                    writer.writerow(row)
+                    n += 1
+                    if n % self.CHUNK_ROWS == 0:
+                        f.write(buf.getvalue())
+                        buf.seek(0)
+                        buf.truncate()
+                        self.done = n
+                        if self._cancel.is_set():
+                            raise CsvExportCancelled()
+                f.write(buf.getvalue())
+
+            os.replace(tmp, self.path)
+            self.done = n
+        except CsvExportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            if os.path.exists(tmp):
+                try: os.remove(tmp)
+                except OSError: pass
+            self.finished = True
+
+
+# ------------------------------------------------------------
+# CSV import (parsing on a worker thread, batches committed on the Tk thread)
+# ------------------------------------------------------------
+
+DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y", "%m/%d/%Y")
+
+# currency marks accepted before or after an amount; longer marks first so "R$" wins over "$"
+CURRENCY_MARKS = ("R$", "DKK", "SEK", "USD", "EUR", "GBP", "kr", "€", "$", "£", "₱", "¥")
+
+
+def _strip_currency(text):
+    for mark in CURRENCY_MARKS:
+        if text.startswith(mark):
+            return text[len(mark):]
+        if text.endswith(mark):
+            return text[:-len(mark)]
+    return text
+
+
+def _strip_sign(text):
+    """Return (text, negative) with one leading or trailing +/- removed."""
+    if text.startswith(("-", "+")):
+        return text[1:], text[0] == "-"
+    if text.endswith("-"):
+        return text[:-1], True
+    return text, False
+
+
+def parse_amount(text):
+    """
+    '1,234.56', '1.234,56', '12,50', '$ 9.99', '9.99 DKK' -> float. Raises ValueError.
+
+    Refunds and credits ('-12.50', '(12.50)', '$-5') are rejected rather than
+    imported as expenses.
+    """
+    text = text.strip().replace(" ", "").replace("\u00a0", "")
+    negative = text.startswith("(") and text.endswith(")")
+    if negative:
+        text = text[1:-1]
+    text, minus = _strip_sign(text)
+    text = _strip_currency(text)
+    if not minus:
+        text, minus = _strip_sign(text)
+    if negative or minus:
+        raise ValueError("negative amount (refund or credit) not imported")
+
+    if "," in text and "." in text:
+        # whichever separator comes last is the decimal point
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text:
+        text = text.replace(",", ".")
+    value = float(text)
+    if not math.isfinite(value) or value < 0:
+        raise ValueError(f"invalid amount {text!r}")
+    return value
+
+
+def parse_date(text):
+    """Normalise a date to the "%Y-%m-%d %H:%M:%S" format the app stores. Raises ValueError."""
+    text = text.strip()
+    try:
+        return datetime.fromisoformat(text).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS[2:]:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date {text!r}")
+
+
+class CsvImportCancelled(Exception):
+    pass
+
+
+class CsvImportJob:
+    """
+    Streams a CSV file into Expense records on a background thread.
+
+    Rows are validated and normalised here (amounts, dates, guessed categories)
+    and handed over in batches of BATCH_ROWS through a small bounded queue, so
+    a huge file never sits in memory at once. The Tk thread drains batches with
+    poll() and commits each one in a single step. Bad rows are skipped and
+    counted, refunds and credits included; the first few reasons are kept in
+    `errors`.
+    """
+
+    BATCH_ROWS = 20000
+    MAX_ERRORS = 5
+
+    def __init__(self, path, guess_category):
+        self.path = path
+        self.guess_category = guess_category
+        self.total_bytes = os.path.getsize(path)
+        self.read_bytes = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.finished = False
+        self.cancelled = False
+        self.error = None
+        self._batches = queue.Queue(maxsize=4)
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="csv-import", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def poll(self):
+        """Return the batches parsed so far (Tk thread)."""
+        out = []
+        while True:
+            try:
+                out.append(self._batches.get_nowait())
+            except queue.Empty:
+                return out
+
+    def done(self):
+        return self.finished and self._batches.empty()
+
+    def _lines(self, f):
+        for line in f:
+            self.read_bytes += len(line.encode("utf-8"))
+            yield line
+
+    def _put(self, batch):
+        while not self._cancel.is_set():
+            try:
+                self._batches.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise CsvImportCancelled()
+
+    def _skip(self, line_no, reason):
+        self.skipped += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append(f"line {line_no}: {reason}")
+
+    def _run(self):
+        try:
+            with open(self.path, newline="", encoding="utf-8-sig") as f:
+                sample = f.read(4096)
+                f.seek(0)
+                try:
+                    dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+                except csv.Error:
+                    dialect = csv.excel
+
+                reader = csv.reader(self._lines(f), dialect)
+                header = [h.strip().lower() for h in next(reader, [])]
+                cols = {name: header.index(name.lower()) for name in CSV_COLUMNS if name.lower() in header}
+                if "Amount" not in cols or "Date" not in cols:
+                    raise ValueError("CSV needs at least 'Amount' and 'Date' columns")
+
+                i_amount, i_date = cols["Amount"], cols["Date"]
+                i_cat, i_desc = cols.get("Category"), cols.get("Description")
+                width = max(cols.values()) + 1
+                guess = self.guess_category
+
+                batch = []
+                for line_no, row in enumerate(reader, start=2):
+                    if not row:
+                        continue
+                    if len(row) < width:
+                        row = row + [""] * (width - len(row))
+                    try:
+                        amount = parse_amount(row[i_amount])
+                        date = parse_date(row[i_date])
+                    except ValueError as e:
+                        self._skip(line_no, e)
+                        continue
+
+                    desc = row[i_desc].strip() if i_desc is not None else ""
+                    cat = row[i_cat].strip() if i_cat is not None else ""
+                    batch.append(Expense(amount, desc, cat or guess(desc), date))
+                    if len(batch) >= self.BATCH_ROWS:
+                        self._put(batch)
+                        self.imported += len(batch)
+                        batch = []
+                        if self._cancel.is_set():
+                            raise CsvImportCancelled()
+                if batch:
+                    self._put(batch)
+                    self.imported += len(batch)
+        except CsvImportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
@@ -0,0 +1,94 @@
+import sys
+
+from .indexes import MISSING_TS, parse_ts
+
+
+# ------------------------------------------------------------
+# The expense record.
+#
+# Rows are validated once, when they enter the app (load, add, import), so
+# the rest of the code can read .amount / .ts / .category directly instead of
+# re-converting dict values in every loop. Category names are title-cased
+# and interned, so all rows of a category share one string.
+# ------------------------------------------------------------
+
+_CATEGORY_NAMES = {}  # raw category -> interned display name
+
+
+def category_name(cat):
+    """'food ' -> 'Food' (interned); empty or missing -> 'Other'."""
+    name = _CATEGORY_NAMES.get(cat)
+    if name is None:
+        name = sys.intern(str(cat or "").strip().title() or "Other")
+        _CATEGORY_NAMES[cat] = name
+    return name
+
+
+def _amount(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class Expense:
+    __slots__ = ("id", "amount", "description", "category", "date", "ts")
+
+    def __init__(self, amount, description="", category="Other", date="", ts=None, id=None):
+        self.id = id                    # stable, assigned by the Ledger when None
+        self.amount = amount            # float
+        self.description = description
+        self.category = category_name(category)
+        self.date = date                # as stored / shown, "YYYY-MM-DD HH:MM:SS"
+        if ts is None:
+            ts = parse_ts(date)
+        self.ts = MISSING_TS if ts is None else ts  # parsed date, seconds since 1970
+
+    @classmethod
+    def from_dict(cls, d):
+        """Validate a stored/imported dict into a record."""
+        exp_id = d.get("id")
+        return cls(
+            _amount(d.get("amount", 0)),
+            str(d.get("description", "")),
+            d.get("category"),
+            str(d.get("date", "")),
+            id=exp_id if isinstance(exp_id, int) else None,
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "amount": self.amount,
+            "description": self.description,
+            "category": self.category,
+            "date": self.date,
+        }
+
+    def copy(self):
+        return Expense(self.amount, self.description, self.category, self.date, self.ts, id=self.id)
+
+    def update(self, changes):
+        """Apply edited fields (same keys as to_dict), re-validating them."""
+        if "amount" in changes:
+            self.amount = _amount(changes["amount"])
+        if "description" in changes:
+            self.description = str(changes["description"])
+        if "category" in changes:
+            self.category = category_name(changes["category"])
+        if "date" in changes:
+            self.date = str(changes["date"])
+            ts = parse_ts(self.date)
+            self.ts = MISSING_TS if ts is None else ts
+
+    def __eq__(self, other):
+        if not isinstance(other, Expense):
+            return NotImplemented
+        return (self.amount, self.description, self.category, self.date) == (
+            other.amount, other.description, other.category, other.date
+        )
+
+    __hash__ = object.__hash__  # identity, the indexes key rows by id()
+
+    def __repr__(self):
+        return f"Expense({self.amount!r}, {self.description!r}, {self.category!r}, {self.date!r}, id={self.id!r})"
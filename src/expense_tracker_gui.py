@@ -1,15 +1,25 @@
+import time
+_IMPORT_T0 = time.perf_counter()  # start of the startup timing report
+
 import os
 import json
+import importlib
+import threading
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import Counter
 
 import customtkinter as ctk
 from tkinter import messagebox
 from tkinter import filedialog
 
-
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from .storage import BackgroundWriter, atomic_write, open_store
+from .indexes import MISSING_TS, ExpenseTable, KeysetRange, SortIndex, TrigramIndex, to_ts
+from .charts import ChartRenderer
+from .csv_io import CsvExportJob, CsvImportJob, export_rows
+from .category_model import CategoryModel
+from .expense import Expense
+from .categorize import DEFAULT_CATEGORY_KEYWORDS, KeywordMatcher, format_keyword_table, parse_keyword_table
+from .profiling import Profiler, format_record
 
 # ------------------------------------------------------------
 # Expense Tracker Pro — Application Metadata
@@ -19,6 +29,290 @@ APP_VERSION = "1.0.0"
 APP_AUTHOR = "Tiago F."
 APP_YEAR = "2025"
 
+# Set EXPENSE_TRACKER_TIMING=1 to print/log how long startup takes.
+STARTUP_TIMING = os.environ.get("EXPENSE_TRACKER_TIMING", "") not in ("", "0")
+
+# Months covering this many days are loaded at startup (the 7/30/90-day
+# ranges, and the All Expenses page opens on this range); older months are
+# loaded when a view needs "All".
+LOADED_DAYS = "90"
+
+# All Expenses sort mode -> (Expense field, descending). The list is read a
+# page at a time from a SortIndex over that field (ties broken by id).
+SORT_FIELDS = {
+    None: ("id", False),
+    "amount_asc": ("amount", False),
+    "amount_desc": ("amount", True),
+    "date_new": ("ts", True),
+    "date_old": ("ts", False),
+}
+SORT_INDEX_FIELDS = ("id", "amount", "ts")
+
+# Set EXPENSE_TRACKER_PROFILE=1 (or "profiling": true in settings.json) to time
+# the views/handlers below into data/profile.log; F12 shows the last timings.
+PROFILING = os.environ.get("EXPENSE_TRACKER_PROFILE", "") not in ("", "0")
+
+
+def _ledger_rows(app, result):
+    return len(app.expenses)
+
+
+def _view_rows(app, result):
+    return app.expense_list_container.count if app.expense_list_container is not None else 0
+
+
+def _chart_rows(app, result):
+    return app.rollups.summary(app._range_start(app.charts_range), app.table)[1]
+
+
+# method name -> rows(app, result) for the timing log
+PROFILED_METHODS = {
+    "load_expenses": lambda app, result: len(result),
+    "save_expenses": _ledger_rows,
+    "export_to_csv": _ledger_rows,
+    "show_dashboard": _ledger_rows,
+    "show_view_expenses": _view_rows,
+    "refresh_view_expenses": _view_rows,
+    "show_charts": _chart_rows,
+    "show_pie_chart": _chart_rows,
+    "show_bar_chart": _chart_rows,
+    "show_line_chart": _chart_rows,
+}
+
+
+# ------------------------------------------------------------
+# Matplotlib is by far the slowest import, so it is only loaded by the chart
+# render thread (or in the background once the window is up).
+# ------------------------------------------------------------
+def _preload_matplotlib():
+    """Warm the import cache off the Tk thread (what the chart renderer needs)."""
+    try:
+        for name in ("matplotlib.figure", "matplotlib.backends.backend_agg", "PIL.Image"):
+            importlib.import_module(name)
+    except Exception as e:
+        print("Matplotlib preload failed:", e)
+
+
+class VirtualExpenseList(ctk.CTkFrame):
+    """
+    Expense list that only owns widgets for the rows that fit in the viewport.
+    Scrolling re-binds the pooled rows to other expenses instead of creating
+    new widgets, so opening/filtering/scrolling cost the same for any result size.
+
+    Rows come from a pager (indexes.KeysetRange or storage.SqlitePager) one
+    page at a time. The list remembers the cursor - (sort key, id) - of its
+    first row instead of an offset, so it stays on the same row when the
+    result is refreshed after an edit, add or delete.
+    """
+
+    ROW_HEIGHT = 78
+    NORMAL = "#313338"
+    HOVER = "#3a3c43"
+
+    def __init__(self, master, app, on_edit, on_delete, **kwargs):
+        super().__init__(master, **kwargs)
+        self.app = app
+        self.on_edit = on_edit
+        self.on_delete = on_delete
+        self.pager = None
+        self.count = 0         # rows in the result
+        self.currency = ""
+        self.anchor = None     # cursor of the expense in the first pooled row (None: the top)
+        self.offset = 0        # its position in the result (scrollbar and page label)
+        self.visible_rows = 1  # rows that fit completely in the viewport
+        self.rows = []
+        self.on_page = None    # callback(first, last, count) after each render
+
+        # shared fonts (one set for the whole list, not three per row)
+        self.fonts = (
+            ctk.CTkFont(size=14, weight="bold"),
+            ctk.CTkFont(size=12),
+            ctk.CTkFont(size=11),
+        )
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True, padx=(4, 0), pady=4)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", pady=4)
+
+        self.empty_label = ctk.CTkLabel(
+            self.viewport,
+            text="No expenses found.",
+            font=ctk.CTkFont(size=13),
+            text_color="#9ca3af"
+        )
+
+        self.viewport.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self.viewport)
+
+    # ---- row pool ----
+
+    def _make_row(self):
+        row = ctk.CTkFrame(self.viewport, fg_color=self.NORMAL, corner_radius=6, height=self.ROW_HEIGHT - 8)
+        row.pack_propagate(False)
+
+        def on_enter(event, r=row):
+            r.configure(fg_color=self.HOVER)
+
+        def on_leave(event, r=row):
+            # True leave check
+            x, y = r.winfo_pointerxy()
+            abs_x, abs_y = r.winfo_rootx(), r.winfo_rooty()
+            w, h = r.winfo_width(), r.winfo_height()
+            if not (abs_x <= x <= abs_x + w and abs_y <= y <= abs_y + h):
+                r.configure(fg_color=self.NORMAL)
+
+        row.bind("<Enter>", on_enter)
+        row.bind("<Leave>", on_leave)
+
+        left = ctk.CTkFrame(row, fg_color="transparent")
+        left.pack(side="left", fill="x", expand=True, padx=8, pady=4)
+
+        right = ctk.CTkFrame(row, fg_color="transparent")
+        right.pack(side="right", padx=8)
+
+        row.amount = ctk.CTkLabel(left, text="", font=self.fonts[0])
+        row.amount.pack(anchor="w")
+        row.desc = ctk.CTkLabel(left, text="", font=self.fonts[1], text_color="#d1d5db")
+        row.desc.pack(anchor="w")
+        row.meta = ctk.CTkLabel(left, text="", font=self.fonts[2], text_color="#9ca3af")
+        row.meta.pack(anchor="w", pady=(0, 2))
+
+        row.edit_btn = self.app.make_button(right, "Edit", None, width=70)
+        row.edit_btn.pack(side="left", padx=(0, 5))
+        row.delete_btn = self.app.make_button(right, "Delete", None, width=70, danger=True)
+        row.delete_btn.pack(side="left")
+
+        for w in (row, left, row.amount, row.desc, row.meta):
+            self._bind_wheel(w)
+
+        row.shown = False
+        return row
+
+    def _on_resize(self, event):
+        scale = ctk.ScalingTracker.get_widget_scaling(self)
+        row_px = self.ROW_HEIGHT * scale
+        self.visible_rows = max(1, int(event.height // row_px))
+        needed = self.visible_rows + 1  # one extra for the partially visible row
+        while len(self.rows) < needed:
+            self.rows.append(self._make_row())
+        self.render()
+
+    # ---- data binding ----
+
+    def set_pager(self, pager, currency, reset=True):
+        self.pager = pager
+        self.count = len(pager)
+        self.currency = currency
+        if reset:
+            self.anchor = None
+        self.offset = pager.position(self.anchor)
+        self.render()
+
+    def render(self):
+        pager = self.pager
+        page = self.visible_rows + 1
+        rows = pager.rows_from(self.anchor, page) if pager is not None else []
+        if len(rows) < self.visible_rows and self.anchor is not None:
+            # past the end (rows were removed): back up so the viewport stays full
+            back = pager.rows_before(self.anchor, self.visible_rows - len(rows))
+            rows = back + rows
+            self.offset = max(0, self.offset - len(back))
+        self.anchor = pager.cursor(rows[0]) if rows else None
+        if not rows:
+            self.offset = 0
+
+        if rows:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.pack(pady=20)
+
+        cur = self.currency
+        for slot, row in enumerate(self.rows):
+            if slot >= len(rows):
+                if row.shown:
+                    row.pack_forget()
+                    row.shown = False
+                continue
+
+            e = rows[slot]
+            row.amount.configure(text=f"{cur}{e.amount:.2f}")
+            row.desc.configure(text=e.description)
+            row.meta.configure(text=f"{e.category} • {e.date}")
+            row.edit_btn.configure(command=lambda i=e.id: self.on_edit(i))
+            row.delete_btn.configure(command=lambda i=e.id: self.on_delete(i))
+            if not row.shown:
+                # hidden rows are always a suffix of the pool, so this keeps slot order
+                row.pack(fill="x", pady=4, padx=4)
+                row.shown = True
+
+        n = self.count
+        if n:
+            self.scrollbar.set(self.offset / n, min(1.0, (self.offset + self.visible_rows) / n))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        if self.on_page is not None:
+            shown = min(len(rows), self.visible_rows)
+            self.on_page(self.offset + 1 if shown else 0, self.offset + shown, n)
+
+    # ---- scrolling (each step reads one page from the anchor) ----
+
+    def scroll_by(self, delta):
+        if self.pager is None or not delta:
+            return
+        if delta > 0:
+            ahead = self.pager.rows_from(self.anchor, delta + self.visible_rows)
+            step = min(delta, len(ahead) - self.visible_rows)
+            if step <= 0:
+                return
+            self.anchor = self.pager.cursor(ahead[step])
+            self.offset += step
+        else:
+            back = self.pager.rows_before(self.anchor, -delta)
+            if not back:
+                return
+            self.anchor = self.pager.cursor(back[0])
+            self.offset -= len(back)
+        self.render()
+
+    def page_down(self):
+        self.scroll_by(self.visible_rows)
+
+    def page_up(self):
+        self.scroll_by(-self.visible_rows)
+
+    def seek(self, pos):
+        """Jump to a position in the result (scrollbar drag)."""
+        if self.pager is None:
+            return
+        pos = max(0, min(int(pos), self.count - self.visible_rows))
+        if pos != self.offset:
+            self.anchor = self.pager.seek(pos)
+            self.offset = pos
+            self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.seek(float(value) * self.count)
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_by(3 * delta)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
+
 
 class ExpenseTrackerApp(ctk.CTk):
     # ---- Universal Button Style ----
@@ -32,6 +326,8 @@ class ExpenseTrackerApp(ctk.CTk):
     BTN_HEIGHT = 32
 
     def __init__(self):
+        self._startup_marks = [("module import", _IMPORT_T0)]
+        self._mark_startup("imports done")
         super().__init__()
         import os
         import sys
@@ -49,9 +345,6 @@ class ExpenseTrackerApp(ctk.CTk):
         # Ensure folder exists
         os.makedirs(data_dir, exist_ok=True)
 
-        self.expenses_file = os.path.join(data_dir, "expenses.json")
-        self.settings_file = os.path.join(data_dir, "settings.json")
-
         # --- Base window config ---
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("dark-blue")
@@ -60,9 +353,8 @@ class ExpenseTrackerApp(ctk.CTk):
         self.geometry("1150x680")
         self.minsize(1000, 620)
 
-        # --- State / settings ---
-        self.settings = self.load_settings()
-        self.expenses = self.load_expenses()
+        # --- State / settings (the ledger itself loads on a worker thread) ---
+        self.open_data(data_dir, background=True)
 
         # Global state for filters / UI
         self.search_query = ""
@@ -73,8 +365,17 @@ class ExpenseTrackerApp(ctk.CTk):
         self.dashboard_range = "30"
         self.selected_row_index = None
         self.chart_frame = None
+        self.chart_renderer = ChartRenderer()  # Agg rendering thread + image cache
+        self.chart_image_label = None
+        self.chart_placeholder = None
+        self.wanted_chart = None  # (key, ledger version) the chart frame is waiting for
+        self.current_chart = "pie"
         self.expense_list_container = None
         self.current_view = None
+        self.export_job = None
+        self.import_job = None
+        self.waiting_view = None  # page to redraw once the ledger has loaded
+        self._first_painted = False
 
         # --- Layout: sidebar + main area ---
         self.grid_columnconfigure(0, weight=0)   # sidebar
@@ -93,12 +394,251 @@ class ExpenseTrackerApp(ctk.CTk):
 
         # Initial page
         self.show_welcome()
+        self._mark_startup("widgets built")
 
         # Handle window close
         self.protocol("WM_DELETE_WINDOW", self.safe_close)
+        if self.profiler is not None:
+            self.bind("<F12>", self.toggle_profile_overlay)
+
+        # Runs once the mainloop has painted the first frame
+        self.after_idle(self._on_first_paint)
+
+    def open_data(self, data_dir, background=False):
+        """
+        Settings, ledger and indexes. No widgets, so benchmarks can call it too.
+        With background=True the ledger and indexes are built on a worker
+        thread; ledger_ready turns True on the Tk thread once they are in place.
+        """
+        self.expenses_file = os.path.join(data_dir, "expenses.json")
+        self.settings_file = os.path.join(data_dir, "settings.json")
+        self.category_model_file = os.path.join(data_dir, "category_model.json")
+
+        self.writer = BackgroundWriter()  # all disk writes happen off the Tk thread
+        self.settings = self.load_settings()
+        self.profiler = None
+        if PROFILING or self.settings.get("profiling"):
+            self.profiler = Profiler(
+                os.path.join(data_dir, "profile.log"), self.writer, self.settings.get("profile_overlay_rows", 15)
+            )
+            self.profiler.install(self, PROFILED_METHODS)
+        self.category_matcher = KeywordMatcher(self.settings["category_keywords"])
+        self.store = open_store(self.settings.get("storage_backend", "json"), data_dir, self.writer)
+        self._mark_startup("settings loaded")
+
+        self.ledger_ready = False
+        self.ledger_version = 0  # bumped on every change; keys the chart cache
+        self._loaded = None
+        self._ledger_loader = None
+        self._deferred_commits = None  # changes made while the worker owns the ledger
+        self.ledger_callbacks = []     # run once older months are attached (attach_in_background)
+        self.load_error = None         # last failed load / attach, shown with a Retry button
+        if background:
+            self._start_ledger_load(self._load_ledger)
+        else:
+            self._load_ledger()
+            self._install_ledger()
+
+    def _start_ledger_load(self, target, *args):
+        self.ledger_ready = False
+        # the worker attaches rows to the ledger and indexes it; changes wait until it is done
+        if self._deferred_commits is None:
+            self._deferred_commits = []
+        name = "ledger-load" if target == self._load_ledger else "ledger-attach"
+        self._ledger_loader = threading.Thread(target=target, args=args, name=name, daemon=True)
+        self._ledger_loader.start()
+        self.after(30, self._poll_ledger_load)
+
+    def _build_indexes(self, expenses, model=None, rollups=None):
+        rollups = rollups or self.store.rollups
+        # the saved model is checked against the whole ledger, attached or not
+        rows = CategoryModel.learned_rows(rollups) if expenses.missing_since() else None
+        self._loaded = (
+            expenses,
+            ExpenseTable(expenses),  # date index + NumPy columns
+            rollups,  # dashboard aggregates, saved with the ledger (whole ledger)
+            TrigramIndex(expenses),
+            # list pages (SQLite pages through its own column indexes)
+            {} if self.store.supports_queries else {f: SortIndex(f, expenses) for f in SORT_INDEX_FIELDS},
+            model or CategoryModel.load(self.category_model_file, expenses, rows),
+        )
+
+    def _load_ledger(self):
+        """Read the recent months and build the indexes (worker thread: no Tk calls here)."""
+        try:
+            expenses = self.load_expenses()
+            self._mark_startup("ledger loaded")
+            self._build_indexes(expenses)
+            self._mark_startup("indexes built")
+        except Exception as e:
+            print("Error loading expenses:", e)
+            self._loaded = e
+
+    def _attach_older(self, since):
+        """Attach older months (from `since` on) and rebuild the indexes over them (worker thread)."""
+        try:
+            self.expenses.attach_since(since)
+            model = None if self.category_model.partial else self.category_model
+            self._build_indexes(self.expenses, model, self.rollups)
+        except Exception as e:
+            print("Error loading older expenses:", e)
+            self._loaded = e
+
+    def _install_ledger(self):
+        (self.expenses, self.table, self.rollups, self.search_index,
+         self.sort_indexes, self.category_model) = self._loaded
+        self._loaded = None
+        self.ledger_version += 1
+        self.ledger_ready = True
+
+    def _run_deferred_commits(self):
+        deferred, self._deferred_commits = self._deferred_commits or [], None
+        for commit, args in deferred:
+            commit(*args)
+
+    def _defer_commit(self, commit, *args):
+        """While the ledger is being loaded or attached, queue the change instead (True if queued)."""
+        if self._deferred_commits is None:
+            return False
+        self._deferred_commits.append((commit, args))
+        return True
+
+    def _poll_ledger_load(self):
+        if self._ledger_loader.is_alive():
+            self.after(30, self._poll_ledger_load)
+            return
+        if isinstance(self._loaded, Exception):
+            self.load_error, self._loaded = self._loaded, None
+            self.ledger_callbacks = []
+            if self._ledger_loader.name == "ledger-attach":  # the indexes from before are still in place
+                self.ledger_ready = True
+                self._run_deferred_commits()
+            # else: changes stay queued until a retry loads the ledger; nothing is written meanwhile
+            messagebox.showerror("Error", f"Could not load your expenses:\n{self.load_error}")
+            view, self.waiting_view = self.waiting_view, None
+            if view is not None:
+                view()  # shows the error and a Retry button
+            return
+
+        first_load = self._ledger_loader.name == "ledger-load"
+        self._install_ledger()
+        self._run_deferred_commits()
+        if first_load:
+            self._mark_startup("ledger ready")
+        view, self.waiting_view = self.waiting_view, None
+        if view is not None:
+            view()
+        callbacks, self.ledger_callbacks = self.ledger_callbacks, []
+        for callback in callbacks:
+            callback()
+        if first_load and STARTUP_TIMING and self._first_painted:
+            self.report_startup_timing()
+
+    def _range_start(self, range_value):
+        """First timestamp a "7"/"30"/"90"/"all" range covers."""
+        return to_ts(self._cutoff(range_value)) if range_value in ("7", "30", "90") else MISSING_TS
+
+    def wait_for_ledger(self, view, title, since=None):
+        """
+        For pages that need the ledger: while it is still loading, show a
+        placeholder (redrawn as `view` once ready) and return True. `since`
+        (a timestamp, MISSING_TS for everything) asks for older months than
+        the ones loaded at startup; they are attached in the background.
+        """
+        if self.ledger_ready and (since is None or not self.expenses.missing_since(since)):
+            return False
+        self.clear_main()
+        container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
+        container.pack(expand=True, fill="both", padx=20, pady=20)
+        self.title_label(container, title).pack(anchor="w", pady=(0, 5))
+
+        if self.load_error is not None:
+            self.subtitle_label(container, f"Could not load your expenses:\n{self.load_error}").pack(
+                anchor="w", pady=(0, 15)
+            )
+            self.make_button(container, "Retry", lambda: self.retry_ledger_load(view), width=120).pack(anchor="w")
+            return True
+
+        if self.ledger_ready:
+            self._start_ledger_load(self._attach_older, since)
+        self.waiting_view = view
+        self.subtitle_label(container, "Loading your expenses…").pack(anchor="w", pady=(0, 15))
+        return True
+
+    def retry_ledger_load(self, view):
+        """Retry button of a failed load: load again (or attach again, via `view`) and redraw."""
+        self.load_error = None
+        if not self.ledger_ready and not self._ledger_loader.is_alive():
+            self._start_ledger_load(self._load_ledger)
+        view()
+
+    def attach_in_background(self, since, then):
+        """
+        Attach older months (from `since` on) without leaving the current page;
+        `then` runs on the Tk thread once the indexes cover them.
+        """
+        self.ledger_callbacks.append(then)
+        if self.ledger_ready:
+            self._start_ledger_load(self._attach_older, since)
+        # else: a load is already running; `then` checks again what it still needs
 
     # ================== CORE HELPERS ==================
 
+    def _mark_startup(self, label):
+        self._startup_marks.append((label, time.perf_counter()))
+
+    def _on_first_paint(self):
+        self._mark_startup("first frame painted")
+        self._first_painted = True
+        threading.Thread(target=_preload_matplotlib, name="mpl-preload", daemon=True).start()
+        if STARTUP_TIMING and self.ledger_ready:
+            self.report_startup_timing()
+
+    def report_startup_timing(self):
+        """Print the startup milestones and append them to data/startup_timing.log."""
+        t0 = self._startup_marks[0][1]
+        marks = {label: round((t - t0) * 1000, 1) for label, t in self._startup_marks}
+        lines = [f"{label:<22}{ms:>9.1f} ms" for label, ms in marks.items()]
+        print("Startup timing (since module import):\n  " + "\n  ".join(lines))
+
+        record = {
+            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "version": APP_VERSION,
+            "expenses": len(self.expenses),
+            "marks_ms": marks,
+        }
+        log_path = os.path.join(os.path.dirname(self.expenses_file), "startup_timing.log")
+
+        def append_log():
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+        self.writer.submit(None, append_log)
+
+    def toggle_profile_overlay(self, event=None):
+        """Small always-on-top window with the last timings (profiling only)."""
+        win = getattr(self, "profile_overlay", None)
+        if win is not None and win.winfo_exists():
+            self.profiler.on_record = None
+            win.destroy()
+            self.profile_overlay = None
+            return
+
+        win = self.profile_overlay = ctk.CTkToplevel(self)
+        win.title(f"Timings (full log: {self.profiler.log_path})")
+        win.geometry("600x320")
+        win.attributes("-topmost", True)
+        label = ctk.CTkLabel(win, text="", font=ctk.CTkFont(family="Consolas", size=12), justify="left", anchor="nw")
+        label.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def refresh(record=None):
+            lines = [format_record(r) for r in reversed(self.profiler.recent)]
+            label.configure(text="\n".join(lines) or "No timings yet.")
+
+        self.profiler.on_record = refresh
+        win.protocol("WM_DELETE_WINDOW", self.toggle_profile_overlay)
+        refresh()
+
     def after(self, ms, func=None):
         """Patch to track scheduled callbacks for clean closing."""
         if not hasattr(self, "_after_callbacks"):
@@ -173,6 +713,9 @@ class ExpenseTrackerApp(ctk.CTk):
             "temperature": 0.4,
             "chart_style": "minimal",
             "openai_model": "gpt-4o-mini",
+            "storage_backend": "json",  # "json" (binary snapshot + journal) or "sqlite"
+            "profiling": False,
+            "category_keywords": {cat: list(words) for cat, words in DEFAULT_CATEGORY_KEYWORDS.items()},
         }
 
         if not os.path.exists(self.settings_file):
@@ -192,70 +735,316 @@ class ExpenseTrackerApp(ctk.CTk):
         self._save_json_safely(self.settings_file, self.settings)
 
     def _save_json_safely(self, path, data):
-        """Safely save JSON to the correct file location."""
+        """Queue an atomic JSON write (temp file + fsync + os.replace) on the writer thread."""
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
+            raw = json.dumps(data, indent=4).encode("utf-8")
         except Exception as e:
             print("Error saving JSON:", e)
+            return
+        self.writer.submit(path, lambda: atomic_write(path, raw))
 
     def load_expenses(self):
-        if not os.path.exists(self.expenses_file):
-            return []
-
-        try:
-            with open(self.expenses_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                return data
-            return []
-        except:
-            return []
+        """
+        Load the ledger from the active store (month snapshots + journal, or
+        SQLite). Months older than the longest dashboard range stay on disk
+        until a view asks for them (wait_for_ledger).
+        """
+        data = self.store.load(since=self._range_start(LOADED_DAYS))
+        if self.store.needs_compaction():
+            self.store.compact(data, self.store.rollups)  # e.g. the rollups had to be rebuilt
+        return data
 
 
     def save_expenses(self):
-        self._save_json_safely(self.expenses_file, self.expenses)
+        """Write a full snapshot (compaction). Normal edits go through _commit_*."""
+        self.store.compact(self.expenses, self.rollups)
+
+    # ---- Ledger mutations (each one is a single journal append / SQL statement) ----
+
+    def _log_change(self, record):
+        self.store.append(record)
+        if self.store.needs_compaction():
+            self.save_expenses()
+
+    def _index_add(self, exp):
+        self.ledger_version += 1
+        self.table.add(exp)
+        self.rollups.add(exp)
+        self.search_index.add(exp)
+        for index in self.sort_indexes.values():
+            index.add(exp)
+        self.category_model.add(exp)
+        self._schedule_model_save()
+
+    def _index_remove(self, exp):
+        self.ledger_version += 1
+        self.table.remove(exp)
+        self.rollups.remove(exp)
+        self.search_index.remove(exp)
+        for index in self.sort_indexes.values():
+            index.remove(exp)
+        self.category_model.remove(exp)
+        self._schedule_model_save()
+
+    def _schedule_model_save(self):
+        # debounce: learning is per change, saving the counts happens once things go quiet
+        if getattr(self, "_model_save_job", None):
+            try: self.after_cancel(self._model_save_job)
+            except: pass
+        self._model_save_job = self.after(2000, self.save_category_model)
+
+    def save_category_model(self):
+        self._model_save_job = None
+        if self.category_model.dirty and not self.category_model.partial:
+            self.category_model.dirty = False
+            self._save_json_safely(self.category_model_file, self.category_model.to_dict())
+
+    def _commit_add(self, exp):
+        if self._defer_commit(self._commit_add, exp):
+            return
+        self.expenses.add(exp)  # assigns exp.id
+        self._index_add(exp)
+        self._log_change({"op": "add", "expense": exp})
+
+    def _commit_batch(self, exps):
+        """Add many expenses at once: one index merge and one journal record / SQL batch."""
+        if self._defer_commit(self._commit_batch, exps):
+            return
+        self.expenses.add_many(exps)
+        self.ledger_version += 1
+        self.table.add_many(exps)
+        self.search_index.add_many(exps)
+        for index in self.sort_indexes.values():
+            index.add_many(exps)
+        for exp in exps:
+            self.rollups.add(exp)
+            self.category_model.add(exp)
+        self._schedule_model_save()
+        self._log_change({"op": "add_many", "expenses": exps})
+
+    def _commit_edit(self, exp_id, changes):
+        if self._defer_commit(self._commit_edit, exp_id, changes):
+            return
+        exp = self.expenses.get(exp_id)
+        if exp is None:
+            return
+        old = exp.copy()  # the stores take it out of their rollups
+        self._index_remove(exp)
+        self.expenses.update(exp_id, changes)
+        self._index_add(exp)
+        self._log_change({"op": "edit", "id": exp_id, "expense": exp, "old": old})
+
+    def _commit_delete(self, exp_id):
+        if self._defer_commit(self._commit_delete, exp_id):
+            return
+        exp = self.expenses.remove(exp_id)
+        if exp is None:
+            return
+        self._index_remove(exp)
+        self._log_change({"op": "delete", "id": exp_id, "old": exp})
 
     def export_to_csv(self):
-        """Export expenses to a CSV file."""
+        """Ask what to export, then stream it to a CSV file in the background."""
         if not self.expenses:
             messagebox.showinfo("Export", "No expenses to export.")
             return
+        if getattr(self, "export_job", None) is not None and not self.export_job.finished:
+            messagebox.showinfo("Export", "An export is already running.")
+            return
+
+        win = ctk.CTkToplevel(self)
+        win.title("Export CSV")
+        win.geometry("360x300")
+        win.grab_set()
+
+        ctk.CTkLabel(win, text="What should be exported?", font=ctk.CTkFont(size=14, weight="bold")).pack(
+            anchor="w", padx=15, pady=(15, 8)
+        )
+
+        scope_var = ctk.StringVar(value="view")
+        ctk.CTkRadioButton(win, text="Current view (search, filter and sort)", variable=scope_var, value="view").pack(
+            anchor="w", padx=15, pady=3
+        )
+        ctk.CTkRadioButton(win, text="Entire ledger", variable=scope_var, value="all").pack(
+            anchor="w", padx=15, pady=3
+        )
+        ctk.CTkRadioButton(win, text="Date range", variable=scope_var, value="range").pack(
+            anchor="w", padx=15, pady=3
+        )
+
+        range_frame = ctk.CTkFrame(win, fg_color="transparent")
+        range_frame.pack(anchor="w", padx=40, pady=(2, 10))
+        entry_from = ctk.CTkEntry(range_frame, width=110)
+        entry_from.insert(0, (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d"))
+        entry_from.pack(side="left")
+        ctk.CTkLabel(range_frame, text="  to  ").pack(side="left")
+        entry_to = ctk.CTkEntry(range_frame, width=110)
+        entry_to.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        entry_to.pack(side="left")
+
+        status = ctk.CTkLabel(win, text="", text_color="#9ca3af")
+
+        def on_export():
+            if not win.winfo_exists():
+                return
+            scope = scope_var.get()
+            if scope == "range":
+                try:
+                    start = datetime.strptime(entry_from.get().strip(), "%Y-%m-%d")
+                    end = datetime.strptime(entry_to.get().strip(), "%Y-%m-%d") + timedelta(days=1)
+                except ValueError:
+                    messagebox.showerror("Error", "Dates must look like 2025-01-31.", parent=win)
+                    return
+            since = MISSING_TS if scope == "all" else to_ts(start) if scope == "range" else None
+            if since is not None and (not self.ledger_ready or self.expenses.missing_since(since)):
+                # older months are not loaded yet: load them behind the dialog, then carry on
+                status.configure(text="Loading older months…")
+                export_button.configure(state="disabled")
+                self.attach_in_background(since, on_export)
+                return
+            status.configure(text="")
+            export_button.configure(state="normal")
+
+            if scope == "view":
+                source = self.get_filtered_sorted_expenses()
+            elif scope == "all":
+                source = list(self.expenses)  # references only, rows are not copied
+            else:
+                source = self.table.between(to_ts(start), to_ts(end))
+
+            if not source:
+                messagebox.showinfo("Export", "No expenses to export.", parent=win)
+                return
 
-        # Ask user where to save file
-        from datetime import datetime
-        default_name = f"Expenses_{datetime.now().strftime('%Y-%m-%d')}.csv"
+            # Ask user where to save file
+            default_name = f"Expenses_{datetime.now().strftime('%Y-%m-%d')}.csv"
+            file_path = filedialog.asksaveasfilename(
+                parent=win,
+                initialfile=default_name,
+                defaultextension=".csv",
+                filetypes=[("CSV files", "*.csv")],
+                title="Save Exported Expenses"
+            )
+            if not file_path:
+                return  # user canceled
 
-        file_path = filedialog.asksaveasfilename(
-            initialfile=default_name,
-            defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv")],
-            title="Save Exported Expenses"
+            win.destroy()
+            rows = export_rows(source, self.get_currency_symbol())
+            self.export_job = CsvExportJob(file_path, rows, len(source)).start()
+            self._show_export_progress(self.export_job)
+
+        status.pack(anchor="w", padx=15)
+        buttons = self.button_row(
+            win,
+            [
+                ("Cancel", win.destroy, {"width": 120}),
+                ("Export", on_export, {"width": 120, "primary": True}),
+            ],
         )
+        buttons.pack(padx=15, pady=(5, 15))
+        export_button = buttons.winfo_children()[-1]
+
+    def _show_export_progress(self, job):
+        win = ctk.CTkToplevel(self)
+        win.title("Exporting…")
+        win.geometry("360x150")
 
+        label = ctk.CTkLabel(win, text=f"Exported 0 of {job.total} expenses")
+        label.pack(anchor="w", padx=15, pady=(15, 8))
+        bar = ctk.CTkProgressBar(win)
+        bar.set(0)
+        bar.pack(fill="x", padx=15, pady=(0, 12))
+
+        self.make_button(win, "Cancel", job.cancel, width=120, danger=True).pack(pady=(0, 15))
+        win.protocol("WM_DELETE_WINDOW", job.cancel)
+
+        def poll():
+            if not win.winfo_exists():
+                return
+            if not job.finished:
+                label.configure(text=f"Exported {job.done} of {job.total} expenses")
+                bar.set(job.done / job.total if job.total else 1)
+                self.after(100, poll)
+                return
+
+            win.destroy()
+            if job.cancelled:
+                messagebox.showinfo("Export", "Export cancelled.")
+            elif job.error is not None:
+                messagebox.showerror("Export Failed", f"Could not export:\n{job.error}")
+            else:
+                messagebox.showinfo("Export Complete", f"Expenses exported to:\n{job.path}")
+
+        poll()
 
-        if not file_path:
-            return  # user canceled
 
-        import csv
+    def import_from_csv(self):
+        """Pick a CSV file (same columns as the export) and import it in the background."""
+        if self.import_job is not None and not self.import_job.done():
+            messagebox.showinfo("Import", "An import is already running.")
+            return
 
-        with open(file_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["Amount", "Currency", "Category", "Description", "Date"])
+        file_path = filedialog.askopenfilename(
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            title="Import Expenses"
+        )
+        if not file_path:
+            return
 
-            currency = self.settings.get("currency", "€")
+        try:
+            self.import_job = CsvImportJob(file_path, self.guess_category).start()
+        except OSError as e:
+            messagebox.showerror("Import Failed", f"Could not open file:\n{e}")
+            return
+        self._show_import_progress(self.import_job)
 
-            for exp in self.get_filtered_sorted_expenses():
-                writer.writerow([
-                    f"{float(exp['amount']):.2f}",
-                    currency,
-                    exp["category"],
-                    exp["description"],
-                    exp["date"]
-                ])
+    def _show_import_progress(self, job):
+        win = ctk.CTkToplevel(self)
+        win.title("Importing…")
+        win.geometry("360x150")
+
+        label = ctk.CTkLabel(win, text="Imported 0 expenses")
+        label.pack(anchor="w", padx=15, pady=(15, 8))
+        bar = ctk.CTkProgressBar(win)
+        bar.set(0)
+        bar.pack(fill="x", padx=15, pady=(0, 12))
+
+        self.make_button(win, "Cancel", job.cancel, width=120, danger=True).pack(pady=(0, 15))
+        win.protocol("WM_DELETE_WINDOW", job.cancel)
+        committed = [0]
+
+        def poll():
+            if self._deferred_commits is not None:  # ledger is being loaded / attached
+                self.after(50, poll)
+                return
+            # batches are committed here, on the Tk thread, as they arrive
+            for batch in job.poll():
+                self._commit_batch(batch)
+                committed[0] += len(batch)
+
+            if not job.done():
+                if win.winfo_exists():
+                    label.configure(text=f"Imported {committed[0]} expenses ({job.skipped} skipped)")
+                    bar.set(job.read_bytes / job.total_bytes if job.total_bytes else 1)
+                self.after(50, poll)
+                return
 
-        messagebox.showinfo("Export Complete", f"Expenses exported to:\n{file_path}")
+            if win.winfo_exists():
+                win.destroy()
+            if committed[0]:
+                self.refresh_view_expenses(keep_scroll=True)
 
+            skipped = ""
+            if job.skipped:
+                skipped = f"\n\nSkipped {job.skipped} invalid rows:\n" + "\n".join(job.errors)
+            if job.error is not None:
+                messagebox.showerror("Import Failed", f"Could not import:\n{job.error}")
+            elif job.cancelled:
+                messagebox.showinfo("Import", f"Import cancelled after {committed[0]} expenses.{skipped}")
+            else:
+                messagebox.showinfo("Import Complete", f"Imported {committed[0]} expenses.{skipped}")
+
+        poll()
 
     def get_currency_symbol(self):
         return self.settings.get("currency", "€")
@@ -263,7 +1052,11 @@ class ExpenseTrackerApp(ctk.CTk):
     def clear_main(self):
         for w in self.main_frame.winfo_children():
             w.destroy()
+        self.waiting_view = None
         self.chart_frame = None
+        self.chart_image_label = None
+        self.chart_placeholder = None
+        self.wanted_chart = None
         self.expense_list_container = None
 
     def safe_close(self):
@@ -278,6 +1071,25 @@ class ExpenseTrackerApp(ctk.CTk):
         try: self.quit()
         except: pass
 
+        # stop a running export (its partial file is removed) or import
+        for job in (getattr(self, "export_job", None), getattr(self, "import_job", None)):
+            if job is not None and not job.finished:
+                job.cancel()
+                job.join(timeout=5)
+
+        # flush queued writes before the window goes away
+        if self._ledger_loader is not None:
+            self._ledger_loader.join(timeout=5)
+            if self._deferred_commits and not self._ledger_loader.is_alive() and isinstance(self._loaded, tuple):
+                self._install_ledger()
+                self._run_deferred_commits()
+        try: self.save_category_model()
+        except: pass
+        try: self.store.close()
+        except: pass
+        try: self.writer.close()
+        except: pass
+
         self.destroy()
 
 
@@ -371,25 +1183,42 @@ class ExpenseTrackerApp(ctk.CTk):
             justify="left",
         ).pack(anchor="w", pady=(0, 20))
 
-        # Quick stats
-        cur = self.get_currency_symbol()
-        total = sum(float(e.get("amount", 0)) for e in self.expenses)
-        count = len(self.expenses)
-
+        # Quick stats (filled in once the ledger has loaded)
         stats_frame = ctk.CTkFrame(container)
         stats_frame.pack(anchor="w", pady=10)
 
-        ctk.CTkLabel(
-            stats_frame,
-            text=f"Total recorded: {cur}{total:.2f}",
-            font=ctk.CTkFont(size=14, weight="bold"),
-        ).pack(anchor="w")
+        if self.load_error is not None and not self.ledger_ready:
+            ctk.CTkLabel(
+                stats_frame,
+                text=f"Could not load your expenses:\n{self.load_error}",
+                font=ctk.CTkFont(size=14),
+                text_color="#9ca3af",
+                justify="left",
+            ).pack(anchor="w")
+            self.make_button(
+                stats_frame, "Retry", lambda: self.retry_ledger_load(self.show_welcome), width=120
+            ).pack(anchor="w", pady=(8, 0))
+        elif not self.ledger_ready:
+            self.waiting_view = self.show_welcome
+            ctk.CTkLabel(
+                stats_frame,
+                text="Loading your expenses…",
+                font=ctk.CTkFont(size=14),
+                text_color="#9ca3af",
+            ).pack(anchor="w")
+        else:
+            cur = self.get_currency_symbol()
+            ctk.CTkLabel(
+                stats_frame,
+                text=f"Total recorded: {cur}{self.rollups.total:.2f}",
+                font=ctk.CTkFont(size=14, weight="bold"),
+            ).pack(anchor="w")
 
-        ctk.CTkLabel(
-            stats_frame,
-            text=f"Number of expenses: {count}",
-            font=ctk.CTkFont(size=13),
-        ).pack(anchor="w", pady=(2, 0))
+            ctk.CTkLabel(
+                stats_frame,
+                text=f"Number of expenses: {self.rollups.count}",
+                font=ctk.CTkFont(size=13),
+            ).pack(anchor="w", pady=(2, 0))
 
         # Quick actions
         actions = ctk.CTkFrame(container, fg_color="transparent")
@@ -408,23 +1237,54 @@ class ExpenseTrackerApp(ctk.CTk):
     # ================== ADD EXPENSE ==================
 
     def guess_category(self, desc: str) -> str:
-        desc = desc.lower()
-        mapping = {
-            "food": ["restaurant", "dinner", "lunch", "groceries", "cafe", "coffee"],
-            "transport": ["uber", "bus", "taxi", "train", "fuel", "gas", "petrol"],
-            "shopping": ["amazon", "store", "shopping", "clothes"],
-            "entertainment": ["netflix", "spotify", "cinema", "movie", "game"],
-            "bills": ["electricity", "water", "internet", "rent", "bill"],
-            "health": ["pharmacy", "doctor", "gym", "health"],
-            "travel": ["hotel", "flight", "airbnb", "booking.com", "trip"],
-        }
-        for cat, keywords in mapping.items():
-            if any(k in desc for k in keywords):
-                return cat.capitalize()
-        return "Other"
+        # learned model first; keywords cover words it has never seen
+        return self.category_model.predict(desc) or self.category_matcher.classify(desc)
+
+    def set_category_keywords(self, table):
+        """Replace the keyword table (saved in settings) and recompile the matcher."""
+        self.settings["category_keywords"] = table
+        self.category_matcher = KeywordMatcher(table)
+        self.save_settings_file()
+
+    def recategorize_expenses(self, only_other=True):
+        """
+        Re-run the keyword matcher over the ledger in one pass. With only_other,
+        just the "Other" rows are touched; otherwise every row whose description
+        matches a keyword gets that category. Returns the number of changed rows.
+        """
+        classify = self.category_matcher.classify
+        changed = []
+        for exp in self.expenses:
+            old = exp.category
+            if only_other and old != "Other":
+                continue
+            new = classify(exp.description, default=old)
+            if new != old:
+                changed.append((exp, new))
+
+        if not changed:
+            return 0
+
+        old = [exp.copy() for exp, _ in changed]  # the stores take these out of their rollups
+        for exp, new in changed:
+            self.rollups.remove(exp)
+            self.search_index.remove(exp)
+            self.category_model.remove(exp)
+            self.expenses.update(exp.id, {"category": new})
+            self.table.recategorize(exp)
+            self.rollups.add(exp)
+            self.search_index.add(exp)
+            self.category_model.add(exp)
+        self.ledger_version += 1
+        self._schedule_model_save()
+        exps = [exp for exp, _ in changed]
+        self._log_change({"op": "edit_many", "expenses": exps, "old": old})  # one record / SQL batch
+        return len(changed)
 
     def show_add_expense(self):
         self.current_view = self.show_dashboard
+        if self.wait_for_ledger(self.show_add_expense, "Add Expense"):
+            return
         self.clear_main()
 
         container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -519,14 +1379,8 @@ class ExpenseTrackerApp(ctk.CTk):
                 messagebox.showerror("Error", "Invalid amount. Please enter a number.")
                 return
 
-            new_exp = {
-                "amount": amount,
-                "description": desc,
-                "category": cat,
-                "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            }
-            self.expenses.append(new_exp)
-            self.save_expenses()
+            new_exp = Expense(amount, desc, cat, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            self._commit_add(new_exp)
             messagebox.showinfo("Added", "Expense saved successfully.")
             self.show_view_expenses()
 
@@ -587,7 +1441,48 @@ class ExpenseTrackerApp(ctk.CTk):
             command=lambda v: self.update_setting("openai_model", v)
         )
         ai_box.set(self.settings.get("openai_model", "gpt-4o-mini"))
-        ai_box.pack(anchor="w", pady=(2, 25))
+        ai_box.pack(anchor="w", pady=(2, 12))
+
+        # Category keywords (one "Category: keyword, keyword" per line)
+        ctk.CTkLabel(container, text="Category Keywords", font=ctk.CTkFont(size=14)).pack(anchor="w")
+        keywords_box = ctk.CTkTextbox(container, width=520, height=110)
+        keywords_box.insert("1.0", format_keyword_table(self.settings["category_keywords"]))
+        keywords_box.pack(anchor="w", pady=(2, 4))
+
+        def apply_keywords():
+            table = parse_keyword_table(keywords_box.get("1.0", "end"))
+            self.set_category_keywords(table)
+            return table
+
+        def recategorize(only_other):
+            apply_keywords()
+            if self.wait_for_ledger(self.show_settings, "Settings", MISSING_TS):
+                return  # every month has to be loaded first; the page comes back when it is
+            n = self.recategorize_expenses(only_other=only_other)
+            messagebox.showinfo("Categories", f"Updated {n} expense(s).")
+
+        self.button_row(
+            container,
+            [
+                ("Save Keywords", lambda: (apply_keywords(), messagebox.showinfo("Settings", "Keywords saved!")), {"width": 130}),
+                ("Re-categorize \"Other\"", lambda: recategorize(True), {"width": 160}),
+                ("Re-categorize All", lambda: recategorize(False), {"width": 140}),
+            ]
+        )
+
+        # Profiling (read at startup)
+        profiling_var = ctk.BooleanVar(value=bool(self.settings.get("profiling", False)))
+
+        def toggle_profiling():
+            self.settings["profiling"] = profiling_var.get()
+            self.save_settings_file()
+
+        ctk.CTkSwitch(
+            container,
+            text="Record view timings to data/profile.log (applies after restart, F12 shows them)",
+            variable=profiling_var,
+            command=toggle_profiling,
+        ).pack(anchor="w", pady=(16, 0))
 
         # --- About section ---
         about_frame = ctk.CTkFrame(container, fg_color="transparent")
@@ -618,62 +1513,67 @@ class ExpenseTrackerApp(ctk.CTk):
 
     # ================== VIEW EXPENSES ==================
 
-    def get_filtered_sorted_expenses(self):
-        data = list(self.expenses)
+    def _cutoff(self, range_value):
+        return datetime.now() - timedelta(days=int(range_value))
+
+    def get_expense_pager(self):
+        """The current search / filters / sort as a pager the list reads a page at a time."""
+        category = None if self.current_category_filter == "All" else self.current_category_filter
+        ranged = self.current_date_filter in ("7", "30", "90")
+        since = to_ts(self._cutoff(self.current_date_filter)) if ranged else None
+        if self.store.supports_queries:
+            return self.store.pager(
+                search=self.search_query, category=category, since=since, sort=self.current_sort_mode
+            )
+
+        field, reverse = SORT_FIELDS.get(self.current_sort_mode, SORT_FIELDS[None])
+        index = self.sort_indexes[field]
 
-        # search filter
         if self.search_query:
-            q = self.search_query.lower()
-            data = [
-                e
-                for e in data
-                if q in str(e.get("description", "")).lower()
-                or q in str(e.get("category", "")).lower()
-            ]
+            # search filter (trigram index: cost follows the number of matches)
+            data = self.search_index.search(self.search_query)
+            if since is not None:
+                data = [e for e in data if e.ts >= since]
+        elif category is None:
+            # nothing to filter, or a date range in date order: pages come straight from the index
+            if since is None:
+                return index.range(reverse=reverse)
+            if field == "ts":
+                return index.range(lo=(since,), reverse=reverse)
+            data = self.table.since(since)  # bisect on the date index
+        else:
+            data = self.table.since(since) if since is not None else list(self.expenses)
 
         # category filter (future use)
-        if self.current_category_filter != "All":
-            data = [e for e in data if e.get("category") == self.current_category_filter]
-
-        # date filter
-        if self.current_date_filter in ("7", "30", "90"):
-            days = int(self.current_date_filter)
-            cutoff = datetime.now() - timedelta(days=days)
-
-            def parse_date(e):
-                try:
-                    return datetime.strptime(e.get("date", "")[:19], "%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    return datetime.min
+        if category is not None:
+            data = [e for e in data if e.category == category]
 
-            data = [e for e in data if parse_date(e) >= cutoff]
+        # a filtered result is sorted once, then read by page like an index
+        data.sort(key=index.cursor)
+        return KeysetRange(data, index.cursor, reverse=reverse)
 
-        # sorting
-        if self.current_sort_mode == "amount_asc":
-            data.sort(key=lambda e: float(e.get("amount", 0)))
-        elif self.current_sort_mode == "amount_desc":
-            data.sort(key=lambda e: float(e.get("amount", 0)), reverse=True)
-        elif self.current_sort_mode == "date_new":
-            data.sort(key=lambda e: e.get("date", ""), reverse=True)
-        elif self.current_sort_mode == "date_old":
-            data.sort(key=lambda e: e.get("date", ""))
-
-        for e in data:
-            e["category"] = e.get("category", "Other").title()
-
-        return data
+    def get_filtered_sorted_expenses(self):
+        """Every row of the current view, in view order (exports)."""
+        if self.store.supports_queries:
+            self.writer.flush()  # a one-off read of everything: wait for queued writes
+        return self.get_expense_pager().all()
 
 
-    def show_view_expenses(self):
+    def show_view_expenses(self, keep_filters=False):
         self.current_view = self.show_view_expenses
-        self.clear_main()
-
-        # reset basic state
-        self.search_query = ""
-        self.current_category_filter = "All"
-        self.current_date_filter = "all"
-        self.current_sort_mode = None
+        if not keep_filters:
+            # reset basic state
+            self.search_query = ""
+            self.current_category_filter = "All"
+            # open on the months loaded at startup; picking "All" attaches the older ones
+            partial = not self.ledger_ready or self.expenses.missing_since()
+            self.current_date_filter = LOADED_DAYS if partial and not self.store.supports_queries else "all"
+            self.current_sort_mode = None
         self.selected_row_index = None
+        rebuild = lambda: self.show_view_expenses(keep_filters=True)
+        if self.wait_for_ledger(rebuild, "All Expenses", self._range_start(self.current_date_filter)):
+            return
+        self.clear_main()
 
         container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
         container.pack(expand=True, fill="both", padx=20, pady=20)
@@ -697,6 +1597,8 @@ class ExpenseTrackerApp(ctk.CTk):
             placeholder_text="Search description or category...",
             width=260,
         )
+        if self.search_query:
+            search_entry.insert(0, self.search_query)
         search_entry.pack(side="left", padx=(0, 8))
 
         def run_search():
@@ -742,19 +1644,55 @@ class ExpenseTrackerApp(ctk.CTk):
 
         refresh_date_buttons()
 
-        # ---- Export Button ----
-        self.make_button(container, "📤 Export CSV", self.export_to_csv, width=140).pack(
-            anchor="w", pady=(5, 10)
-        )       
+        # Sort
+        sort_modes = {
+            "Order added": None,
+            "Newest first": "date_new",
+            "Oldest first": "date_old",
+            "Amount ↑": "amount_asc",
+            "Amount ↓": "amount_desc",
+        }
+
+        def set_sort(label):
+            self.current_sort_mode = sort_modes[label]
+            self.refresh_view_expenses()
+
+        sort_menu = ctk.CTkOptionMenu(top, values=list(sort_modes), command=set_sort, width=140)
+        sort_menu.set(next(label for label, mode in sort_modes.items() if mode == self.current_sort_mode))
+        sort_menu.pack(side="left", padx=(20, 0))
+
+        # ---- Import / Export Buttons ----
+        io_row = ctk.CTkFrame(container, fg_color="transparent")
+        io_row.pack(anchor="w", pady=(5, 10))
+        self.make_button(io_row, "📥 Import CSV", self.import_from_csv, width=140).pack(side="left", padx=(0, 8))
+        self.make_button(io_row, "📤 Export CSV", self.export_to_csv, width=140).pack(side="left")
 
         # --- List container ---
         list_frame = ctk.CTkFrame(container)
         list_frame.pack(expand=True, fill="both")
 
-        scroll = ctk.CTkScrollableFrame(list_frame, fg_color="#2b2d31")
-        scroll.pack(expand=True, fill="both", pady=(5, 0))
+        expense_list = VirtualExpenseList(
+            list_frame,
+            self,
+            on_edit=self.edit_expense,
+            on_delete=self.delete_expense,
+            fg_color="#2b2d31",
+        )
+        expense_list.pack(expand=True, fill="both", pady=(5, 0))
 
-        self.expense_list_container = scroll
+        # --- Page controls (the wheel and scrollbar page too) ---
+        nav = ctk.CTkFrame(container, fg_color="transparent")
+        nav.pack(fill="x", pady=(8, 0))
+        self.make_button(nav, "◀ Previous", expense_list.page_up, width=110).pack(side="left")
+        self.make_button(nav, "Next ▶", expense_list.page_down, width=110).pack(side="right")
+        page_label = ctk.CTkLabel(nav, text="", text_color="#9ca3af")
+        page_label.pack(side="left", expand=True)
+
+        def show_page(first, last, count):
+            page_label.configure(text=f"{first:,}–{last:,} of {count:,}" if count else "")
+
+        expense_list.on_page = show_page
+        self.expense_list_container = expense_list
         self.refresh_view_expenses()
 
     def update_setting(self, key, value):
@@ -770,103 +1708,36 @@ class ExpenseTrackerApp(ctk.CTk):
 
 
     
-    def refresh_view_expenses(self):
-        import customtkinter as ctk
-
-        # Clear container
-        for w in self.expense_list_container.winfo_children():
-            w.destroy()
-
-        data = self.get_filtered_sorted_expenses()
-        cur = self.get_currency_symbol()
-
-        if not data:
-            ctk.CTkLabel(
-                self.expense_list_container,
-                text="No expenses found.",
-                font=ctk.CTkFont(size=13),
-                text_color="#9ca3af"
-            ).pack(pady=20)
+    def refresh_view_expenses(self, keep_scroll=False):
+        if self.expense_list_container is None:
+            return
+        if self.expenses.missing_since(self._range_start(self.current_date_filter)):
+            self.show_view_expenses(keep_filters=True)  # older months load first
+            return
+        if self.store.supports_queries and self.store.writes_pending():
+            # SQLite pages read what is committed; look again once the writer is through
+            self.after(20, lambda: self.refresh_view_expenses(keep_scroll))
             return
 
-        NORMAL = "#313338"
-        HOVER = "#3a3c43"
-
-        for idx, e in enumerate(data):
-            row = ctk.CTkFrame(self.expense_list_container, fg_color=NORMAL, corner_radius=6)
-            row.pack(fill="x", pady=4, padx=4)
-
-            def on_enter(event, r=row):
-                r.configure(fg_color=HOVER)
-
-            def on_leave(event, r=row):
-                # True leave check
-                x, y = r.winfo_pointerxy()
-                abs_x, abs_y = r.winfo_rootx(), r.winfo_rooty()
-                w, h = r.winfo_width(), r.winfo_height()
-                if not (abs_x <= x <= abs_x + w and abs_y <= y <= abs_y + h):
-                    r.configure(fg_color=NORMAL)
-
-            row.bind("<Enter>", on_enter)
-            row.bind("<Leave>", on_leave)
-
-            left = ctk.CTkFrame(row, fg_color="transparent")
-            left.pack(side="left", fill="x", expand=True, padx=8, pady=4)
-
-            right = ctk.CTkFrame(row, fg_color="transparent")
-            right.pack(side="right", padx=8)
-
-            amount = ctk.CTkLabel(
-                left,
-                text=f"{cur}{float(e.get('amount', 0)):.2f}",
-                font=ctk.CTkFont(size=14, weight="bold")
-            )
-            amount.pack(anchor="w")
-
-            desc = ctk.CTkLabel(
-                left,
-                text=e.get("description", ""),
-                font=ctk.CTkFont(size=12),
-                text_color="#d1d5db"
-            )
-            desc.pack(anchor="w")
-
-            category = e.get("category", "Other").title()
-            meta = ctk.CTkLabel(
-                left,
-                text=f"{e.get('category', 'Other')} • {e.get('date', '')}",
-                font=ctk.CTkFont(size=11),
-                text_color="#9ca3af"
-            )
-            meta.pack(anchor="w", pady=(0, 2))
-
-            # Buttons
-            def edit_closure(i=idx):
-                self.edit_expense(i)
-
-            def delete_closure(i=idx):
-                self.delete_expense(i)
-
-            self.make_button(right, "Edit", edit_closure, width=70).pack(side="left", padx=(0, 5))
-            self.make_button(right, "Delete", delete_closure, width=70, danger=True).pack(side="left")
+        pager = self.get_expense_pager()
+        self.expense_list_container.set_pager(pager, self.get_currency_symbol(), reset=not keep_scroll)
 
 
-    def delete_expense(self, index):
-        if index < 0 or index >= len(self.expenses):
+    def delete_expense(self, exp_id):
+        exp = self.expenses.get(exp_id)
+        if exp is None:
             return
-        exp = self.expenses[index]
         if messagebox.askyesno(
             "Confirm delete",
-            f'Delete expense "{exp.get("description", "")}"?',
+            f'Delete expense "{exp.description}"?',
         ):
-            self.expenses.pop(index)
-            self.save_expenses()
-            self.refresh_view_expenses()
+            self._commit_delete(exp_id)
+            self.refresh_view_expenses(keep_scroll=True)
 
-    def edit_expense(self, index):
-        if index < 0 or index >= len(self.expenses):
+    def edit_expense(self, exp_id):
+        exp = self.expenses.get(exp_id)
+        if exp is None:
             return
-        exp = self.expenses[index]
 
         win = ctk.CTkToplevel(self)
         win.title("Edit Expense")
@@ -877,17 +1748,17 @@ class ExpenseTrackerApp(ctk.CTk):
 
         ctk.CTkLabel(win, text=f"Amount ({cur})").pack(anchor="w", padx=15, pady=(15, 2))
         entry_amount = ctk.CTkEntry(win)
-        entry_amount.insert(0, str(exp.get("amount", "")))
+        entry_amount.insert(0, str(exp.amount))
         entry_amount.pack(fill="x", padx=15, pady=(0, 8))
 
         ctk.CTkLabel(win, text="Description").pack(anchor="w", padx=15, pady=(5, 2))
         entry_desc = ctk.CTkEntry(win)
-        entry_desc.insert(0, exp.get("description", ""))
+        entry_desc.insert(0, exp.description)
         entry_desc.pack(fill="x", padx=15, pady=(0, 8))
 
         ctk.CTkLabel(win, text="Category").pack(anchor="w", padx=15, pady=(5, 2))
         entry_cat = ctk.CTkEntry(win)
-        entry_cat.insert(0, exp.get("category", "Other"))
+        entry_cat.insert(0, exp.category)
         entry_cat.pack(fill="x", padx=15, pady=(0, 12))
 
         def save_changes():
@@ -897,34 +1768,22 @@ class ExpenseTrackerApp(ctk.CTk):
                 messagebox.showerror("Error", "Invalid amount.")
                 return
 
-            exp["amount"] = amount
-            exp["description"] = entry_desc.get().strip()
-            exp["category"] = entry_cat.get().strip() or "Other"
-            self.save_expenses()
-            self.refresh_view_expenses()
+            self._commit_edit(exp_id, {
+                "amount": amount,
+                "description": entry_desc.get().strip(),
+                "category": entry_cat.get().strip() or "Other",
+            })
+            self.refresh_view_expenses(keep_scroll=True)
             win.destroy()
 
         self.make_button(win, "Save", save_changes, width=120, primary=True).pack(pady=(0, 15))
 
     # ================== DASHBOARD ==================
 
-    def _filter_by_range(self, range_value):
-        if range_value not in ("7", "30", "90"):
-            return list(self.expenses)
-        days = int(range_value)
-        cutoff = datetime.now() - timedelta(days=days)
-        out = []
-        for e in self.expenses:
-            try:
-                dt = datetime.strptime(e.get("date", "")[:19], "%Y-%m-%d %H:%M:%S")
-            except Exception:
-                continue
-            if dt >= cutoff:
-                out.append(e)
-        return out
-
     def show_dashboard(self):
         self.current_view = self.show_dashboard
+        if self.wait_for_ledger(self.show_dashboard, "Dashboard"):  # "All" comes from the rollups
+            return
         self.clear_main()
 
         container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -988,16 +1847,7 @@ class ExpenseTrackerApp(ctk.CTk):
         stats_frame.pack(fill="x", pady=(5, 10))
 
         cur = self.get_currency_symbol()
-        filtered = self._filter_by_range(self.dashboard_range)
-
-        total = sum(float(e.get("amount", 0)) for e in filtered)
-        count = len(filtered)
-
-        if filtered:
-            dates = [e.get("date", "")[:10] for e in filtered]
-            unique_days = len(set(dates))
-        else:
-            unique_days = 0
+        total, count, unique_days, by_cat = self.rollups.summary(self._range_start(self.dashboard_range), self.table)
 
         avg_per_day = total / unique_days if unique_days else 0
         avg_per_exp = total / count if count else 0
@@ -1030,9 +1880,7 @@ class ExpenseTrackerApp(ctk.CTk):
         col3 = ctk.CTkFrame(stats_frame, fg_color="transparent")
         col3.pack(side="left", padx=30, pady=10)
 
-        totals_by_cat = Counter()
-        for e in filtered:
-            totals_by_cat[e.get("category", "Other")] += float(e.get("amount", 0))
+        totals_by_cat = Counter(by_cat)
 
         if totals_by_cat:
             top_cat, top_val = totals_by_cat.most_common(1)[0]
@@ -1061,7 +1909,7 @@ class ExpenseTrackerApp(ctk.CTk):
         scroll = ctk.CTkScrollableFrame(recent_frame, fg_color="#2b2d31")
         scroll.pack(fill="both", expand=True, padx=8, pady=(0, 8))
 
-        recent = list(reversed(self.expenses))[:20]
+        recent = self.expenses.latest(20)
         if not recent:
             ctk.CTkLabel(
                 scroll,
@@ -1079,20 +1927,20 @@ class ExpenseTrackerApp(ctk.CTk):
 
                 ctk.CTkLabel(
                     left,
-                    text=f"{cur}{float(e.get('amount', 0)):.2f}",
+                    text=f"{cur}{e.amount:.2f}",
                     font=ctk.CTkFont(size=13, weight="bold"),
                 ).pack(anchor="w")
 
                 ctk.CTkLabel(
                     left,
-                    text=f"{e.get('category', 'Other')} • {e.get('date', '')}",
+                    text=f"{e.category} • {e.date}",
                     font=ctk.CTkFont(size=11),
                     text_color="#9ca3af",
                 ).pack(anchor="w")
 
                 ctk.CTkLabel(
                     left,
-                    text=e.get("description", ""),
+                    text=e.description,
                     font=ctk.CTkFont(size=11),
                     text_color="#d1d5db",
                 ).pack(anchor="w")
@@ -1100,21 +1948,81 @@ class ExpenseTrackerApp(ctk.CTk):
     # ================== CHARTS ==================
 
     def clear_chart_frame(self):
+        self.wanted_chart = None
+        if self.chart_image_label is not None:
+            self.chart_image_label.grid_remove()
+            self.chart_placeholder.grid_remove()
+
+    def _chart_size(self):
+        """Chart frame size in pixels (with a sane default before it is mapped)."""
+        w, h = self.chart_frame.winfo_width(), self.chart_frame.winfo_height()
+        if w < 100 or h < 100:
+            w, h = 600, 400
+        return w, h
+
+    def _chart_key(self, kind):
+        # the range start moves with the clock, so a chart cached yesterday is stale today
+        start = self._cutoff(self.charts_range).date() if self.charts_range in ("7", "30", "90") else None
+        return (kind, self.charts_range, start, self.get_currency_symbol()) + self._chart_size()
+
+    def _show_chart_image(self, image):
+        scale = ctk.ScalingTracker.get_widget_scaling(self)
+        ctk_image = ctk.CTkImage(
+            light_image=image, dark_image=image,
+            size=(image.width / scale, image.height / scale),
+        )
+        self.chart_placeholder.grid_remove()
+        self.chart_image_label.configure(image=ctk_image)
+        self.chart_image_label.image = ctk_image  # keep a reference
+        self.chart_image_label.grid()
+
+    def show_cached_chart(self, kind):
+        """Show the cached render for this chart if it is up to date."""
+        self.current_chart = kind
+        image = self.chart_renderer.get(self._chart_key(kind), self.ledger_version)
+        if image is None:
+            return False
+        self.wanted_chart = None
+        self._show_chart_image(image)
+        return True
+
+    def embed_chart(self, kind, data):
+        """Render off the Tk thread; show a placeholder until the image arrives."""
+        key = self._chart_key(kind)
+        self.wanted_chart = (key, self.ledger_version)
+        self.chart_image_label.grid_remove()
+        self.chart_placeholder.configure(text="Rendering chart…")
+        self.chart_placeholder.grid()
+        self.chart_renderer.request(key, self.ledger_version, kind, data, key[2], key[3:])
+        self._poll_chart_renders()
+
+    def _poll_chart_renders(self):
+        for key, version, image, error in self.chart_renderer.poll():
+            if self.chart_frame is not None and (key, version) == self.wanted_chart:
+                self.wanted_chart = None
+                if error is not None:
+                    self.chart_placeholder.configure(text=f"Could not draw this chart:\n{error}")
+                else:
+                    self._show_chart_image(image)
+        if self.chart_renderer.pending():
+            self.after(30, self._poll_chart_renders)
+
+    def _on_chart_resize(self, event):
+        # debounce: redraw once the user stops resizing
+        if getattr(self, "_chart_resize_job", None):
+            try: self.after_cancel(self._chart_resize_job)
+            except: pass
+        self._chart_resize_job = self.after(200, self._redraw_after_resize)
+
+    def _redraw_after_resize(self):
+        self._chart_resize_job = None
         if self.chart_frame is not None:
-            for w in self.chart_frame.winfo_children():
-                w.destroy()
-
-    def embed_chart(self, fig):
-        self.clear_chart_frame()
-        canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew")
-
-    def get_chart_filtered_expenses(self):
-        return self._filter_by_range(self.charts_range)
+            self.show_current_chart()  # cache hit unless the size really changed
 
     def show_charts(self):
         self.current_view = self.show_dashboard
+        if self.wait_for_ledger(self.show_charts, "Charts & Analytics"):  # "All" comes from the rollups
+            return
         self.clear_main()
 
         container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -1134,7 +2042,7 @@ class ExpenseTrackerApp(ctk.CTk):
         def set_chart_range(val):
             self.charts_range = val
             refresh_buttons()
-            self.show_charts()
+            self.show_current_chart()
 
         def make_range_btn(label, value):
             btn = self.make_button(
@@ -1180,20 +2088,41 @@ class ExpenseTrackerApp(ctk.CTk):
         self.chart_frame.grid_rowconfigure(0, weight=1)
         self.chart_frame.grid_columnconfigure(0, weight=1)
 
-        # default chart
-        self.show_pie_chart()
+        self.chart_image_label = ctk.CTkLabel(self.chart_frame, text="")
+        self.chart_image_label.grid(row=0, column=0, sticky="nsew")
+        self.chart_image_label.grid_remove()
+        self.chart_placeholder = ctk.CTkLabel(
+            self.chart_frame,
+            text="Rendering chart…",
+            font=ctk.CTkFont(size=13),
+            text_color="#9ca3af",
+        )
+        self.chart_placeholder.grid(row=0, column=0, sticky="nsew")
+        self.chart_placeholder.grid_remove()
+        self.chart_frame.bind("<Configure>", self._on_chart_resize, add="+")
+        self.update_idletasks()  # so the first render gets the real frame size
+
+        # last chart shown (pie by default)
+        self.show_current_chart()
+
+    def show_current_chart(self):
+        {
+            "pie": self.show_pie_chart,
+            "bar": self.show_bar_chart,
+            "line": self.show_line_chart,
+        }[self.current_chart]()
+
+    def get_chart_category_totals(self):
+        return self.rollups.category_totals(self._range_start(self.charts_range), self.table)
 
     def show_pie_chart(self):
-        filtered = self.get_chart_filtered_expenses()
-        if not filtered:
+        if self.show_cached_chart("pie"):
+            return
+        totals = self.get_chart_category_totals()
+        if not totals:
             self.clear_chart_frame()
             return
 
-        cur = self.get_currency_symbol()
-        totals = Counter()
-        for e in filtered:
-            totals[e.get("category", "Other")] += float(e.get("amount", 0))
-
         sorted_items = sorted(totals.items(), key=lambda x: x[1], reverse=True)
         labels = [c.title() for c, _ in sorted_items]
         values = [v for _, v in sorted_items]
@@ -1203,32 +2132,12 @@ class ExpenseTrackerApp(ctk.CTk):
             self.clear_chart_frame()
             return
 
-        fig, ax = plt.subplots(figsize=(5.5, 4), facecolor="#2b2d31")
-        ax.set_facecolor("#2b2d31")
-
-        def autopct(pct):
-            return f"{pct:.1f}%" if pct >= 5 else ""
-
-        ax.pie(
-            values,
-            labels=labels,
-            autopct=autopct,
-            textprops={"color": "white", "fontsize": 9},
-        )
-        ax.set_title(f"Spending by Category ({cur})", color="white")
-        self.embed_chart(fig)
+        self.embed_chart("pie", (labels, values))
 
     def show_bar_chart(self):
-        filtered = self.get_chart_filtered_expenses()
-        if not filtered:
-            self.clear_chart_frame()
+        if self.show_cached_chart("bar"):
             return
-
-        cur = self.get_currency_symbol()
-        totals = Counter()
-
-        for e in filtered:
-            totals[e.get("category", "Other")] += float(e.get("amount", 0))
+        totals = self.get_chart_category_totals()
 
         if not totals:
             self.clear_chart_frame()
@@ -1239,64 +2148,26 @@ class ExpenseTrackerApp(ctk.CTk):
         labels = [c.title() for c, _ in sorted_items]
         values = [v for _, v in sorted_items]
 
-        fig, ax = plt.subplots(figsize=(6, 4), facecolor="#2b2d31")
-        ax.set_facecolor("#2b2d31")
-
-        ax.bar(labels, values)
-
-        ax.set_title(f"Category Spending ({cur})", color="white")
-        ax.set_ylabel(cur, color="white")
-        ax.tick_params(axis="x", rotation=45, labelcolor="white")
-        ax.tick_params(axis="y", labelcolor="white")
-
-        self.embed_chart(fig)
+        self.embed_chart("bar", (labels, values))
 
 
     def show_line_chart(self):
-        filtered = self.get_chart_filtered_expenses()
-        if not filtered:
+        if self.show_cached_chart("line"):
+            return
+        days, values = self.rollups.daily_totals(self._range_start(self.charts_range), self.table)
+        if not len(days):
             self.clear_chart_frame()
             return
 
-        cur = self.get_currency_symbol()
-        daily = defaultdict(float)
-
-        for e in filtered:
-            date_key = e.get("date", "")[:10]
-            daily[date_key] += float(e.get("amount", 0))
-
-        dates = sorted(daily.keys())
-        values = [daily[d] for d in dates]
-
-        # Format dates nicely (example: Jan 05)
-        from datetime import datetime
-        formatted_dates = [
-            datetime.strptime(d, "%Y-%m-%d").strftime("%b %d")
-            for d in dates
-        ]
-
-        fig, ax = plt.subplots(figsize=(6, 4), facecolor="#2b2d31")
-        ax.set_facecolor("#2b2d31")
-
-        ax.plot(formatted_dates, values, marker="o")
-
-        ax.set_title(f"Daily Spending ({cur})", color="white")
-        ax.set_xlabel("Date", color="white")
-        ax.set_ylabel(cur, color="white")
-
-        ax.tick_params(axis="x", rotation=45, labelcolor="white")
-        ax.tick_params(axis="y", labelcolor="white")
-
-        # Optional: subtle grid
-        ax.grid(color="#444", linestyle="--", linewidth=0.5, alpha=0.3)
-
-        self.embed_chart(fig)
+        self.embed_chart("line", (days, values))
 
 
     # ================== AI PANEL ==================
 
     def show_ai_panel(self):
         self.current_view = self.show_dashboard
+        if self.wait_for_ledger(self.show_ai_panel, "🤖 AI Financial Insights", MISSING_TS):
+            return
         self.clear_main()
 
         container = ctk.CTkFrame(self.main_frame, fg_color="transparent")
@@ -1338,10 +2209,10 @@ class ExpenseTrackerApp(ctk.CTk):
             return
 
         cur = self.get_currency_symbol()
-        total = sum(float(e.get("amount", 0)) for e in self.expenses)
+        total = sum(e.amount for e in self.expenses)
         by_cat = Counter()
         for e in self.expenses:
-            by_cat[e.get("category", "Other")] += float(e.get("amount", 0))
+            by_cat[e.category] += e.amount
 
         if not self.expenses:
             answer = (
@@ -0,0 +1,666 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from operator import attrgetter
+
+import numpy as np
+
+
+# ------------------------------------------------------------
+# In-memory indexes over the expense ledger.
+#
+# They are built once after load_expenses() and kept in sync by the
+# ExpenseTrackerApp._commit_* mutation helpers, so views never have to
+# rescan (or re-parse) the whole ledger.
+# ------------------------------------------------------------
+
+EPOCH = datetime(1970, 1, 1)
+MISSING_TS = -(2 ** 62)  # rows with an unparseable date sort first and never match a range
+DAY = 86400
+
+
+def parse_ts(date_str):
+    """Convert a stored "YYYY-MM-DD HH:MM:SS" date to integer seconds (None if invalid)."""
+    try:
+        dt = datetime.fromisoformat(str(date_str)[:19])
+    except (TypeError, ValueError):
+        return None
+    return int((dt - EPOCH).total_seconds())
+
+
+def to_ts(dt):
+    """Same timestamp scale as parse_ts() for a datetime object."""
+    return int((dt - EPOCH).total_seconds())
+
+
+def day_to_date(day):
+    """Inverse of ts // DAY, for labelling daily buckets."""
+    return EPOCH + timedelta(days=int(day))
+
+
+class DateIndex:
+    """Expenses ordered by parsed date; range queries are two bisects and a slice."""
+
+    def __init__(self, expenses=()):
+        self.rebuild(expenses)
+
+    def rebuild(self, expenses):
+        pairs = [(e.ts, e) for e in expenses]
+        pairs.sort(key=lambda p: p[0])  # stable: ties keep ledger order
+        self.keys = [p[0] for p in pairs]
+        self.items = [p[1] for p in pairs]
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, exp):
+        """Index one expense; returns its position in date order."""
+        i = bisect_right(self.keys, exp.ts)  # new rows normally land at the end
+        self.keys.insert(i, exp.ts)
+        self.items.insert(i, exp)
+        return i
+
+    def add_many(self, exps):
+        """
+        Index a batch in one merge pass. Returns (new_keys, order, pos): the
+        batch's keys, the sort order applied to it, and where each sorted row
+        was inserted in the old arrays (for subclasses keeping columns in step).
+        """
+        new_keys = np.fromiter((e.ts for e in exps), np.int64, len(exps))
+        order = np.argsort(new_keys, kind="stable")
+        new_keys = new_keys[order]
+        pos = np.searchsorted(np.asarray(self.keys, dtype=np.int64), new_keys, side="right")
+
+        items = np.empty(len(self.items), dtype=object)
+        items[:] = self.items
+        new_items = np.empty(len(exps), dtype=object)
+        new_items[:] = [exps[i] for i in order]
+
+        # np.insert keeps equal keys in order (old rows first), same as bisect_right
+        self.keys = np.insert(np.asarray(self.keys, dtype=np.int64), pos, new_keys).tolist()
+        self.items = np.insert(items, pos, new_items).tolist()
+        return new_keys, order, pos
+
+    def position(self, exp):
+        """Current position of an indexed expense (None if not indexed)."""
+        ts = exp.ts  # rows are removed before their date is edited
+        i = bisect_left(self.keys, ts)
+        while i < len(self.keys) and self.keys[i] == ts:
+            if self.items[i] is exp:
+                return i
+            i += 1
+        return None
+
+    def remove(self, exp):
+        """Drop one expense; returns the position it had (None if not indexed)."""
+        i = self.position(exp)
+        if i is None:
+            return None
+        del self.keys[i]
+        del self.items[i]
+        return i
+
+    def between(self, start_ts=None, end_ts=None):
+        """Expenses with start_ts <= date < end_ts, oldest first."""
+        lo = bisect_left(self.keys, MISSING_TS + 1 if start_ts is None else start_ts)
+        hi = len(self.keys) if end_ts is None else bisect_left(self.keys, end_ts)
+        return self.items[lo:hi]
+
+    def since(self, start_ts):
+        return self.between(start_ts, None)
+
+
+class ExpenseTable(DateIndex):
+    """
+    DateIndex plus NumPy columns in the same (date) order:
+        amounts  float64
+        ts       int64 seconds (MISSING_TS for bad dates)
+        codes    int32 index into self.categories
+    Aggregations are vectorised group-bys over a [lo:hi) slice of rows.
+    """
+
+    def rebuild(self, expenses):
+        super().rebuild(expenses)
+        self.categories = []  # code -> category name (title case, like the UI shows it)
+        self._code_of = {}
+        n = len(self.items)
+        cap = max(1024, n)
+        self._amounts = np.zeros(cap, dtype=np.float64)
+        self._ts = np.zeros(cap, dtype=np.int64)
+        self._codes = np.zeros(cap, dtype=np.int32)
+        self._amounts[:n] = np.fromiter((e.amount for e in self.items), np.float64, n)
+        self._ts[:n] = np.asarray(self.keys, dtype=np.int64)
+        self._codes[:n] = np.fromiter((self.code(e.category) for e in self.items), np.int32, n)
+        self._n = n
+
+    def code(self, category):
+        c = self._code_of.get(category)
+        if c is None:
+            c = self._code_of[category] = len(self.categories)
+            self.categories.append(category)
+        return c
+
+    @property
+    def amounts(self):
+        return self._amounts[:self._n]
+
+    @property
+    def ts(self):
+        return self._ts[:self._n]
+
+    @property
+    def codes(self):
+        return self._codes[:self._n]
+
+    # ---- keeping the columns in sync ----
+
+    def add(self, exp):
+        i = super().add(exp)
+        n = self._n
+        if n == len(self._amounts):
+            cap = 2 * n
+            self._amounts = np.resize(self._amounts, cap)
+            self._ts = np.resize(self._ts, cap)
+            self._codes = np.resize(self._codes, cap)
+        for col in (self._amounts, self._ts, self._codes):
+            col[i + 1:n + 1] = col[i:n]  # no-op for the usual append at the end
+        self._amounts[i] = exp.amount
+        self._ts[i] = exp.ts
+        self._codes[i] = self.code(exp.category)
+        self._n = n + 1
+        return i
+
+    def add_many(self, exps):
+        n = self._n
+        new_ts, order, pos = super().add_many(exps)
+        amounts = np.insert(self._amounts[:n], pos, [exps[i].amount for i in order])
+        ts = np.insert(self._ts[:n], pos, new_ts)
+        codes = np.insert(self._codes[:n], pos, [self.code(exps[i].category) for i in order])
+
+        self._n = len(amounts)
+        cap = max(1024, 2 * self._n)
+        self._amounts = np.resize(amounts, cap)
+        self._ts = np.resize(ts, cap)
+        self._codes = np.resize(codes, cap)
+        return new_ts, order, pos
+
+    def remove(self, exp):
+        i = super().remove(exp)
+        if i is None:
+            return None
+        n = self._n
+        for col in (self._amounts, self._ts, self._codes):
+            col[i:n - 1] = col[i + 1:n]
+        self._n = n - 1
+        return i
+
+    def recategorize(self, exp):
+        """Refresh the category code of an expense whose category changed in place."""
+        i = self.position(exp)
+        if i is not None:
+            self._codes[i] = self.code(exp.category)
+
+    # ---- aggregations ----
+
+    def bounds(self, start_ts=None):
+        """Row slice [lo, hi) for "everything since start_ts" (None = whole ledger)."""
+        if start_ts is None:
+            return 0, self._n
+        return int(np.searchsorted(self.ts, start_ts, side="left")), self._n
+
+    def total(self, lo=0, hi=None):
+        return float(self.amounts[lo:hi].sum())
+
+    def category_totals(self, lo=0, hi=None):
+        """{category: total} for categories that occur in the slice."""
+        codes = self.codes[lo:hi]
+        if not len(codes):
+            return {}
+        k = len(self.categories)
+        sums = np.bincount(codes, weights=self.amounts[lo:hi], minlength=k)
+        counts = np.bincount(codes, minlength=k)
+        return {self.categories[c]: float(sums[c]) for c in np.flatnonzero(counts)}
+
+    def daily_totals(self, lo=0, hi=None):
+        """(day numbers, totals) for each distinct day in the slice, oldest first."""
+        lo = max(lo, int(np.searchsorted(self.ts, MISSING_TS, side="right")))  # skip undated rows
+        days = self.ts[lo:hi] // DAY
+        if not len(days):
+            return days, np.zeros(0)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1))
+        return days[starts], np.add.reduceat(self.amounts[lo:hi], starts)
+
+    def unique_days(self, lo=0, hi=None):
+        days = self.ts[lo:hi] // DAY
+        if not len(days):
+            return 0
+        return int(np.count_nonzero(np.diff(days))) + 1
+
+
+class SortIndex:
+    """
+    Expenses ordered by (field, id), one per sort mode of the expense list.
+    The id makes every key unique, so a row's key doubles as a page cursor.
+    """
+
+    INSORT_MAX = 64  # bigger batches are merged with one sort
+
+    def __init__(self, field, expenses=()):
+        self.field = field                  # "amount", "ts" or "id"
+        self.cursor = attrgetter(field, "id")  # Expense -> (key, id)
+        self.rebuild(expenses)
+
+    def rebuild(self, expenses):
+        exps = list(expenses)
+        n = len(exps)
+        ids = np.fromiter((e.id for e in exps), np.int64, n)
+        dtype = np.float64 if self.field == "amount" else np.int64
+        keys = np.fromiter((getattr(e, self.field) for e in exps), dtype, n)
+        self.items = [exps[i] for i in np.lexsort((ids, keys)).tolist()]
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, exp):
+        insort(self.items, exp, key=self.cursor)
+
+    def add_many(self, exps):
+        if len(exps) <= self.INSORT_MAX:
+            for exp in exps:
+                self.add(exp)
+        else:
+            self.items.extend(exps)
+            self.items.sort(key=self.cursor)  # two sorted runs: a merge, not a full sort
+
+    def remove(self, exp):
+        # rows are removed before their fields are edited, so the key still matches
+        i = bisect_left(self.items, self.cursor(exp), key=self.cursor)
+        if i < len(self.items) and self.items[i] is exp:
+            del self.items[i]
+
+    def range(self, lo=None, hi=None, reverse=False):
+        """Rows with lo <= key < hi as a KeysetRange (lo/hi are (key,) tuples)."""
+        return KeysetRange(self.items, self.cursor, lo, hi, reverse)
+
+
+class KeysetRange:
+    """
+    Part of a list sorted by cursor(row) = (key, id), read a page at a time.
+
+    The list view keeps the cursor of its first row rather than an offset:
+    rows_from() / rows_before() find it with one bisect and slice out the
+    page, so a page costs O(log n + page) for any sort and any result size,
+    and it stays on the same row when rows are added or removed above it.
+    reverse=True reads the range from its end (amount_desc, date_new).
+    """
+
+    def __init__(self, items, cursor, lo=None, hi=None, reverse=False):
+        self.items = items
+        self.cursor = cursor
+        self.lo, self.hi = lo, hi
+        self.reverse = reverse
+
+    def _span(self):
+        # bounds are looked up on every call, the list may have changed since
+        start = 0 if self.lo is None else bisect_left(self.items, self.lo, key=self.cursor)
+        stop = len(self.items) if self.hi is None else bisect_left(self.items, self.hi, key=self.cursor)
+        return start, max(start, stop)
+
+    def __len__(self):
+        start, stop = self._span()
+        return stop - start
+
+    def position(self, cursor):
+        """Display position of the first row at or after `cursor` (None: the top)."""
+        start, stop = self._span()
+        if cursor is None:
+            return 0
+        if self.reverse:
+            return stop - bisect_right(self.items, cursor, start, stop, key=self.cursor)
+        return bisect_left(self.items, cursor, start, stop, key=self.cursor) - start
+
+    def page(self, pos, n):
+        """Rows at display positions pos .. pos + n - 1."""
+        start, stop = self._span()
+        pos, n = max(0, pos), max(0, n)
+        if self.reverse:
+            hi = max(start, stop - pos)
+            return self.items[max(start, hi - n):hi][::-1]
+        return self.items[start + pos:min(stop, start + pos + n)]
+
+    def rows_from(self, cursor, n):
+        return self.page(self.position(cursor), n)
+
+    def rows_before(self, cursor, n):
+        pos = self.position(cursor)
+        return self.page(pos - n, min(n, pos))
+
+    def seek(self, pos):
+        """Cursor of the row at display position pos (scrollbar drags); None if empty."""
+        rows = self.page(min(pos, len(self) - 1), 1)
+        return self.cursor(rows[0]) if rows else None
+
+    def all(self):
+        return self.page(0, len(self))
+
+
+def day_month(day):
+    """ts // DAY -> months since 1970-01 (same numbering as snapshot.month_numbers)."""
+    d = day_to_date(day)
+    return (d.year - 1970) * 12 + d.month - 1
+
+
+class Rollups:
+    """
+    Running totals kept up to date in O(1) per change: overall total / count,
+    per category, per day, per month, per day+category and per month+category.
+    A dashboard range reads whole months and days from the buckets and only
+    looks at raw rows for the partial day at the cutoff.
+
+    The storage layer saves them next to the ledger (to_dict / from_dict), so
+    after a restart the dashboard and charts start from the saved buckets
+    instead of scanning every row.
+    """
+
+    VERSION = 1
+    BUCKETS = ("by_cat", "by_day", "by_month", "by_day_cat", "by_month_cat")
+
+    def __init__(self, expenses=()):
+        self.rebuild(expenses)
+
+    def rebuild(self, expenses):
+        self.total = 0.0
+        self.count = 0
+        self.by_cat = {}        # category -> [total, count]
+        self.by_day = {}        # day -> [total, count]
+        self.by_month = {}      # month -> [total, count]
+        self.by_day_cat = {}    # day -> {category: [total, count]}
+        self.by_month_cat = {}  # month -> {category: [total, count]}
+        self.days = []          # sorted days that have at least one expense
+        for e in expenses:
+            self.add(e)
+
+    @staticmethod
+    def _bump(buckets, key, amount, sign):
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = [0.0, 0]
+        b[0] += sign * amount
+        b[1] += sign
+        if b[1] <= 0:
+            del buckets[key]
+
+    def _apply(self, exp, sign):
+        amount = exp.amount
+        cat = exp.category
+        self.total += sign * amount
+        self.count += sign
+        self._bump(self.by_cat, cat, amount, sign)
+
+        if exp.ts == MISSING_TS:
+            return
+        day = exp.ts // DAY
+        if day not in self.by_day:
+            insort(self.days, day)
+            self.by_day_cat[day] = {}
+        self._bump(self.by_day_cat[day], cat, amount, sign)
+        self._bump(self.by_day, day, amount, sign)
+        if day not in self.by_day:
+            del self.days[bisect_left(self.days, day)]
+            del self.by_day_cat[day]
+
+        month = day_month(day)
+        self._bump(self.by_month_cat.setdefault(month, {}), cat, amount, sign)
+        self._bump(self.by_month, month, amount, sign)
+        if month not in self.by_month:
+            del self.by_month_cat[month]
+
+    def add(self, exp):
+        self._apply(exp, 1)
+
+    def remove(self, exp):
+        self._apply(exp, -1)
+
+    def add_columns(self, ts, amounts, codes, name_of):
+        """
+        Add rows given as NumPy columns (ts, amount, category code, with
+        name_of(code) -> category), grouped per day+category in one pass.
+        """
+        if not len(ts):
+            return
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        cats = [name_of(int(c)) for c in uniq.tolist()]
+        days = np.where(ts == MISSING_TS, MISSING_TS, ts // DAY)
+        groups, index = np.unique(np.stack((days, inverse.reshape(-1))), axis=1, return_inverse=True)
+        index = index.reshape(-1)
+        sums = np.bincount(index, weights=amounts, minlength=groups.shape[1])
+        counts = np.bincount(index, minlength=groups.shape[1])
+
+        for (day, c), t, n in zip(groups.T.tolist(), sums.tolist(), counts.tolist()):
+            cat = cats[c]
+            self.total += t
+            self.count += n
+            self._add_bucket(self.by_cat, cat, t, n)
+            if day == MISSING_TS:
+                continue
+            if day not in self.by_day:
+                insort(self.days, day)
+            month = day_month(day)
+            self._add_bucket(self.by_day, day, t, n)
+            self._add_bucket(self.by_day_cat.setdefault(day, {}), cat, t, n)
+            self._add_bucket(self.by_month, month, t, n)
+            self._add_bucket(self.by_month_cat.setdefault(month, {}), cat, t, n)
+
+    @staticmethod
+    def _add_bucket(buckets, key, total, count):
+        b = buckets.get(key)
+        if b is None:
+            buckets[key] = [total, count]
+        else:
+            b[0] += total
+            b[1] += count
+
+    # ---- saving / loading ----
+
+    def to_dict(self):
+        """Plain JSON-ready copy (dict keys become strings)."""
+        out = {"version": self.VERSION, "total": self.total, "count": self.count}
+        for name in self.BUCKETS:
+            buckets = getattr(self, name)
+            if name in ("by_day_cat", "by_month_cat"):
+                out[name] = {k: {c: list(b) for c, b in v.items()} for k, v in buckets.items()}
+            else:
+                out[name] = {k: list(b) for k, b in buckets.items()}
+        return out
+
+    @classmethod
+    def from_dict(cls, d):
+        """Inverse of to_dict(); ValueError if the buckets do not add up."""
+        if d.get("version") != cls.VERSION:
+            raise ValueError("rollups were saved by another version")
+        r = cls()
+        r.total = float(d["total"])
+        r.count = int(d["count"])
+        r.by_cat = {c: [float(t), int(n)] for c, (t, n) in d["by_cat"].items()}
+        r.by_day = {int(k): [float(t), int(n)] for k, (t, n) in d["by_day"].items()}
+        r.by_month = {int(k): [float(t), int(n)] for k, (t, n) in d["by_month"].items()}
+        r.by_day_cat = {
+            int(k): {c: [float(t), int(n)] for c, (t, n) in v.items()} for k, v in d["by_day_cat"].items()
+        }
+        r.by_month_cat = {
+            int(k): {c: [float(t), int(n)] for c, (t, n) in v.items()} for k, v in d["by_month_cat"].items()
+        }
+        r.days = sorted(r.by_day)
+
+        dated = sum(n for _, n in r.by_day.values())
+        if (
+            sum(n for _, n in r.by_cat.values()) != r.count
+            or sum(n for _, n in r.by_month.values()) != dated
+            or r.by_day.keys() != r.by_day_cat.keys()
+            or r.by_month.keys() != r.by_month_cat.keys()
+        ):
+            raise ValueError("rollup buckets do not add up")
+        return r
+
+    # ---- reading ----
+
+    def summary(self, start_ts=None, table=None):
+        """
+        (total, count, unique days, {category: total}) for everything since
+        start_ts (None or MISSING_TS: the whole ledger, undated rows included).
+        """
+        if start_ts is None or start_ts <= MISSING_TS:
+            by_cat = {c: b[0] for c, b in self.by_cat.items()}
+            return self.total, self.count, len(self.days), by_cat
+
+        start_day = start_ts // DAY
+        start_month = day_month(start_day)
+        total, count, ndays = 0.0, 0, 0
+        by_cat = {}
+        # whole months after the cutoff month, then the days of the cutoff month
+        for month, (t, c) in self.by_month.items():
+            if month > start_month:
+                total += t
+                count += c
+                for cat, b in self.by_month_cat[month].items():
+                    by_cat[cat] = by_cat.get(cat, 0.0) + b[0]
+        for day in self.days[bisect_right(self.days, start_day):]:
+            if day_month(day) > start_month:
+                ndays += len(self.days) - bisect_left(self.days, day)
+                break
+            t, c = self.by_day[day]
+            total += t
+            count += c
+            ndays += 1
+            for cat, b in self.by_day_cat[day].items():
+                by_cat[cat] = by_cat.get(cat, 0.0) + b[0]
+
+        # cutoff day: only the rows at or after start_ts count
+        if table is not None and start_day in self.by_day:
+            lo = int(np.searchsorted(table.ts, start_ts, side="left"))
+            hi = int(np.searchsorted(table.ts, (start_day + 1) * DAY, side="left"))
+            if hi > lo:
+                total += table.total(lo, hi)
+                count += hi - lo
+                ndays += 1
+                for cat, t in table.category_totals(lo, hi).items():
+                    by_cat[cat] = by_cat.get(cat, 0.0) + t
+
+        return total, count, ndays, by_cat
+
+    def category_totals(self, start_ts=None, table=None):
+        """{category: total} since start_ts (see summary)."""
+        return self.summary(start_ts, table)[3]
+
+    def daily_totals(self, start_ts=None, table=None):
+        """(day numbers, totals) for each day with expenses since start_ts, oldest first."""
+        if start_ts is None or start_ts <= MISSING_TS:
+            days = self.days
+            partial = None
+        else:
+            start_day = start_ts // DAY
+            days = self.days[bisect_right(self.days, start_day):]
+            partial = None
+            if table is not None and start_day in self.by_day:
+                lo = int(np.searchsorted(table.ts, start_ts, side="left"))
+                hi = int(np.searchsorted(table.ts, (start_day + 1) * DAY, side="left"))
+                if hi > lo:
+                    partial = (start_day, table.total(lo, hi))
+        totals = [self.by_day[d][0] for d in days]
+        if partial is not None:
+            days = [partial[0]] + days
+            totals = [partial[1]] + totals
+        return np.asarray(days, dtype=np.int64), np.asarray(totals, dtype=np.float64)
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from lowercase trigrams of "description \\0 category" to
+    expenses. A search intersects the posting sets of the query's trigrams
+    (smallest first) and substring-checks only the surviving candidates.
+    Queries shorter than three characters fall back to a plain scan.
+    """
+
+    def __init__(self, expenses=()):
+        self.rebuild(expenses)
+
+    @staticmethod
+    def _text(exp):
+        # the separator keeps trigrams from spanning description and category
+        return (exp.description + "\0" + exp.category).lower()
+
+    def rebuild(self, expenses):
+        self.postings = {}  # trigram -> set of id(expense)
+        self.docs = {}      # id(expense) -> expense
+        for e in expenses:
+            self.add(e)
+
+    def add(self, exp):
+        key = id(exp)
+        self.docs[key] = exp
+        postings = self.postings
+        for g in trigrams(self._text(exp)):
+            p = postings.get(g)
+            if p is None:
+                postings[g] = {key}
+            else:
+                p.add(key)
+
+    def add_many(self, exps):
+        """Index a batch; postings are grouped first so each set is updated once."""
+        docs = self.docs
+        grouped = {}
+        for exp in exps:
+            key = id(exp)
+            docs[key] = exp
+            for g in trigrams(self._text(exp)):
+                keys = grouped.get(g)
+                if keys is None:
+                    grouped[g] = [key]
+                else:
+                    keys.append(key)
+
+        postings = self.postings
+        for g, keys in grouped.items():
+            p = postings.get(g)
+            if p is None:
+                postings[g] = set(keys)
+            else:
+                p.update(keys)
+
+    def remove(self, exp):
+        key = id(exp)
+        if self.docs.pop(key, None) is None:
+            return
+        for g in trigrams(self._text(exp)):
+            p = self.postings.get(g)
+            if p is not None:
+                p.discard(key)
+                if not p:
+                    del self.postings[g]
+
+    def search(self, query):
+        """Expenses whose description or category contains query (case-insensitive)."""
+        q = query.lower()
+        if len(q) < 3:
+            return [e for e in self.docs.values() if q in self._text(e)]
+
+        sets = []
+        for g in trigrams(q):
+            p = self.postings.get(g)
+            if not p:
+                return []
+            sets.append(p)
+        sets.sort(key=len)
+        candidates = set(sets[0])
+        for p in sets[1:]:
+            candidates &= p
+            if not candidates:
+                return []
+
+        docs = self.docs
+        text = self._text
+        return [docs[k] for k in candidates if q in text(docs[k])]
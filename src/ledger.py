@@ -0,0 +1,203 @@
+from .indexes import DAY
+
+
+# ------------------------------------------------------------
+# The in-memory ledger.
+#
+# Expenses are addressed by their stable id. Slots keep insertion order and
+# hold either a snapshot row number (not decoded yet), the Expense itself, or
+# None for a deleted row (tombstone). Delete is a dict pop plus a tombstone;
+# tombstones are squeezed out once they make up a good share of the slots.
+#
+# A month-partitioned snapshot (SnapshotSet) does not have to be attached
+# all at once: the ledger starts with the recent months and older parts are
+# attached in front of them on demand (attach_since). Days touched by changes
+# are remembered so a compaction only rewrites the months that changed.
+# ------------------------------------------------------------
+
+
+class Ledger:
+    COMPACT_MIN = 1024     # never squeeze for fewer tombstones than this
+    COMPACT_RATIO = 0.25   # ... or while they are under this share of the slots
+    DECODE_BLOCK = 4096
+
+    def __init__(self, expenses=(), snapshot=None, since=None, next_id=1):
+        self.snapshot = snapshot
+        self._slots = []  # int (snapshot row) | Expense | None (deleted)
+        self._pos = {}    # expense id -> slot
+        self._dead = 0
+        self.next_id = next_id
+        self.dirty_days = set()  # ts // DAY of every row added, changed or removed
+        self._first_part = 0     # snapshot parts [_first_part:] are attached
+        if snapshot is not None:
+            self._first_part = len(getattr(snapshot, "meta", ()))
+            if len(snapshot.ids):
+                self.next_id = max(self.next_id, int(snapshot.ids.max()) + 1)
+            if self._first_part:
+                self.attach_since(since)
+            else:
+                self._attach_rows(0, len(snapshot))
+        for exp in expenses:
+            self.add(exp)
+
+    def _decode(self, i):
+        row = self._slots[i]
+        if isinstance(row, int):
+            row = self._slots[i] = self.snapshot[row]
+        return row
+
+    def _touch(self, exp):
+        self.dirty_days.add(exp.ts // DAY)
+
+    # ---- partial loading ----
+
+    def _attach_rows(self, start, stop):
+        """Put snapshot rows start..stop in front of the current slots."""
+        n = stop - start
+        if n <= 0:
+            return 0
+        if self._pos:
+            self._pos = {k: v + n for k, v in self._pos.items()}
+        self._slots[:0] = range(start, stop)
+        self._pos.update(zip(self.snapshot.ids[start:stop].tolist(), range(n)))
+        return n
+
+    def _attach_from(self, part):
+        if part >= self._first_part:
+            return 0
+        n = self._attach_rows(int(self.snapshot.starts[part]), int(self.snapshot.starts[self._first_part]))
+        self._first_part = part
+        return n
+
+    def attach_since(self, start_ts=None):
+        """
+        Attach every part that has rows at or after start_ts (None: all of them).
+        Returns the number of rows attached.
+        """
+        first = self._first_part
+        while first > 0 and (start_ts is None or self.snapshot.meta[first - 1]["last_ts"] >= start_ts):
+            first -= 1
+        return self._attach_from(first)
+
+    def attach_id(self, exp_id):
+        """Attach the part holding exp_id (and everything newer); False if no part has it."""
+        if not self._first_part:
+            return False
+        stop = int(self.snapshot.starts[self._first_part])
+        hits = (self.snapshot.ids[:stop] == exp_id).nonzero()[0]
+        if not len(hits):
+            return False
+        self._attach_from(int(self.snapshot.part_of(hits[0])))
+        return True
+
+    def missing_since(self, start_ts=None):
+        """True if rows at or after start_ts (None: any rows) are still detached."""
+        if not self._first_part:
+            return False
+        return start_ts is None or self.snapshot.meta[self._first_part - 1]["last_ts"] >= start_ts
+
+    def detached_parts(self):
+        return range(self._first_part)
+
+    # ---- reading ----
+
+    def __len__(self):
+        return len(self._pos)
+
+    def __contains__(self, exp_id):
+        return exp_id in self._pos
+
+    def __iter__(self):
+        """Live expenses in insertion order; snapshot rows are decoded in blocks."""
+        slots = self._slots
+        for start in range(0, len(slots), self.DECODE_BLOCK):
+            block = range(start, min(start + self.DECODE_BLOCK, len(slots)))
+            todo = [i for i in block if isinstance(slots[i], int)]
+            if todo:
+                for i, exp in zip(todo, self.snapshot.decode([slots[i] for i in todo])):
+                    slots[i] = exp
+            for i in block:
+                if slots[i] is not None:
+                    yield slots[i]
+
+    def get(self, exp_id):
+        i = self._pos.get(exp_id)
+        return None if i is None else self._decode(i)
+
+    def latest(self, n):
+        """The n most recently added expenses, newest first."""
+        out = []
+        for i in range(len(self._slots) - 1, -1, -1):
+            if len(out) == n:
+                break
+            if self._slots[i] is not None:
+                out.append(self._decode(i))
+        return out
+
+    def at(self, n):
+        """n-th live expense (only for replaying old index-based journal records)."""
+        if self._dead:
+            self._compact()
+        return self._decode(n) if 0 <= n < len(self._slots) else None
+
+    def slots(self):
+        """(live slots, snapshot) for writing a snapshot without decoding untouched rows."""
+        return [s for s in self._slots if s is not None], self.snapshot
+
+    def take_dirty_days(self):
+        days, self.dirty_days = self.dirty_days, set()
+        return days
+
+    # ---- changes ----
+
+    def add(self, exp):
+        """Append an expense, giving it an id if it has none (or a clashing one)."""
+        if exp.id is None or exp.id in self._pos:
+            exp.id = self.next_id
+        self.next_id = max(self.next_id, exp.id + 1)
+        self._pos[exp.id] = len(self._slots)
+        self._slots.append(exp)
+        self._touch(exp)
+        return exp
+
+    def add_many(self, exps):
+        for exp in exps:
+            self.add(exp)
+
+    def update(self, exp_id, changes):
+        """Edit an expense in place (Expense.update); returns it, or None if unknown."""
+        exp = self.get(exp_id)
+        if exp is not None:
+            self._touch(exp)
+            exp.update(changes)
+            self._touch(exp)
+        return exp
+
+    def replace(self, exp_id, exp):
+        i = self._pos.get(exp_id)
+        if i is not None:
+            self._touch(self._decode(i))
+            exp.id = exp_id
+            self._slots[i] = exp
+            self._touch(exp)
+
+    def remove(self, exp_id):
+        """Delete by id in O(1) (amortised); returns the removed expense or None."""
+        i = self._pos.pop(exp_id, None)
+        if i is None:
+            return None
+        exp = self._decode(i)
+        self._touch(exp)
+        self._slots[i] = None
+        self._dead += 1
+        if self._dead >= self.COMPACT_MIN and self._dead > self.COMPACT_RATIO * len(self._slots):
+            self._compact()
+        return exp
+
+    def _compact(self):
+        ids = self.snapshot.ids if self.snapshot is not None else None
+        self._slots = [s for s in self._slots if s is not None]
+        self._pos = {
+            (int(ids[s]) if isinstance(s, int) else s.id): i for i, s in enumerate(self._slots)
+        }
+        self._dead = 0
@@ -0,0 +1,133 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+
+# ------------------------------------------------------------
+# Opt-in timing of views and handlers.
+#
+# When profiling is off nothing is wrapped, so the app runs the plain methods.
+# When it is on, install() replaces the chosen methods on the app instance with
+# timed versions that record wall time, rows handled and the change in
+# allocated memory blocks (plus bytes / peak if tracemalloc is tracing, e.g.
+# with PYTHONTRACEMALLOC=1). Records are kept in memory for the overlay and
+# appended as JSON lines to a small rotating log by the background writer.
+# ------------------------------------------------------------
+
+
+class Profiler:
+    LOG_MAX_BYTES = 1_000_000
+    LOG_BACKUPS = 3  # profile.log.1 .. profile.log.3
+
+    def __init__(self, log_path, writer=None, keep=15):
+        self.log_path = log_path
+        self.writer = writer
+        self.recent = deque(maxlen=keep)  # newest last
+        self.on_record = None             # callback(record) on the main thread, e.g. the overlay
+        self._local = threading.local()  # call depth per thread: load_expenses runs on the loader thread
+        self._lock = threading.Lock()
+        self._pending = []
+
+    def install(self, obj, methods):
+        """Wrap obj.<name> for each {name: rows(obj, result)} entry."""
+        for name, rows in methods.items():
+            setattr(obj, name, self.wrap(getattr(obj, name), name, obj, rows))
+
+    def wrap(self, fn, name, obj=None, rows=None):
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            traced = tracemalloc.is_tracing()
+            if traced:
+                mem0 = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+            blocks0 = sys.getallocatedblocks()
+            depth = getattr(self._local, "depth", 0)
+            self._local.depth = depth + 1
+            t0 = time.perf_counter()
+            result = error = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                ms = (time.perf_counter() - t0) * 1000
+                self._local.depth = depth
+                record = {
+                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "name": name,
+                    "ms": round(ms, 2),
+                    "rows": self._rows(rows, obj, result) if error is None else None,
+                    "alloc_blocks": sys.getallocatedblocks() - blocks0,
+                    "depth": depth,
+                }
+                if traced:
+                    mem, peak = tracemalloc.get_traced_memory()
+                    record["alloc_bytes"] = mem - mem0
+                    record["peak_bytes"] = peak - mem0
+                if error is not None:
+                    record["error"] = error
+                self.record(record)
+
+        return timed
+
+    @staticmethod
+    def _rows(rows, obj, result):
+        if rows is None:
+            return None
+        try:
+            return rows(obj, result)
+        except Exception:
+            return None
+
+    def record(self, record):
+        self.recent.append(record)
+        with self._lock:
+            self._pending.append(json.dumps(record) + "\n")
+        if self.writer is None:
+            self._flush()
+        else:
+            self.writer.submit("profile-log", self._flush)
+        # the overlay is a widget: only update it from the Tk (main) thread
+        if self.on_record is not None and threading.current_thread() is threading.main_thread():
+            try:
+                self.on_record(record)
+            except Exception as e:
+                print("Error updating timing overlay:", e)
+
+    # ---- log file (writer thread) ----
+
+    def _flush(self):
+        with self._lock:
+            lines, self._pending = self._pending, []
+        if not lines:
+            return
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) >= self.LOG_MAX_BYTES:
+                self._rotate()
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            print("Error writing profile log:", e)
+
+    def _rotate(self):
+        for i in range(self.LOG_BACKUPS - 1, 0, -1):
+            older = f"{self.log_path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.log_path}.{i + 1}")
+        os.replace(self.log_path, self.log_path + ".1")
+
+
+def format_record(r):
+    """One overlay line: name, time, rows and allocation change."""
+    rows = "" if r.get("rows") is None else f"{r['rows']:>9,} rows"
+    alloc = f"{r['alloc_bytes'] / 1024:+,.0f} KiB" if "alloc_bytes" in r else f"{r['alloc_blocks']:+,} blk"
+    name = "  " * r["depth"] + r["name"]
+    return f"{name:<26}{r['ms']:>9.1f} ms {rows:>15} {alloc:>13}"
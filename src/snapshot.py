@@ -0,0 +1,266 @@
+import mmap
+import struct
+import zlib
+from datetime import timedelta
+
+import numpy as np
+
+from .expense import Expense
+from .indexes import EPOCH, MISSING_TS
+
+
+# ------------------------------------------------------------
+# Binary ledger snapshot.
+#
+#   header   magic, version, crc32 of the body, rows, strings
+#   body     amount float64[rows]
+#            ts     int64[rows]     (MISSING_TS for unparseable dates)
+#            id     int64[rows]     stable expense id (version 2+)
+#            cat    uint32[rows]    string-table index
+#            desc   uint32[rows]    string-table index
+#            date   uint32[rows]    string-table index, or NO_STRING when
+#                                   the date is the canonical form of ts
+#            string offsets uint64[strings + 1], then the UTF-8 blob
+#
+# Strings are interned, so repeated categories/descriptions are stored once.
+# The file is mmapped and rows are only decoded when they are accessed.
+# ------------------------------------------------------------
+
+MAGIC = b"ETPB"
+VERSION = 2  # version 1 had no id column; ids are then numbered 1..rows
+HEADER = struct.Struct("<4sIIQQ")  # magic, version, crc, rows, strings
+HEADER_PAD = b"\0" * 4  # version 2+: body starts 8-byte aligned
+NO_STRING = 0xFFFFFFFF
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_ts(ts):
+    return (EPOCH + timedelta(seconds=int(ts))).strftime(DATE_FORMAT)
+
+
+def _is_canonical(date):
+    # "YYYY-MM-DD HH:MM:SS" exactly, i.e. what format_ts() gives back once parsed
+    return len(date) == 19 and date[4] == "-" and date[7] == "-" and date[10] == " " \
+        and date[13] == ":" and date[16] == ":"
+
+
+def encode_snapshot(rows, source=None):
+    """
+    Encode a ledger as snapshot bytes; returns (raw, crc).
+
+    rows holds Expense records, or ints meaning "row i of `source`" (ledger
+    rows that were never decoded are copied without decoding).
+    """
+    n = len(rows)
+    amounts = np.empty(n, dtype="<f8")
+    ts = np.empty(n, dtype="<i8")
+    ids = np.empty(n, dtype="<i8")
+    cats = np.empty(n, dtype="<u4")
+    descs = np.empty(n, dtype="<u4")
+    dates = np.empty(n, dtype="<u4")
+
+    index_of = {}
+    strings = []
+
+    def intern(s):
+        i = index_of.get(s)
+        if i is None:
+            i = index_of[s] = len(strings)
+            strings.append(s)
+        return i
+
+    # untouched rows: copy the columns and remap their string indices in bulk
+    src_pos = np.fromiter((i for i, row in enumerate(rows) if isinstance(row, int)), np.int64)
+    if len(src_pos):
+        src_rows = np.fromiter((rows[i] for i in src_pos), np.int64, len(src_pos))
+        amounts[src_pos] = source.amount[src_rows]
+        ts[src_pos] = source.ts[src_rows]
+        ids[src_pos] = source.ids[src_rows]
+        for out, col in ((cats, source.cat), (descs, source.desc), (dates, source.date)):
+            uniq, inverse = np.unique(col[src_rows], return_inverse=True)
+            remap = np.array(
+                [NO_STRING if k == NO_STRING else intern(source.string(int(k))) for k in uniq.tolist()],
+                dtype="<u4",
+            )
+            out[src_pos] = remap[inverse.reshape(-1)]
+
+    for i, row in enumerate(rows):
+        if isinstance(row, int):
+            continue
+        amounts[i] = row.amount
+        ts[i] = row.ts
+        ids[i] = row.id
+        cats[i] = intern(row.category)
+        descs[i] = intern(row.description)
+        dates[i] = NO_STRING if row.ts != MISSING_TS and _is_canonical(row.date) else intern(row.date)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    parts = [amounts.tobytes(), ts.tobytes(), ids.tobytes(), cats.tobytes(), descs.tobytes(), dates.tobytes()]
+    if n % 2:
+        parts.append(b"\0" * 4)  # keep the offsets column 8-byte aligned
+    parts += [offsets.tobytes(), b"".join(encoded)]
+    body = b"".join(parts)
+    crc = zlib.crc32(body)
+    return HEADER.pack(MAGIC, VERSION, crc, n, len(strings)) + HEADER_PAD + body, crc
+
+
+class BinarySnapshot:
+    """Read-only view over a mapped snapshot file; columns are NumPy views, no copies."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, self.crc, n, nstrings = HEADER.unpack_from(self._mm, 0)
+            if magic != MAGIC or version not in (1, VERSION):
+                raise ValueError(f"{path}: not a ledger snapshot this version can read")
+
+            buf = memoryview(self._mm)
+            pos = HEADER.size + (len(HEADER_PAD) if version >= 2 else 0)
+            self.amount = np.frombuffer(buf, "<f8", n, pos); pos += 8 * n
+            self.ts = np.frombuffer(buf, "<i8", n, pos); pos += 8 * n
+            if version >= 2:
+                self.ids = np.frombuffer(buf, "<i8", n, pos); pos += 8 * n
+            else:
+                self.ids = np.arange(1, n + 1, dtype=np.int64)
+            self.cat = np.frombuffer(buf, "<u4", n, pos); pos += 4 * n
+            self.desc = np.frombuffer(buf, "<u4", n, pos); pos += 4 * n
+            self.date = np.frombuffer(buf, "<u4", n, pos); pos += 4 * n
+            pos += 4 * (n % 2)
+            self._offsets = np.frombuffer(buf, "<u8", nstrings + 1, pos); pos += 8 * (nstrings + 1)
+            self._blob = pos
+            if self._blob + int(self._offsets[-1]) != len(self._mm):
+                raise ValueError(f"{path}: truncated snapshot")
+        except Exception:
+            self.close()
+            raise
+
+        self.rows = n
+        self._strings = [None] * nstrings  # decoded + interned on first use
+
+    def string(self, i):
+        s = self._strings[i]
+        if s is None:
+            start = self._blob + int(self._offsets[i])
+            end = self._blob + int(self._offsets[i + 1])
+            s = self._strings[i] = self._mm[start:end].decode("utf-8")
+        return s
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, i):
+        """Decode row i into a fresh Expense."""
+        return self.decode([i])[0]
+
+    def decode(self, rows):
+        """Decode many rows at once (column slices are converted in bulk)."""
+        rows = np.asarray(rows, dtype=np.int64)
+        dates = self.date[rows]
+        canonical = dates == NO_STRING
+        stamps = np.datetime_as_string(self.ts[rows][canonical].astype("datetime64[s]"))
+        formatted = iter([d.replace("T", " ") for d in stamps.tolist()])
+
+        string = self.string
+        out = []
+        for exp_id, amount, ts, desc, cat, d in zip(
+            self.ids[rows].tolist(), self.amount[rows].tolist(), self.ts[rows].tolist(),
+            self.desc[rows].tolist(), self.cat[rows].tolist(), dates.tolist(),
+        ):
+            date = next(formatted) if d == NO_STRING else string(d)
+            out.append(Expense(amount, string(desc), string(cat), date, ts, id=exp_id))
+        return out
+
+    def close(self):
+        # NumPy views keep the buffer exported; let the GC unmap in that case
+        self.amount = self.ts = self.ids = self.cat = self.desc = self.date = self._offsets = None
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+# ------------------------------------------------------------
+# Month partitions: one snapshot per calendar month ("undated" holds rows
+# whose date could not be parsed), seen as a single row space. Row r of the
+# set is row r - start of the part that holds it.
+# ------------------------------------------------------------
+
+UNDATED = "undated"
+
+
+def month_numbers(ts):
+    """Months since 1970-01 for an int64 array of timestamps (-1 for MISSING_TS)."""
+    ts = np.asarray(ts, dtype=np.int64)
+    missing = ts == MISSING_TS
+    months = np.where(missing, 0, ts).astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+    months[missing] = -1
+    return months
+
+
+def month_key(month):
+    """month_numbers() value -> "YYYY-MM" (or "undated")."""
+    return UNDATED if month < 0 else f"{1970 + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+class SnapshotSet:
+    """
+    Snapshots (oldest month first) addressed as one snapshot. `meta` holds, per
+    part, what the manifest knows without reading it: month, rows, total, last_ts.
+    """
+
+    def __init__(self, parts, meta):
+        self.parts = parts
+        self.meta = meta
+        self.starts = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in parts], out=self.starts[1:])
+        self.rows = int(self.starts[-1])
+        self.ids = np.concatenate([p.ids for p in parts]) if parts else np.empty(0, np.int64)
+
+    @classmethod
+    def single(cls, snap):
+        """A whole-ledger snapshot (from before partitions) as a one-part set."""
+        ts = snap.ts[snap.ts != MISSING_TS]
+        meta = {"month": None, "rows": len(snap), "total": float(snap.amount.sum()),
+                "last_ts": int(ts.max()) if len(ts) else MISSING_TS}
+        return cls([snap], [meta])
+
+    def __len__(self):
+        return self.rows
+
+    def part_of(self, rows):
+        return np.searchsorted(self.starts, rows, side="right") - 1
+
+    def column(self, name, rows):
+        """Values of column `name` ("ts", "amount", ...) for global rows."""
+        rows = np.asarray(rows, dtype=np.int64)
+        parts = self.part_of(rows)
+        out = np.empty(len(rows), dtype=getattr(self.parts[0], name).dtype if self.parts else np.int64)
+        for p in np.unique(parts).tolist():
+            mask = parts == p
+            out[mask] = getattr(self.parts[p], name)[rows[mask] - self.starts[p]]
+        return out
+
+    def __getitem__(self, i):
+        return self.decode([i])[0]
+
+    def decode(self, rows):
+        rows = np.asarray(rows, dtype=np.int64)
+        parts = self.part_of(rows)
+        if len(rows) and (parts == parts[0]).all():  # usual case: one block, one month
+            p = int(parts[0])
+            return self.parts[p].decode(rows - self.starts[p])
+        out = [None] * len(rows)
+        for p in np.unique(parts).tolist():
+            where = np.flatnonzero(parts == p)
+            for i, exp in zip(where.tolist(), self.parts[p].decode(rows[where] - self.starts[p])):
+                out[i] = exp
+        return out
+
+    def close(self):
+        for p in self.parts:
+            p.close()
@@ -0,0 +1,988 @@
+import os
+import json
+import zlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from operator import attrgetter
+
+import numpy as np
+
+from .expense import Expense
+from .indexes import DAY, MISSING_TS, Rollups, parse_ts
+from .ledger import Ledger
+from .snapshot import UNDATED, BinarySnapshot, SnapshotSet, encode_snapshot, month_key, month_numbers
+
+
+def atomic_write(path, raw):
+    """Write bytes to a temp file, fsync it and os.replace() it over path."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ------------------------------------------------------------
+# Write-behind persistence thread
+#
+# All disk writes are queued here so the Tk main thread never waits on I/O.
+# Jobs submitted under the same key coalesce (only the newest one runs, in the
+# position of its latest submission) and a burst of submissions is gathered
+# for COALESCE_DELAY seconds before it is written.
+# ------------------------------------------------------------
+
+
+class BackgroundWriter:
+    COALESCE_DELAY = 0.05
+
+    def __init__(self):
+        self._jobs = OrderedDict()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._urgent = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="expense-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, fn):
+        with self._cond:
+            if self._closed:
+                run_inline = True
+            else:
+                run_inline = False
+                if key is None:
+                    key = object()
+                self._jobs.pop(key, None)
+                self._jobs[key] = fn
+                self._cond.notify_all()
+        if run_inline:
+            self._call(fn)
+
+    @staticmethod
+    def _call(fn):
+        try:
+            fn()
+        except Exception as e:
+            print("Error in background write:", e)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs and self._closed:
+                    return
+                urgent = self._urgent or self._closed
+            if not urgent:
+                time.sleep(self.COALESCE_DELAY)  # let the rest of the burst arrive
+
+            with self._cond:
+                jobs = list(self._jobs.values())
+                self._jobs.clear()
+                self._busy = True
+            for fn in jobs:
+                self._call(fn)
+            with self._cond:
+                self._busy = False
+                self._urgent = False
+                self._cond.notify_all()
+
+    def flush(self):
+        """Block until everything submitted so far is on disk."""
+        if threading.current_thread() is self._thread:
+            return
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+            while (self._jobs or self._busy) and self._thread.is_alive():
+                self._cond.wait(0.1)
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+
+
+# ------------------------------------------------------------
+# Journaled expense storage
+#
+#   months/manifest.json    -> the live month snapshots: file, rows, total,
+#                              last date and CRC32 of each month, plus next_id
+#   months/YYYY-MM.NNNN.bin -> one binary snapshot per month (see snapshot.py);
+#                              NNNN is the compaction that wrote it
+#   expenses.NNNNNN.bin     -> whole-ledger snapshot from before months, only
+#                              read until the first month snapshots exist
+#   expenses.json           -> legacy JSON snapshot, likewise
+#   months/rollups.NNNN.json -> the dashboard rollups (indexes.Rollups) as of
+#                              that compaction, CRC32 in the manifest
+#   expenses.journal        -> one JSON record per line, appended on every change
+#
+# A compaction only re-encodes the months whose rows changed, then swaps the
+# manifest in (that is the commit point) and removes files it no longer names.
+# Loading maps the month files but only attaches the months a caller asks
+# for; the Ledger attaches older ones later (Ledger.attach_since). The saved
+# rollups are read as they are and every replayed journal record is applied
+# to them too, so a change reaches the rollups in the same journal line that
+# records it. Rollups that are missing or fail their CRC are rebuilt from the
+# month columns (no rows decoded) and saved by the next compaction.
+#
+# The first journal line is a "base" header holding the CRC32 of the manifest
+# (or legacy snapshot) it applies to. If the manifest was replaced but the
+# journal was not reset (crash during compaction) the CRCs no longer match
+# and the stale journal is ignored instead of being replayed twice.
+#
+# Records are serialised on the caller's thread and written by the
+# BackgroundWriter. Every record carries a sequence number so a compaction
+# only drops the records its snapshot actually contains.
+# ------------------------------------------------------------
+
+MANIFEST_VERSION = 1
+
+
+def _record_rows(record):
+    """Rows one journal record touches (bulk records carry a list)."""
+    return len(record.get("expenses") or ()) or 1
+
+
+def _day_months(days):
+    """Month numbers (see month_numbers) of a set of ts // DAY values."""
+    days = np.fromiter(days, np.int64, len(days))
+    months = month_numbers(days * DAY)
+    months[days == MISSING_TS // DAY] = -1
+    return months
+
+
+class ExpenseJournal:
+    supports_queries = False
+    COMPACT_EVERY = 1000  # journal records before folding them into the snapshot
+    COMPACT_ROWS = 20000  # ... or rows, once bulk records (import, recategorize) add up
+
+    def __init__(self, snapshot_path, journal_path=None, writer=None):
+        self.snapshot_path = snapshot_path  # legacy JSON snapshot, read if no month snapshots exist
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + ".journal"
+        self.months_dir = os.path.join(os.path.dirname(snapshot_path), "months")
+        self.manifest_path = os.path.join(self.months_dir, "manifest.json")
+        self.writer = writer
+        self.base_crc = 0
+        self.pending = 0   # records in the journal since the last snapshot
+        self.pending_rows = 0  # rows those records touch
+        self.gen = 0       # compactions so far, names the month files
+        self.months = []   # manifest entries, oldest month first
+        self.rollups_file = None  # rollups file named by the manifest
+        self._needs_rewrite = False  # legacy snapshot: write every month on the next compaction
+        self.rollups = None          # Rollups of the whole ledger as of load(); the app keeps them current
+        self._rollups_rebuilt = False  # not read from disk: save them with the next compaction
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer = []         # (seq, line) not yet written
+        self._written = []        # (seq, line) in the journal file, not yet in a snapshot
+        self._journal_fresh = True  # next flush starts a new journal file
+        self._dirty_days = set()  # changed days waiting for the writer (kept if a write fails)
+        self._write_all = False
+
+    def _submit(self, key, fn):
+        if self.writer is None:
+            fn()
+        else:
+            self.writer.submit(key, fn)
+
+    # ---- loading ----
+
+    def _binary_snapshots(self):
+        """[(gen, path)] of the whole-ledger binary snapshots on disk, oldest first."""
+        folder, name = os.path.split(os.path.splitext(self.snapshot_path)[0])
+        found = []
+        for f in os.listdir(folder or "."):
+            parts = f.split(".")
+            if len(parts) == 3 and parts[0] == name and parts[2] == "bin" and parts[1].isdigit():
+                found.append((int(parts[1]), os.path.join(folder, f)))
+        return sorted(found)
+
+    def _remove_unused_files(self):
+        """Month files the manifest no longer names, and the pre-month snapshots."""
+        keep = {m["file"] for m in self.months} | {self.rollups_file}
+        unused = [os.path.join(self.months_dir, f) for f in os.listdir(self.months_dir)
+                  if f.endswith((".bin", ".json")) and f != "manifest.json" and f not in keep]
+        for path in unused + [path for _, path in self._binary_snapshots()]:
+            try: os.remove(path)
+            except OSError: pass  # still mapped (Windows); removed next time
+
+    def _load_manifest(self):
+        """Map the month snapshots named by the manifest; None if there is no manifest."""
+        try:
+            with open(self.manifest_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        manifest = json.loads(raw.decode("utf-8"))
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"{self.manifest_path}: not a manifest this version can read")
+
+        parts = []
+        try:
+            for m in manifest["months"]:
+                snap = BinarySnapshot(os.path.join(self.months_dir, m["file"]))
+                parts.append(snap)
+                if snap.crc != m["crc"]:
+                    raise ValueError(f"{m['file']} does not match the manifest")
+        except Exception:
+            for snap in parts:
+                snap.close()
+            raise
+
+        self.gen = manifest["gen"]
+        self.months = manifest["months"]
+        self.base_crc = zlib.crc32(raw)
+        snapshots = SnapshotSet(parts, self.months)
+        return snapshots, manifest.get("next_id", 1), self._load_rollups(manifest.get("rollups"), snapshots)
+
+    def _load_rollups(self, entry, snapshots):
+        """The rollups file named by the manifest, checked against its CRC; None if unusable."""
+        if not entry:
+            return None
+        try:
+            with open(os.path.join(self.months_dir, entry["file"]), "rb") as f:
+                raw = f.read()
+            if zlib.crc32(raw) != entry["crc"]:
+                raise ValueError(f"{entry['file']} does not match the manifest")
+            rollups = Rollups.from_dict(json.loads(raw.decode("utf-8")))
+            if rollups.count != len(snapshots):
+                raise ValueError(f"{entry['file']} counts {rollups.count} rows, the snapshot has {len(snapshots)}")
+        except Exception as e:
+            print("Error loading saved rollups (rebuilding them):", e)
+            return None
+        self.rollups_file = entry["file"]
+        return rollups
+
+    @staticmethod
+    def _rollups_from_columns(snapshots):
+        """Rollups of every snapshot row from the mapped columns (attached or not)."""
+        rollups = Rollups()
+        for part in snapshots.parts:
+            rollups.add_columns(part.ts, part.amount, part.cat, part.string)
+        return rollups
+
+    def _load_snapshot(self, since=None):
+        """Map the month snapshots; falls back to the older single-file snapshots."""
+        loaded = self._load_manifest()
+        if loaded is not None:
+            snapshots, next_id, self.rollups = loaded
+            if self.rollups is None:
+                self.rollups = self._rollups_from_columns(snapshots)
+                self._rollups_rebuilt = True
+            self._remove_unused_files()
+            return Ledger(snapshot=snapshots, since=since, next_id=next_id)
+
+        for gen, path in reversed(self._binary_snapshots()):
+            try:
+                snap = BinarySnapshot(path)
+            except Exception as e:
+                print("Error opening expenses snapshot:", e)
+                continue
+            self.base_crc = snap.crc
+            self._needs_rewrite = True  # split into months by the first compaction
+            snapshots = SnapshotSet.single(snap)
+            self.rollups = self._rollups_from_columns(snapshots)
+            self._rollups_rebuilt = True
+            return Ledger(snapshot=snapshots)
+
+        expenses = []
+        raw = b""
+        if os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, "rb") as f:
+                    raw = f.read()
+                data = json.loads(raw.decode("utf-8")) if raw.strip() else []
+                if isinstance(data, list):
+                    expenses = [Expense.from_dict(d) for d in data if isinstance(d, dict)]
+            except Exception as e:
+                print("Error loading expenses snapshot:", e)
+                expenses = []
+
+        self.base_crc = zlib.crc32(raw)
+        self._needs_rewrite = bool(expenses)  # converted by the first compaction
+        self.rollups = Rollups(expenses)
+        self._rollups_rebuilt = bool(expenses)
+        return Ledger(expenses)  # rows from before ids existed are numbered in order
+
+    def load(self, since=None):
+        """
+        Read the snapshot and replay the journal on top of it. With `since`
+        (a timestamp) only the months from then on are attached to the ledger.
+        """
+        expenses = self._load_snapshot(since)
+        self.pending = 0
+        self.pending_rows = 0
+        self._buffer = []
+        self._written = []
+        self._journal_fresh = True
+
+        if not os.path.exists(self.journal_path):
+            return expenses
+
+        torn = False
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                header = f.readline()
+                try:
+                    header = json.loads(header)
+                except ValueError:
+                    header = None
+                if not isinstance(header, dict) or header.get("crc") != self.base_crc:
+                    # Journal belongs to an older snapshot — nothing to replay.
+                    return expenses
+
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn = True  # torn write at the end of the file
+                        break
+                    self.apply(expenses, record, self.rollups)
+                    self.pending += 1
+                    self.pending_rows += _record_rows(record)
+                    self._seq += 1
+                    self._written.append((self._seq, line if line.endswith("\n") else line + "\n"))
+        except Exception as e:
+            print("Error replaying expenses journal:", e)
+
+        # a torn tail is dropped by rewriting the journal on the next flush
+        self._journal_fresh = torn or not self._written
+        return expenses
+
+    @staticmethod
+    def apply(ledger, record, rollups=None):
+        """Apply a single journal record to a Ledger (and to its Rollups, if given)."""
+        op = record.get("op")
+        if op == "edit_many":
+            for d in record["expenses"]:
+                ExpenseJournal.apply(ledger, {"op": "edit", "id": d.get("id"), "expense": d}, rollups)
+            return
+        if op == "add":
+            added = [ledger.add(Expense.from_dict(record["expense"]))]
+        elif op == "add_many":
+            added = [ledger.add(Expense.from_dict(d)) for d in record["expenses"]]
+        elif op in ("edit", "delete"):
+            exp_id = record.get("id")
+            if exp_id is None:  # journals written before ids: position in the ledger
+                old = ledger.at(record.get("index", -1))
+                if old is None:
+                    return
+                exp_id = old.id
+            elif exp_id not in ledger:
+                ledger.attach_id(exp_id)  # row from a month that is not attached yet
+            old = ledger.get(exp_id)
+            if old is None:
+                return
+            if op == "edit":
+                added = [Expense.from_dict(record["expense"])]
+                ledger.replace(exp_id, added[0])
+            else:
+                added = []
+                ledger.remove(exp_id)
+            if rollups is not None:
+                rollups.remove(old)
+        else:
+            return
+        if rollups is not None:
+            for exp in added:
+                rollups.add(exp)
+
+    # ---- writing ----
+
+    def _header(self):
+        return json.dumps({"op": "base", "crc": self.base_crc}) + "\n"
+
+    def append(self, record):
+        """Queue one change record. Cost does not depend on ledger size."""
+        if "old" in record:  # replay finds the old row in the ledger itself
+            record = {k: v for k, v in record.items() if k != "old"}
+        line = json.dumps(record, separators=(",", ":"), default=Expense.to_dict) + "\n"
+        with self._lock:
+            self._seq += 1
+            self._buffer.append((self._seq, line))
+        self.pending += 1
+        self.pending_rows += _record_rows(record)
+        self._submit("journal", self._flush_journal)
+
+    def _flush_journal(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        if not lines:
+            return
+        try:
+            if self._journal_fresh or not os.path.exists(self.journal_path):
+                body = "".join(l for _, l in self._written + lines)
+                atomic_write(self.journal_path, (self._header() + body).encode("utf-8"))
+            else:
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.writelines(l for _, l in lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._journal_fresh = False
+            self._written.extend(lines)
+        except Exception as e:
+            print("Error writing expenses journal:", e)
+            with self._lock:
+                self._buffer[:0] = lines  # retried with the next flush
+
+    def needs_compaction(self):
+        return (self.pending >= self.COMPACT_EVERY or self.pending_rows >= self.COMPACT_ROWS
+                or self._needs_rewrite or self._rollups_rebuilt)
+
+    def compact(self, expenses, rollups=None):
+        """
+        Fold the journal into the month snapshots that changed and reset the
+        journal. `rollups` must match `expenses` (the app's Rollups for its
+        Ledger); they are worked out here when a plain list is saved.
+        """
+        if isinstance(expenses, Ledger):
+            data, source = expenses.slots()  # undecoded rows stay undecoded
+            detached = list(expenses.detached_parts())
+            days = expenses.take_dirty_days()
+            next_id = expenses.next_id
+            write_all = self._needs_rewrite
+        else:
+            data, source, detached, days = list(expenses), None, [], set()
+            next_id = max((e.id for e in data if e.id is not None), default=0) + 1
+            write_all = True
+            rollups = Rollups(data)
+        rollups = rollups.to_dict() if rollups is not None else None  # copied now, written later
+        with self._lock:
+            upto = self._seq
+            # jobs coalesce in the writer, so changed days add up until one runs
+            self._dirty_days |= days
+            self._write_all = self._write_all or write_all
+            months = None if self._write_all else _day_months(self._dirty_days)
+        data = self._freeze_rows(data, months)
+        self.pending = 0
+        self.pending_rows = 0
+        self._needs_rewrite = False
+        self._rollups_rebuilt = False
+        self._submit("snapshot", lambda: self._write_snapshot(data, upto, source, detached, next_id, rollups))
+
+    @staticmethod
+    def _freeze_rows(data, months):
+        """
+        The rows the writer will encode: undecoded rows as they are, plus copies
+        of the decoded rows in `months` (None: all). Decoded rows can still be
+        edited before the writer runs; the copies keep the snapshot in step
+        with `upto` and the rollups. Rows of clean months are not re-encoded,
+        so they are neither copied nor handed over.
+        """
+        rows = [r for r in data if isinstance(r, int)]
+        exps = [r for r in data if not isinstance(r, int)]
+        if months is not None and exps:
+            ts = np.fromiter((e.ts for e in exps), np.int64, len(exps))
+            keep = np.isin(month_numbers(ts), months).tolist()
+            exps = [e for e, k in zip(exps, keep) if k]
+        return rows + [e.copy() for e in exps]
+
+    def _write_months(self, data, source, detached, months_wanted):
+        """
+        Encode the wanted months (None: all) from the live rows plus the rows of
+        detached parts, and return the new manifest entries.
+        """
+        if months_wanted is not None:
+            keys = {month_key(m) for m in months_wanted.tolist()}
+            for p in detached:
+                if source.meta[p]["month"] in keys:
+                    data = data + list(range(int(source.starts[p]), int(source.starts[p + 1])))
+
+        n = len(data)
+        is_row = np.fromiter((isinstance(r, int) for r in data), bool, n)
+        row_pos, exp_pos = np.flatnonzero(is_row), np.flatnonzero(~is_row)
+        ts = np.empty(n, np.int64)
+        ids = np.empty(n, np.int64)
+        amounts = np.empty(n, np.float64)
+        if len(row_pos):
+            rows = np.fromiter((data[i] for i in row_pos.tolist()), np.int64, len(row_pos))
+            ts[row_pos] = source.column("ts", rows)
+            ids[row_pos] = source.column("ids", rows)
+            amounts[row_pos] = source.column("amount", rows)
+        exps = [data[i] for i in exp_pos.tolist()]
+        ts[exp_pos] = np.fromiter((e.ts for e in exps), np.int64, len(exps))
+        ids[exp_pos] = np.fromiter((e.id for e in exps), np.int64, len(exps))
+        amounts[exp_pos] = np.fromiter((e.amount for e in exps), np.float64, len(exps))
+        months = month_numbers(ts)
+
+        if months_wanted is None:
+            entries = {}
+            months_wanted = np.unique(months)
+        else:
+            entries = {m["month"]: m for m in self.months}
+
+        gen = self.gen + 1
+        os.makedirs(self.months_dir, exist_ok=True)
+        for month in months_wanted.tolist():
+            key = month_key(month)
+            sel = np.flatnonzero(months == month)
+            if not len(sel):
+                entries.pop(key, None)  # every row of the month is gone
+                continue
+            sel = sel[np.argsort(ids[sel], kind="stable")]  # id order inside a month
+
+            # untouched rows of a month all come from that month's part
+            rows = [data[i] for i in sel.tolist()]
+            part = None
+            first_row = next((r for r in rows if isinstance(r, int)), None)
+            if first_row is not None:
+                p = int(source.part_of(first_row))
+                part, lo, hi = source.parts[p], int(source.starts[p]), int(source.starts[p + 1])
+                rows = [
+                    (r - lo if lo <= r < hi else source[r]) if isinstance(r, int) else r
+                    for r in rows
+                ]
+
+            raw, crc = encode_snapshot(rows, part)
+            name = f"{key}.{gen:06d}.bin"
+            atomic_write(os.path.join(self.months_dir, name), raw)
+            entries[key] = {
+                "month": key,
+                "file": name,
+                "rows": len(sel),
+                "total": float(amounts[sel].sum()),
+                "last_ts": int(ts[sel].max()),
+                "crc": crc,
+            }
+        return sorted(entries.values(), key=lambda m: (m["month"] != UNDATED, m["month"]))
+
+    def _write_snapshot(self, data, upto, source=None, detached=(), next_id=1, rollups=None):
+        with self._lock:
+            days, self._dirty_days = self._dirty_days, set()
+            write_all, self._write_all = self._write_all, False
+        try:
+            months = self._write_months(data, source, detached, None if write_all else _day_months(days))
+            manifest = {"version": MANIFEST_VERSION, "gen": self.gen + 1, "next_id": next_id, "months": months}
+            if rollups is not None:
+                rollups_raw = json.dumps(rollups, separators=(",", ":")).encode("utf-8")
+                rollups_file = f"rollups.{self.gen + 1:06d}.json"
+                atomic_write(os.path.join(self.months_dir, rollups_file), rollups_raw)
+                manifest["rollups"] = {"file": rollups_file, "crc": zlib.crc32(rollups_raw)}
+            raw = json.dumps(manifest, indent=1).encode("utf-8")
+            atomic_write(self.manifest_path, raw)
+        except Exception as e:
+            print("Error saving expenses snapshot:", e)
+            with self._lock:  # the old manifest + journal are still intact; retry these days later
+                self._dirty_days |= days
+                self._write_all = self._write_all or write_all
+            return
+
+        self.gen += 1
+        self.months = months
+        self.rollups_file = manifest.get("rollups", {}).get("file")
+        self.base_crc = zlib.crc32(raw)
+        with self._lock:
+            self._buffer = [(s, l) for s, l in self._buffer if s > upto]
+        # records written after the snapshot was taken move to the new journal
+        self._written = [(s, l) for s, l in self._written if s > upto]
+        try:
+            if self._written:
+                atomic_write(
+                    self.journal_path,
+                    (self._header() + "".join(l for _, l in self._written)).encode("utf-8"),
+                )
+            elif os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._journal_fresh = not self._written
+        except Exception as e:
+            print("Error resetting expenses journal:", e)
+            with self._lock:
+                self._buffer[:0] = self._written
+            self._written = []
+            self._journal_fresh = True
+
+        self._remove_unused_files()
+
+    def close(self):
+        pass
+
+
+# ------------------------------------------------------------
+# Optional SQLite backend (settings: "storage_backend": "sqlite")
+#
+# Same load/append/compact entry points as ExpenseJournal, plus pager()
+# so filtering, sorting and date ranges run in SQL on indexed columns.
+# On first use the existing expenses.json (+ journal) is imported once.
+# Date ranges and date sorts use the integer ts column (same scale as
+# Expense.ts), not the date text, which is only kept for display.
+#
+# The dashboard rollups are kept in the meta table ("rollups" + its CRC32)
+# and rewritten in the same transaction as each burst of expense writes, so
+# they can never describe a different ledger than the one on disk.
+# ------------------------------------------------------------
+
+SQLITE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS expenses (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    amount      REAL NOT NULL DEFAULT 0,
+    description TEXT NOT NULL DEFAULT '',
+    category    TEXT NOT NULL DEFAULT 'Other',
+    date        TEXT NOT NULL DEFAULT '',
+    ts          INTEGER NOT NULL DEFAULT {MISSING_TS}
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);
+CREATE INDEX IF NOT EXISTS idx_expenses_amount ON expenses(amount);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# sort mode -> (column, descending); rows are ordered by (column, id) so that
+# the pair can be used as a page cursor
+SQLITE_SORTS = {
+    None: ("id", False),
+    "amount_asc": ("amount", False),
+    "amount_desc": ("amount", True),
+    "date_new": ("ts", True),
+    "date_old": ("ts", False),
+}
+
+
+def _expense_row(exp):
+    return (exp.amount, exp.description, exp.category, exp.date, exp.ts)
+
+
+def _add_ts_column(conn):
+    """Databases from before the ts column: add it and fill it in from the date text."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(expenses)")}
+    if "ts" not in columns:
+        with conn:
+            conn.execute(f"ALTER TABLE expenses ADD COLUMN ts INTEGER NOT NULL DEFAULT {MISSING_TS}")
+            stamps = []
+            for row_id, date in conn.execute("SELECT id, date FROM expenses"):
+                ts = parse_ts(date)
+                if ts is not None:
+                    stamps.append((ts, row_id))
+            conn.executemany("UPDATE expenses SET ts = ? WHERE id = ?", stamps)
+            conn.execute("DROP INDEX IF EXISTS idx_expenses_date")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_ts ON expenses(ts)")
+
+
+def _lower(text):
+    # SQLite's own lower() and LIKE only fold ASCII; match the trigram index instead
+    return text.lower() if isinstance(text, str) else text
+
+
+class SqliteExpenseStore:
+    supports_queries = True
+
+    INSERT_SQL = "INSERT INTO expenses (id, amount, description, category, date, ts) VALUES (?, ?, ?, ?, ?, ?)"
+    UPDATE_SQL = "UPDATE expenses SET amount = ?, description = ?, category = ?, date = ?, ts = ? WHERE id = ?"
+
+    def __init__(self, db_path, legacy_json_path=None, writer=None):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self.writer = writer
+        self.conn = None    # reads + load/migration (the loader thread, then the Tk thread)
+        self._wconn = None  # writes (owned by the writer thread)
+        self.ledger = Ledger()  # row id == expense id
+        self.rollups = None     # Rollups as of load(), handed to the app
+
+        self._lock = threading.Lock()
+        self._statements = []  # (sql, params) queued for the writer
+        self._rollups = Rollups()   # the writer's copy, moved by each appended record
+        self._rollups_changed = False
+        self._queued = 0     # _queue() calls so far ...
+        self._committed = 0  # ... and how many of them the writer has been through
+
+    def _connect(self):
+        # each connection is used by one thread at a time, but the read one is
+        # opened by the ledger loader and handed over to the Tk thread
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SQLITE_SCHEMA)
+        _add_ts_column(conn)
+        conn.create_function("py_lower", 1, _lower, deterministic=True)
+        return conn
+
+    def _migrate_from_json(self):
+        """One-shot import of the JSON ledger the first time SQLite is used."""
+        cur = self.conn.execute("SELECT value FROM meta WHERE key = 'migrated_json'")
+        if cur.fetchone() is not None:
+            return
+
+        has_rows = self.conn.execute("SELECT 1 FROM expenses LIMIT 1").fetchone() is not None
+        legacy = []
+        if not has_rows and self.legacy_json_path and os.path.exists(self.legacy_json_path):
+            legacy = ExpenseJournal(self.legacy_json_path).load()
+
+        with self.conn:
+            self.conn.executemany(self.INSERT_SQL, ((e.id,) + _expense_row(e) for e in legacy))
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', ?)",
+                (str(len(legacy)),),
+            )
+
+    def load(self, since=None):
+        """The whole ledger (SQLite answers ranges itself, `since` is not needed)."""
+        try:
+            if self.conn is None:
+                self.conn = self._connect()
+            self._migrate_from_json()
+            cur = self.conn.execute(
+                "SELECT id, amount, description, category, date, ts FROM expenses ORDER BY id"
+            )
+        except Exception as e:
+            print("Error loading SQLite expenses:", e)
+            return self.ledger
+
+        self.ledger = Ledger(
+            Expense(float(amount), desc, cat, date, ts, id=row_id) for row_id, amount, desc, cat, date, ts in cur
+        )
+        saved = self._load_rollups()
+        with self._lock:
+            if saved is None:
+                self._rollups = Rollups(self.ledger)
+                self._rollups_changed = True
+            else:
+                self._rollups = saved
+        self.rollups = Rollups.from_dict(self._rollups.to_dict())  # the app's own copy
+        if saved is None:
+            self._queue([])  # save the rebuilt rollups
+        return self.ledger
+
+    def _load_rollups(self):
+        """Saved rollups if their CRC and row count check out, else None."""
+        try:
+            meta = dict(self.conn.execute(
+                "SELECT key, value FROM meta WHERE key IN ('rollups', 'rollups_crc')"
+            ).fetchall())
+            if "rollups" not in meta:
+                return None
+            raw = meta["rollups"].encode("utf-8")
+            if str(zlib.crc32(raw)) != meta.get("rollups_crc"):
+                raise ValueError("saved rollups do not match their checksum")
+            rollups = Rollups.from_dict(json.loads(raw))
+            if rollups.count != len(self.ledger):
+                raise ValueError(f"saved rollups count {rollups.count} rows, the table has {len(self.ledger)}")
+            return rollups
+        except Exception as e:
+            print("Error loading saved rollups (rebuilding them):", e)
+            return None
+
+    # ---- writing (statements are built here, executed by the writer) ----
+
+    def _queue(self, statements, changes=()):
+        """Queue statements; `changes` are (sign, expense) pairs for the rollups."""
+        with self._lock:
+            self._queued += 1
+            self._statements.extend(statements)
+            for sign, exp in changes:
+                (self._rollups.add if sign > 0 else self._rollups.remove)(exp)
+                self._rollups_changed = True
+        if self.writer is None:
+            self._flush_statements()
+        else:
+            self.writer.submit("sqlite", self._flush_statements)
+
+    def _flush_statements(self):
+        with self._lock:
+            upto = self._queued
+            statements, self._statements = self._statements, []
+            rollups = None
+            if self._rollups_changed:  # copied under the lock: matches exactly these statements
+                rollups = json.dumps(self._rollups.to_dict(), separators=(",", ":"))
+                self._rollups_changed = False
+        if not statements and rollups is None:
+            self._committed = upto
+            return
+        try:
+            if self._wconn is None:
+                self._wconn = self._connect()
+            with self._wconn:  # one transaction per coalesced burst
+                for sql, params in statements:
+                    if isinstance(params, list):
+                        self._wconn.executemany(sql, params)
+                    else:
+                        self._wconn.execute(sql, params)
+                if rollups is not None:
+                    self._wconn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("rollups", rollups), ("rollups_crc", str(zlib.crc32(rollups.encode("utf-8"))))],
+                    )
+        except Exception as e:
+            print("Error writing SQLite expenses:", e)
+        self._committed = upto  # written or given up on: readers stop waiting either way
+
+    def writes_pending(self):
+        """True while queued changes are not yet visible to the read connection."""
+        return self._committed != self._queued
+
+    def append(self, record):
+        """
+        Apply one change record (same shape as the JSON journal) as a SQL
+        statement. Edits and deletes carry the row as it was in "old".
+        """
+        op = record.get("op")
+        if op == "edit_many":
+            exps = record["expenses"]
+            self._queue(
+                [(self.UPDATE_SQL, [_expense_row(exp) + (exp.id,) for exp in exps])],
+                [(-1, e) for e in record["old"]] + [(1, e) for e in exps],
+            )
+            return
+        old = [(-1, record["old"])] if record.get("old") is not None else []
+        if op == "add":
+            exp = record["expense"]
+            self._queue([(self.INSERT_SQL, (exp.id,) + _expense_row(exp))], [(1, exp)])
+        elif op == "add_many":
+            exps = record["expenses"]
+            self._queue([(self.INSERT_SQL, [(exp.id,) + _expense_row(exp) for exp in exps])], [(1, e) for e in exps])
+        elif op == "edit":
+            exp = record["expense"]
+            self._queue([(self.UPDATE_SQL, _expense_row(exp) + (record["id"],))], old + [(1, exp)])
+        elif op == "delete":
+            self._queue([("DELETE FROM expenses WHERE id = ?", (record["id"],))], old)
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self, expenses, rollups=None):
+        """Replace the whole table with the given ledger (full save); rollups are recounted."""
+        self.ledger = expenses
+        params = [(exp.id,) + _expense_row(exp) for exp in expenses]
+        with self._lock:
+            self._rollups = Rollups(expenses)
+            self._rollups_changed = True
+        self._queue([("DELETE FROM expenses", ()), (self.INSERT_SQL, params)])
+
+    def pager(self, search="", category=None, since=None, sort=None):
+        """
+        The matching expenses as a SqlitePager (filtered and sorted in SQL, read
+        by page). `since` is a timestamp (Expense.ts scale), search ignores case.
+        """
+        where, args = [], []
+        if search:
+            search = search.lower()
+            pattern = "%" + search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            if search.isascii():  # LIKE folds ASCII case itself
+                where.append("(description LIKE ? ESCAPE '\\' OR category LIKE ? ESCAPE '\\')")
+            else:  # other letters go through the (slower) Python lower()
+                where.append("(py_lower(description) LIKE ? ESCAPE '\\' OR py_lower(category) LIKE ? ESCAPE '\\')")
+            args += [pattern, pattern]
+        if category:
+            where.append("category = ?")
+            args.append(category)
+        if since is not None:
+            where.append("ts >= ?")
+            args.append(since)
+        column, descending = SQLITE_SORTS.get(sort, SQLITE_SORTS[None])
+        return SqlitePager(self, where, args, column, descending)
+
+    def _close_writer_conn(self):
+        if self._wconn is not None:
+            self._wconn.close()
+            self._wconn = None
+
+    def close(self):
+        if self.writer is None:
+            self._close_writer_conn()
+        else:
+            self.writer.submit(None, self._close_writer_conn)
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def open_store(backend, data_dir, writer=None):
+    """Pick the persistence backend from the "storage_backend" setting."""
+    json_path = os.path.join(data_dir, "expenses.json")
+    if backend == "sqlite":
+        return SqliteExpenseStore(
+            os.path.join(data_dir, "expenses.db"), legacy_json_path=json_path, writer=writer
+        )
+    return ExpenseJournal(json_path, writer=writer)
+
+
+class SqlitePager:
+    """
+    Same reading interface as indexes.KeysetRange, answered by SQLite. A page
+    is "WHERE (column, id) >= cursor ORDER BY column, id LIMIT n", which walks
+    the column's index from the cursor instead of skipping an OFFSET.
+    """
+
+    def __init__(self, store, where, args, column, descending):
+        self.store = store
+        self.where = where
+        self.args = args
+        self.column = column
+        self.reverse = descending
+        self.cursor = attrgetter(column, "id")  # Expense fields are named like the columns
+        self._count = None
+
+    def _ids(self, extra=None, extra_args=(), backwards=False, limit=None, offset=None):
+        where = self.where + ([extra] if extra else [])
+        sql = "SELECT id FROM expenses"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        direction = "DESC" if self.reverse != backwards else "ASC"
+        sql += f" ORDER BY {self.column} {direction}, id {direction}"
+        args = list(self.args) + list(extra_args)
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+            if offset:
+                sql += " OFFSET ?"
+                args.append(offset)
+        try:
+            get = self.store.ledger.get
+            return [get(row_id) for (row_id,) in self.store.conn.execute(sql, args)]
+        except Exception as e:
+            print("Error querying SQLite expenses:", e)
+            return []
+
+    def _beyond(self, inclusive=False, backwards=False):
+        """Condition for rows after the cursor in display order (before it, backwards)."""
+        op = "<" if self.reverse != backwards else ">"
+        return f"({self.column}, id) {op}{'=' if inclusive else ''} (?, ?)"
+
+    def __len__(self):
+        if self._count is None:
+            sql = "SELECT COUNT(*) FROM expenses"
+            if self.where:
+                sql += " WHERE " + " AND ".join(self.where)
+            try:
+                self._count = self.store.conn.execute(sql, self.args).fetchone()[0]
+            except Exception as e:
+                print("Error querying SQLite expenses:", e)
+                self._count = 0
+        return self._count
+
+    def position(self, cursor):
+        if cursor is None:
+            return 0
+        sql = "SELECT COUNT(*) FROM expenses WHERE " + " AND ".join(
+            self.where + [self._beyond(backwards=True)]
+        )
+        try:
+            return self.store.conn.execute(sql, list(self.args) + list(cursor)).fetchone()[0]
+        except Exception as e:
+            print("Error querying SQLite expenses:", e)
+            return 0
+
+    def rows_from(self, cursor, n):
+        if cursor is None:
+            return self._ids(limit=n)
+        return self._ids(self._beyond(inclusive=True), cursor, limit=n)
+
+    def rows_before(self, cursor, n):
+        if cursor is None:
+            return []
+        return self._ids(self._beyond(backwards=True), cursor, backwards=True, limit=n)[::-1]
+
+    def seek(self, pos):
+        # only for scrollbar drags: the one place where a position has to be found
+        rows = self._ids(limit=1, offset=max(0, min(pos, len(self) - 1)))
+        return self.cursor(rows[0]) if rows and rows[0] is not None else None
+
+    def all(self):
+        return self._ids()
@@ -0,0 +1,68 @@
+"""Shared bits for the storage and index tests (not a test module)."""
+
+import random
+
+from src.expense import Expense
+from src.indexes import Rollups
+from src.storage import ExpenseJournal
+
+
+class HeldWriter:
+    """Stands in for BackgroundWriter: jobs wait until run() (same key coalescing)."""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def submit(self, key, fn):
+        self.jobs.pop(key, None)
+        self.jobs[key] = fn
+
+    def run(self):
+        jobs, self.jobs = self.jobs, {}
+        for fn in jobs.values():
+            fn()
+
+
+def open_journal(tmp_path, writer=None):
+    store = ExpenseJournal(str(tmp_path / "expenses.json"), writer=writer)
+    ledger = store.load()
+    return store, ledger, store.rollups
+
+
+def add(store, ledger, rollups, amount, date="2026-01-15 12:00:00", category="Food"):
+    exp = ledger.add(Expense(amount, f"row {amount}", category, date))
+    rollups.add(exp)
+    store.append({"op": "add", "expense": exp})
+    return exp
+
+
+def edit(store, ledger, rollups, exp_id, changes):
+    exp = ledger.get(exp_id)
+    old = exp.copy()
+    rollups.remove(exp)
+    ledger.update(exp_id, changes)
+    rollups.add(exp)
+    store.append({"op": "edit", "id": exp_id, "expense": exp, "old": old})
+
+
+def rows(ledger):
+    return sorted((e.id, e.amount, e.category, e.date) for e in ledger)
+
+
+def assert_rollups_match(ledger, rollups):
+    fresh = Rollups(list(ledger))
+    assert (rollups.count, round(rollups.total, 6)) == (fresh.count, round(fresh.total, 6))
+    assert rollups.to_dict() == fresh.to_dict()
+
+
+def sample_rows(n=300, seed=1):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(1, n + 1):
+        date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00"
+        if i % 50 == 0:
+            date = "sometime"  # undated rows
+        exp = Expense(float(rng.randint(1, 40)), f"row {i}", rng.choice(["Food", "Travel", "Other"]), date)
+        exp.id = i
+        rows.append(exp)
+    return rows
@@ -0,0 +1,79 @@
+import json
+
+from src.category_model import CategoryModel, tokens
+from src.expense import Expense
+from src.indexes import Rollups
+
+
+def exp(desc, category, amount=1.0):
+    return Expense(amount, desc, category, "2025-03-01 12:00:00")
+
+
+TRAINING = [
+    exp("Lidl groceries", "Food"),
+    exp("groceries and bread", "Food"),
+    exp("Pizza night", "Food"),
+    exp("Shell fuel 4711", "Transport"),
+    exp("bus ticket", "Transport"),
+    exp("misc thing", "Other"),
+]
+
+
+def test_tokens_drop_digits_and_short_words():
+    assert tokens("Shell FUEL #4711 a b2 Café") == ["shell", "fuel", "café"]
+
+
+def test_predict_picks_the_likeliest_category():
+    model = CategoryModel(TRAINING)
+    assert model.predict("groceries at lidl") == "Food"
+    assert model.predict("fuel for the bus") == "Transport"
+    assert model.predict("12345 ??") is None
+    assert model.predict("misc") is None  # "Other" rows are never learned
+
+
+def test_add_then_remove_leaves_no_trace():
+    model = CategoryModel(TRAINING)
+    before = json.dumps(model.to_dict(), sort_keys=True)
+    extra = exp("Spotify premium", "Entertainment")
+    model.add(extra)
+    assert model.predict("spotify premium") == "Entertainment"
+    model.remove(extra)
+    assert json.dumps(model.to_dict(), sort_keys=True) == before
+    assert model.rows() == 5
+
+
+def test_load_uses_saved_counts_that_match_the_ledger(tmp_path):
+    path = tmp_path / "category_model.json"
+    path.write_text(json.dumps(CategoryModel(TRAINING).to_dict()), encoding="utf-8")
+    model = CategoryModel.load(str(path), TRAINING)
+    assert model.from_file and not model.dirty and not model.partial
+    assert model.predict("lidl") == "Food"
+
+
+def test_load_retrains_when_the_file_is_stale_or_broken(tmp_path):
+    path = tmp_path / "category_model.json"
+    path.write_text(json.dumps(CategoryModel(TRAINING[:2]).to_dict()), encoding="utf-8")
+    model = CategoryModel.load(str(path), TRAINING)
+    assert not model.from_file and model.dirty and model.rows() == 5
+
+    for broken in ["{not json", json.dumps({"version": 99}), json.dumps({"version": 1, "docs": {}})]:
+        path.write_text(broken, encoding="utf-8")
+        model = CategoryModel.load(str(path), TRAINING)
+        assert not model.from_file and model.rows() == 5
+    assert not CategoryModel.load(str(tmp_path / "missing.json"), TRAINING).from_file
+
+
+def test_load_of_a_partial_ledger_checks_against_the_whole(tmp_path):
+    path = tmp_path / "category_model.json"
+    rollups = Rollups(TRAINING)
+    assert CategoryModel.learned_rows(rollups) == 5
+
+    # saved model of the whole ledger, only the newest rows attached
+    path.write_text(json.dumps(CategoryModel(TRAINING).to_dict()), encoding="utf-8")
+    model = CategoryModel.load(str(path), TRAINING[3:], rows=CategoryModel.learned_rows(rollups))
+    assert model.from_file and model.rows() == 5
+
+    # no usable file: trained on what is attached and marked partial
+    path.unlink()
+    model = CategoryModel.load(str(path), TRAINING[3:], rows=CategoryModel.learned_rows(rollups))
+    assert model.partial and model.rows() == 2
@@ -0,0 +1,65 @@
+import csv
+import threading
+
+from src.csv_io import CSV_COLUMNS, CsvExportJob, export_rows
+from src.expense import Expense
+
+
+def sample(n):
+    return [Expense(i + 0.5, f"item {i}, \"quoted\"", "Food", f"2025-01-{i % 28 + 1:02d} 09:00:00") for i in range(n)]
+
+
+def test_export_rows_formats_each_expense():
+    assert list(export_rows(sample(1), "€")) == [("0.50", "€", "Food", 'item 0, "quoted"', "2025-01-01 09:00:00")]
+
+
+def test_export_job_writes_every_row(tmp_path):
+    path = str(tmp_path / "out.csv")
+    expenses = sample(12)
+    job = CsvExportJob(path, export_rows(expenses, "$"), len(expenses))
+    job.CHUNK_ROWS = 5
+    job.start().join()
+
+    assert job.finished and job.error is None and not job.cancelled
+    assert job.done == 12
+    with open(path, newline="", encoding="utf-8") as f:
+        out = list(csv.reader(f))
+    assert out[0] == CSV_COLUMNS
+    assert out[1:] == [list(row) for row in export_rows(expenses, "$")]
+    assert not (tmp_path / "out.csv.part").exists()
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    path = str(tmp_path / "out.csv")
+    started = threading.Event()
+    go_on = threading.Event()
+
+    def rows():
+        for i, row in enumerate(export_rows(sample(100), "$")):
+            if i == 5:
+                started.set()
+                go_on.wait()
+            yield row
+
+    job = CsvExportJob(path, rows(), 100)
+    job.CHUNK_ROWS = 5
+    job.start()
+    started.wait()
+    job.cancel()
+    go_on.set()
+    job.join()
+
+    assert job.finished and job.cancelled and job.error is None
+    assert job.done == 10  # stops at the next chunk boundary
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_export_reports_the_error(tmp_path):
+    def rows():
+        yield ("1.00", "$", "Food", "ok", "2025-01-01")
+        raise RuntimeError("ledger went away")
+
+    job = CsvExportJob(str(tmp_path / "out.csv"), rows(), 2)
+    job.start().join()
+    assert isinstance(job.error, RuntimeError) and not job.cancelled
+    assert list(tmp_path.iterdir()) == []
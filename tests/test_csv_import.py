@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from ledger_helpers import open_journal, rows
+from src.csv_io import CsvImportJob, parse_amount, parse_date
+from src.expense import Expense
+
+
+@pytest.mark.parametrize("text, value", [
+    ("12.50", 12.5),
+    ("12,50", 12.5),
+    ("1,234.56", 1234.56),
+    ("1.234,56", 1234.56),
+    ("$ 9.99", 9.99),
+    ("R$ 10,00", 10.0),
+    ("9.99 DKK", 9.99),
+    ("+4.00€", 4.0),
+])
+def test_parse_amount_accepts_common_formats(text, value):
+    assert parse_amount(text) == pytest.approx(value)
+
+
+@pytest.mark.parametrize("text", ["-12.50", "(12.50)", "$-5", "-$5", "5.00-", "(€ 3,20)"])
+def test_parse_amount_rejects_refunds_and_credits(text):
+    with pytest.raises(ValueError, match="refund"):
+        parse_amount(text)
+
+
+@pytest.mark.parametrize("text", ["", "abc", "nan", "inf", "Rx5"])
+def test_parse_amount_rejects_garbage(text):
+    with pytest.raises(ValueError):
+        parse_amount(text)
+
+
+@pytest.mark.parametrize("text, value", [
+    ("2024-03-05 10:20:30", "2024-03-05 10:20:30"),
+    ("2024-03-05", "2024-03-05 00:00:00"),
+    ("05/03/2024", "2024-03-05 00:00:00"),
+    ("05.03.2024", "2024-03-05 00:00:00"),
+    ("12/31/2024", "2024-12-31 00:00:00"),
+])
+def test_parse_date_normalises(text, value):
+    assert parse_date(text) == value
+
+
+def test_parse_date_rejects_unknown_formats():
+    with pytest.raises(ValueError):
+        parse_date("March 5th")
+
+
+def run_import(path, batch_rows=None):
+    job = CsvImportJob(str(path), lambda desc: "Guessed")
+    if batch_rows:
+        job.BATCH_ROWS = batch_rows
+    job.start()
+    batches = []
+    while not job.done():
+        batches.extend(job.poll())
+        job.join(0.01)
+    batches.extend(job.poll())
+    return job, batches
+
+
+def test_import_skips_bad_rows_and_refunds(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text(
+        "Date;Amount;Description;Category\n"
+        "2024-03-05;12,50;Café crème;Food\n"
+        "2024-03-06;-4,00;Refund;Food\n"
+        "2024-03-07;(3,00);Credit;\n"
+        "someday;1,00;Bad date;\n"
+        "2024-03-08;7;Bus;\n",
+        encoding="utf-8",
+    )
+    job, batches = run_import(path)
+    expenses = [e for batch in batches for e in batch]
+
+    assert job.error is None and not job.cancelled
+    assert [(e.amount, e.description, e.category) for e in expenses] == [
+        (12.5, "Café crème", "Food"),
+        (7.0, "Bus", "Guessed"),
+    ]
+    assert expenses[0].date == "2024-03-05 00:00:00"
+    assert job.imported == 2 and job.skipped == 3
+    assert job.errors[0].startswith("line 3:")
+
+
+def test_import_counts_bytes_not_characters(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("Amount,Date,Description\n" + "1.00,2024-01-01,Ünïcødé €\n" * 50, encoding="utf-8")
+    job, batches = run_import(path, batch_rows=7)
+    assert job.imported == 50 and len(batches) == 8
+    assert job.read_bytes == os.path.getsize(path)
+
+
+def test_import_needs_amount_and_date_columns(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("Amount,Description\n1.00,x\n", encoding="utf-8")
+    job, batches = run_import(path)
+    assert batches == [] and isinstance(job.error, ValueError)
+
+
+def test_imported_batches_compact_once_their_rows_add_up(tmp_path):
+    store, ledger, rollups = open_journal(tmp_path)
+    store.COMPACT_ROWS = 100
+
+    def import_batch(n):
+        exps = [ledger.add(Expense(1.0, "x", "Food", "2025-05-01 10:00:00")) for _ in range(n)]
+        for exp in exps:
+            rollups.add(exp)
+        store.append({"op": "add_many", "expenses": exps})
+
+    import_batch(60)
+    assert store.pending == 1 and not store.needs_compaction()  # a small import stays journaled
+    import_batch(60)
+    assert store.pending_rows == 120 and store.needs_compaction()
+
+    store.compact(ledger, rollups)
+    assert store.pending_rows == 0 and not store.needs_compaction()
+    want = rows(ledger)
+    store.close()
+    store, ledger, rollups = open_journal(tmp_path)
+    assert rows(ledger) == want
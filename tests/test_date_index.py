@@ -0,0 +1,45 @@
+from datetime import datetime
+
+import pytest
+
+from ledger_helpers import sample_rows
+from src.expense import Expense
+from src.indexes import MISSING_TS, DateIndex, parse_ts, to_ts
+
+
+def test_dates_are_parsed_once_into_timestamps():
+    exp = Expense(1.0, "x", "Food", "2025-03-04 05:06:07")
+    assert exp.ts == to_ts(datetime(2025, 3, 4, 5, 6, 7))
+    assert Expense(1.0, "x", "Food", "not a date").ts == MISSING_TS
+    assert parse_ts("") is None
+
+
+@pytest.mark.parametrize("start, end", [
+    (None, None),
+    ("2025-04-01", None),
+    ("2025-04-01", "2025-07-15"),
+    ("2030-01-01", None),
+])
+def test_between_matches_a_scan(start, end):
+    rows = sample_rows()
+    index = DateIndex(rows)
+    lo = None if start is None else to_ts(datetime.fromisoformat(start))
+    hi = None if end is None else to_ts(datetime.fromisoformat(end))
+    want = [e for e in rows if e.ts != MISSING_TS and (lo is None or e.ts >= lo) and (hi is None or e.ts < hi)]
+    got = index.between(lo, hi)
+    assert [e.ts for e in got] == sorted(e.ts for e in want)
+    assert {id(e) for e in got} == {id(e) for e in want}  # undated rows never match a range
+
+
+def test_add_remove_and_batches_keep_date_order():
+    rows = sample_rows(400)
+    index = DateIndex(rows[:100])
+    for exp in rows[100:150]:
+        index.add(exp)
+    index.add_many(rows[150:])
+    for exp in rows[::7]:
+        assert index.remove(exp) is not None
+    assert index.remove(rows[0]) is None  # already gone
+    kept = [e for i, e in enumerate(rows) if i % 7]
+    assert index.keys == sorted(e.ts for e in kept)
+    assert sorted(map(id, index.items)) == sorted(map(id, kept))
@@ -0,0 +1,43 @@
+from src.expense import Expense, category_name
+from src.indexes import MISSING_TS, parse_ts
+
+
+def test_category_names_are_title_cased_and_interned():
+    assert category_name(" food ") == "Food"
+    assert category_name("") == category_name(None) == "Other"
+    assert category_name("eating OUT") == "Eating Out"
+    assert category_name("food") is category_name("FOOD ")
+
+
+def test_from_dict_validates_stored_rows():
+    exp = Expense.from_dict({"id": 7, "amount": "12.5", "description": 42, "category": "travel",
+                             "date": "2025-03-01 08:30:00"})
+    assert (exp.id, exp.amount, exp.description, exp.category) == (7, 12.5, "42", "Travel")
+    assert exp.ts == parse_ts("2025-03-01 08:30:00")
+
+    bad = Expense.from_dict({"id": "7", "amount": "lots", "date": "whenever"})
+    assert (bad.id, bad.amount, bad.category, bad.ts) == (None, 0.0, "Other", MISSING_TS)
+
+
+def test_to_dict_round_trip_and_copy():
+    exp = Expense(9.99, "Coffee", "food", "2025-01-02 10:00:00", id=3)
+    again = Expense.from_dict(exp.to_dict())
+    assert again == exp and again.id == 3 and again.ts == exp.ts
+    copy = exp.copy()
+    assert copy == exp and copy is not exp and copy.ts == exp.ts
+
+
+def test_update_revalidates_changed_fields():
+    exp = Expense(1.0, "x", "Food", "2025-01-02 10:00:00", id=1)
+    exp.update({"amount": "3,5", "category": "bills ", "date": "2025-02-03 00:00:00"})
+    assert (exp.amount, exp.category, exp.date) == (0.0, "Bills", "2025-02-03 00:00:00")
+    assert exp.ts == parse_ts("2025-02-03 00:00:00")
+    exp.update({"date": ""})
+    assert exp.ts == MISSING_TS
+
+
+def test_equality_ignores_id_and_hash_is_identity():
+    a = Expense(1.0, "x", "Food", "2025-01-02", id=1)
+    b = Expense(1.0, "x", "food", "2025-01-02", id=2)
+    assert a == b and hash(a) != hash(b)
+    assert len({a, b}) == 2
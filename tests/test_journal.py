@@ -0,0 +1,36 @@
+from ledger_helpers import add, assert_rollups_match, edit, open_journal, rows
+
+
+def test_compaction_and_reload_give_the_same_ledger(tmp_path):
+    store, ledger, rollups = open_journal(tmp_path)
+    for i in range(1, 40):
+        add(store, ledger, rollups, float(i), f"2025-{i % 12 + 1:02d}-0{i % 9 + 1} 08:00:00")
+    store.compact(ledger, rollups)
+    edit(store, ledger, rollups, 3, {"amount": 300.0, "category": "Travel"})
+    store.append({"op": "delete", "id": 5})
+    rollups.remove(ledger.remove(5))
+    want = rows(ledger)
+    store.close()
+
+    store, ledger, rollups = open_journal(tmp_path)
+    assert rows(ledger) == want
+    assert_rollups_match(ledger, rollups)
+    assert not store.needs_compaction()
+
+
+def test_torn_journal_tail_is_dropped(tmp_path):
+    store, ledger, rollups = open_journal(tmp_path)
+    store.compact(ledger, rollups)
+    for i in range(1, 6):
+        add(store, ledger, rollups, float(i))
+    with open(store.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op":"add","expense":{"amount":9')  # crash halfway through a line
+
+    store, ledger, rollups = open_journal(tmp_path)
+    assert [e.amount for e in ledger] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert_rollups_match(ledger, rollups)
+
+    # the next write rewrites the journal without the torn line
+    add(store, ledger, rollups, 6.0)
+    store, ledger, rollups = open_journal(tmp_path)
+    assert [e.amount for e in ledger] == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
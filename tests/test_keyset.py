@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import pytest
+
+from ledger_helpers import sample_rows
+from src.expense import Expense
+from src.indexes import SortIndex, to_ts
+
+
+def walk(pager, page=7):
+    """Every row, read forward a page at a time from cursor to cursor."""
+    out, cursor = [], None
+    while True:
+        rows = pager.rows_from(cursor, page + 1)
+        out += rows[:page]
+        if len(rows) <= page:
+            return out
+        cursor = pager.cursor(rows[page])
+
+
+@pytest.mark.parametrize("field", ["id", "amount", "ts"])
+@pytest.mark.parametrize("reverse", [False, True])
+def test_keyset_pages_cover_the_range_in_order(field, reverse):
+    rows = sample_rows()
+    index = SortIndex(field, rows)
+    expected = sorted(rows, key=index.cursor, reverse=reverse)
+    pager = index.range(reverse=reverse)
+    assert len(pager) == len(rows)
+    assert walk(pager) == expected
+    assert pager.all() == expected
+
+
+def test_keyset_paging_backwards_and_seek():
+    index = SortIndex("amount", sample_rows())
+    pager = index.range(reverse=True)
+    everything = pager.all()
+    cursor = pager.seek(100)
+    assert pager.position(cursor) == 100
+    assert pager.rows_from(cursor, 5) == everything[100:105]
+    assert pager.rows_before(cursor, 5) == everything[95:100]
+    assert pager.rows_before(pager.seek(2), 5) == everything[:2]
+    assert pager.seek(10_000) == pager.cursor(everything[-1])
+
+
+def test_keyset_range_bounds_and_changes_under_the_cursor():
+    rows = sample_rows()
+    index = SortIndex("ts", rows)
+    since = to_ts(datetime(2025, 7, 1))
+    pager = index.range(lo=(since,))
+    assert pager.all() == sorted((e for e in rows if e.ts >= since), key=index.cursor)
+
+    # the cursor stays on its row when rows are added or removed in front of it
+    cursor = pager.seek(20)
+    anchor = pager.rows_from(cursor, 1)[0]
+    index.remove(pager.all()[0])
+    extra = Expense(1.0, "new", "Food", "2025-07-01 00:00:01")
+    extra.id = 10_000
+    index.add(extra)
+    assert pager.rows_from(cursor, 1)[0] is anchor
+
+
+def test_sort_index_batch_merge_keeps_order():
+    rows = sample_rows(500)
+    index = SortIndex("amount", rows[:100])
+    index.add_many(rows[100:])   # merged with one sort
+    index.add_many([])
+    small = SortIndex("amount", rows[:480])
+    small.add_many(rows[480:])  # inserted one by one
+    assert index.items == small.items == sorted(rows, key=index.cursor)
@@ -0,0 +1,54 @@
+import random
+
+from src.categorize import (
+    DEFAULT_CATEGORY_KEYWORDS,
+    KeywordMatcher,
+    format_keyword_table,
+    parse_keyword_table,
+)
+
+
+def old_guess(table, desc):
+    """The nested scan guess_category used before the matcher: first category with a hit wins."""
+    desc = desc.lower()
+    for cat, keywords in table.items():
+        if any(k in desc for k in keywords):
+            return cat.capitalize()
+    return "Other"
+
+
+def random_descriptions(table, n, seed=3):
+    rng = random.Random(seed)
+    words = [w for ws in table.values() for w in ws]
+    pieces = words + ["the", "he", "ga", "tr", "-", " ", "x", "ca", "booking", ".com", "Ünï"]
+    for _ in range(n):
+        yield "".join(rng.choice(pieces) for _ in range(rng.randint(0, 6)))
+
+
+def test_matcher_agrees_with_the_old_scan_on_the_default_table():
+    matcher = KeywordMatcher(DEFAULT_CATEGORY_KEYWORDS)
+    for desc in random_descriptions(DEFAULT_CATEGORY_KEYWORDS, 5000):
+        assert matcher.classify(desc) == old_guess(DEFAULT_CATEGORY_KEYWORDS, desc), desc
+
+
+def test_lowest_ranked_category_wins_on_overlapping_keywords():
+    # keywords that are suffixes/prefixes of each other exercise the failure links
+    table = {"A": ["hers"], "B": ["she", "his"], "C": ["he"], "D": ["s"]}
+    matcher = KeywordMatcher(table)
+    for desc in ["ushers", "she", "he said", "this", "ssss", "hhers", "", "xyz"]:
+        assert matcher.classify(desc) == old_guess(table, desc), desc
+    for desc in random_descriptions(table, 3000, seed=7):
+        assert matcher.classify(desc) == old_guess(table, desc), desc
+
+
+def test_classify_is_case_insensitive_and_uses_the_default():
+    matcher = KeywordMatcher({"Food": ["Coffee"]})
+    assert matcher.classify("Morning COFFEE") == "Food"
+    assert matcher.classify("rent", default="Misc") == "Misc"
+    assert KeywordMatcher({}).classify("anything") == "Other"
+
+
+def test_keyword_table_text_round_trip():
+    text = format_keyword_table(DEFAULT_CATEGORY_KEYWORDS)
+    assert parse_keyword_table(text) == DEFAULT_CATEGORY_KEYWORDS
+    assert parse_keyword_table("food: Pizza, ,  Sushi\nno colon here\nempty:\n") == {"Food": ["pizza", "sushi"]}
@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.charts import bucket_series, lttb
+
+
+def day(text):
+    return int(np.datetime64(text, "D").astype(np.int64))
+
+
+def test_short_spans_stay_daily():
+    days = [day("2025-01-01"), day("2025-01-02"), day("2025-03-01")]
+    dates, sums, unit = bucket_series(days, [1.0, 2.0, 3.0])
+    assert unit == "day"
+    assert [str(d) for d in dates] == ["2025-01-01", "2025-01-02", "2025-03-01"]
+    assert list(sums) == [1.0, 2.0, 3.0]
+
+
+def test_medium_spans_sum_by_monday_weeks():
+    # 2025-01-06 is a Monday
+    days = [day("2025-01-05"), day("2025-01-06"), day("2025-01-12"), day("2025-01-13"), day("2025-12-01")]
+    dates, sums, unit = bucket_series(days, [1.0, 2.0, 3.0, 4.0, 5.0])
+    assert unit == "week"
+    assert [str(d) for d in dates] == ["2024-12-30", "2025-01-06", "2025-01-13", "2025-12-01"]
+    assert list(sums) == [1.0, 5.0, 4.0, 5.0]
+
+
+def test_long_spans_sum_by_month():
+    days = [day("2020-01-31"), day("2020-02-01"), day("2020-02-29"), day("2023-07-04")]
+    dates, sums, unit = bucket_series(days, [1.0, 2.0, 3.0, 4.0])
+    assert unit == "month"
+    assert [str(d) for d in dates] == ["2020-01-01", "2020-02-01", "2023-07-01"]
+    assert list(sums) == [1.0, 5.0, 4.0]
+
+
+def test_empty_series():
+    dates, sums, unit = bucket_series([], [])
+    assert len(dates) == 0 and len(sums) == 0 and unit == "day"
+
+
+def test_lttb_keeps_the_ends_and_the_peaks():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[123], y[777] = 50.0, -40.0
+    keep = lttb(x, y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert list(keep) == sorted(set(keep))
+    assert 123 in keep and 777 in keep
+
+
+def test_lttb_leaves_short_series_alone():
+    assert list(lttb(np.arange(10), np.ones(10), 10)) == list(range(10))
+    assert list(lttb(np.arange(10), np.ones(10), 2)) == list(range(10))
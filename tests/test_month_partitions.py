@@ -0,0 +1,23 @@
+from ledger_helpers import add, assert_rollups_match, edit, open_journal, rows
+from src.storage import ExpenseJournal
+
+
+def test_partial_load_attaches_older_months_on_demand(tmp_path):
+    store, ledger, rollups = open_journal(tmp_path)
+    for i in range(1, 25):
+        add(store, ledger, rollups, float(i), f"2024-{(i + 1) // 2:02d}-05 09:00:00")  # two rows a month
+    store.compact(ledger, rollups)
+    edit(store, ledger, rollups, 5, {"amount": 500.0})  # 2024-03: detached on the next load
+    want = rows(ledger)
+
+    store = ExpenseJournal(str(tmp_path / "expenses.json"))
+    since = ledger.get(19).ts  # 2024-10 onwards
+    partial = store.load(since=since)
+    assert partial.missing_since(None) and not partial.missing_since(since)
+    assert partial.get(5).amount == 500.0  # the journal attached the month it edits
+    assert 1 not in partial  # ... but not the months before it
+    assert store.rollups.count == len(want)  # rollups cover detached months too
+
+    partial.attach_since(None)
+    assert rows(partial) == want
+    assert_rollups_match(partial, store.rollups)
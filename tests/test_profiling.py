@@ -0,0 +1,85 @@
+import json
+import threading
+
+import pytest
+
+from src.profiling import Profiler, format_record
+
+
+class App:
+    def __init__(self):
+        self.rows = [1, 2, 3]
+
+    def outer(self):
+        return self.inner() + 1
+
+    def inner(self):
+        return len(self.rows)
+
+    def broken(self):
+        raise KeyError("boom")
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_install_times_methods_and_logs_them(tmp_path):
+    path = str(tmp_path / "profile.log")
+    prof = Profiler(path)
+    app = App()
+    prof.install(app, {"outer": lambda a, r: len(a.rows), "inner": None})
+    assert app.outer() == 4
+    assert App.outer.__name__ == app.outer.__name__ == "outer"
+
+    inner, outer = prof.recent
+    assert (inner["name"], inner["depth"], inner["rows"]) == ("inner", 1, None)
+    assert (outer["name"], outer["depth"], outer["rows"]) == ("outer", 0, 3)
+    assert outer["ms"] >= inner["ms"] >= 0
+    assert [r["name"] for r in read_log(path)] == ["inner", "outer"]
+    assert format_record(inner).startswith("  inner")
+
+
+def test_errors_are_recorded_and_reraised(tmp_path):
+    prof = Profiler(str(tmp_path / "profile.log"))
+    app = App()
+    prof.install(app, {"broken": lambda a, r: 1})
+    with pytest.raises(KeyError):
+        app.broken()
+    record = prof.recent[-1]
+    assert record["error"] == "KeyError" and record["rows"] is None and record["depth"] == 0
+
+
+def test_depth_is_per_thread(tmp_path):
+    prof = Profiler(str(tmp_path / "profile.log"))
+    inside, release = threading.Event(), threading.Event()
+
+    def slow():
+        inside.set()
+        release.wait()
+
+    slow = prof.wrap(slow, "slow")
+    fast = prof.wrap(lambda: None, "fast")
+    worker = threading.Thread(target=slow)
+    worker.start()
+    inside.wait()
+    fast()  # main thread, while the worker is still inside slow()
+    release.set()
+    worker.join()
+    assert {r["name"]: r["depth"] for r in prof.recent} == {"fast": 0, "slow": 0}
+
+
+def test_log_rotates_and_keeps_a_few_backups(tmp_path):
+    path = str(tmp_path / "profile.log")
+    prof = Profiler(path)
+    prof.LOG_MAX_BYTES = 200
+    prof.LOG_BACKUPS = 2
+    call = prof.wrap(lambda: None, "call")
+    for _ in range(40):
+        call()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ["profile.log", "profile.log.1", "profile.log.2"]
+    for name in names:
+        assert all(r["name"] == "call" for r in read_log(str(tmp_path / name)))
+    assert len(prof.recent) == 15
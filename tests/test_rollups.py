@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+from ledger_helpers import sample_rows
+from src.indexes import DAY, MISSING_TS, ExpenseTable, Rollups, to_ts
+
+
+@pytest.mark.parametrize("cutoff", [None, MISSING_TS, "2025-03-17 13:30:00", "2025-11-01 00:00:00", "2026-01-01 00:00:00"])
+def test_rollup_summary_matches_the_rows(cutoff):
+    rows = sample_rows()
+    table = ExpenseTable(rows)
+    rollups = Rollups(rows)
+    start = cutoff if cutoff in (None, MISSING_TS) else to_ts(datetime.strptime(cutoff, "%Y-%m-%d %H:%M:%S"))
+    picked = rows if start in (None, MISSING_TS) else [e for e in rows if e.ts != MISSING_TS and e.ts >= start]
+
+    total, count, unique_days, by_cat = rollups.summary(start, table)
+    assert count == len(picked)
+    assert total == pytest.approx(sum(e.amount for e in picked))
+    assert unique_days == len({e.ts // DAY for e in picked if e.ts != MISSING_TS})
+    want = {}
+    for e in picked:
+        want[e.category] = want.get(e.category, 0) + e.amount
+    assert by_cat == pytest.approx(want)
+
+
+def test_rollups_follow_removals():
+    rows = sample_rows()
+    rollups = Rollups(rows)
+    for exp in rows[::3]:
+        rollups.remove(exp)
+    assert rollups.to_dict() == Rollups(rows[1::3] + rows[2::3]).to_dict()  # whole amounts: exact sums
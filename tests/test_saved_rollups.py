@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from ledger_helpers import HeldWriter, add, assert_rollups_match, edit, open_journal, sample_rows
+from src.expense import Expense
+from src.indexes import Rollups
+from src.storage import SqliteExpenseStore
+
+
+def test_rollups_round_trip_through_dict():
+    rollups = Rollups(sample_rows())
+    again = Rollups.from_dict(rollups.to_dict())
+    assert again.to_dict() == rollups.to_dict()
+    assert again.days == rollups.days
+
+
+@pytest.mark.parametrize("broken", [
+    lambda d: d.update(count=d["count"] + 1),
+    lambda d: d["by_month"].popitem(),
+    lambda d: d["by_day_cat"].popitem(),
+    lambda d: d.update(version=99),
+])
+def test_rollups_that_do_not_add_up_are_rejected(broken):
+    d = Rollups(sample_rows()).to_dict()
+    broken(d)
+    with pytest.raises(ValueError):
+        Rollups.from_dict(d)
+
+
+def test_edit_while_compaction_is_queued(tmp_path):
+    writer = HeldWriter()
+    store, ledger, rollups = open_journal(tmp_path, writer)
+    for i in range(1, 11):
+        add(store, ledger, rollups, float(i))
+    writer.run()
+    store.compact(ledger, rollups)
+    edit(store, ledger, rollups, 4, {"amount": 500.0})  # lands before the snapshot is written
+    writer.run()
+
+    store, ledger, rollups = open_journal(tmp_path)
+    assert ledger.get(4).amount == 500.0
+    assert_rollups_match(ledger, rollups)
+
+
+def test_bad_rollups_file_is_rebuilt(tmp_path):
+    store, ledger, rollups = open_journal(tmp_path)
+    for i in range(1, 20):
+        add(store, ledger, rollups, float(i), f"2025-0{i % 9 + 1}-10 10:00:00")
+    store.compact(ledger, rollups)
+    manifest_path = os.path.join(store.months_dir, "manifest.json")
+    with open(manifest_path, encoding="utf-8") as f:
+        entry = json.load(f)["rollups"]
+    with open(os.path.join(store.months_dir, entry["file"]), "a", encoding="utf-8") as f:
+        f.write(" ")
+
+    store, ledger, rollups = open_journal(tmp_path)
+    assert store.needs_compaction()
+    assert_rollups_match(ledger, rollups)
+
+
+def test_sqlite_rollups_survive_reload_and_bad_crc(tmp_path):
+    path = str(tmp_path / "expenses.db")
+    store = SqliteExpenseStore(path)
+    ledger = store.load()
+    for i in range(1, 30):
+        exp = ledger.add(Expense(float(i), f"row {i}", "Food", f"2025-0{i % 9 + 1}-10 10:00:00"))
+        store.append({"op": "add", "expense": exp})
+    old = ledger.get(7).copy()
+    ledger.update(7, {"amount": 70.0})
+    store.append({"op": "edit", "id": 7, "expense": ledger.get(7), "old": old})
+    store.close()
+
+    store = SqliteExpenseStore(path)
+    ledger = store.load()
+    assert_rollups_match(ledger, store.rollups)
+    store.close()
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("UPDATE meta SET value = value || ' ' WHERE key = 'rollups'")
+    conn.close()
+    store = SqliteExpenseStore(path)
+    ledger = store.load()
+    assert_rollups_match(ledger, store.rollups)
+    store.close()
+
+
+def test_compaction_copies_and_rewrites_only_changed_months(tmp_path, monkeypatch):
+    store, ledger, rollups = open_journal(tmp_path)
+    for i in range(1, 31):
+        add(store, ledger, rollups, float(i), f"2024-{(i + 2) // 3:02d}-05 09:00:00")  # three rows a month
+    store.compact(ledger, rollups)
+    before = {m["month"]: m["file"] for m in store.months}
+
+    writer = HeldWriter()
+    store, ledger, rollups = open_journal(tmp_path, writer)
+    assert len(list(ledger)) == 30  # every row decoded, as after browsing the list
+    edit(store, ledger, rollups, 8, {"amount": 80.0})  # 2024-03
+
+    copied = []
+    real_copy = Expense.copy
+    monkeypatch.setattr(Expense, "copy", lambda exp: copied.append(exp.id) or real_copy(exp))
+    store.compact(ledger, rollups)
+    assert sorted(copied) == [7, 8, 9]  # the rows of the changed month only
+    edit(store, ledger, rollups, 7, {"amount": 70.0})  # lands before the snapshot is written
+    writer.run()
+
+    after = {m["month"]: m["file"] for m in store.months}
+    assert [k for k in after if after[k] != before[k]] == ["2024-03"]
+    store, ledger, rollups = open_journal(tmp_path)
+    assert (ledger.get(7).amount, ledger.get(8).amount) == (70.0, 80.0)
+    assert_rollups_match(ledger, rollups)
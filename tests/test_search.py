@@ -0,0 +1,39 @@
+import pytest
+
+from ledger_helpers import sample_rows
+from src.expense import Expense
+from src.indexes import TrigramIndex
+
+
+def scan(rows, query):
+    q = query.lower()
+    return {id(e) for e in rows if q in e.description.lower() or q in e.category.lower()}
+
+
+@pytest.mark.parametrize("query", ["row 1", "ROW 12", "travel", "ood", "w 3", "ro", "", "nothing like it"])
+def test_search_matches_a_substring_scan(query):
+    rows = sample_rows()
+    index = TrigramIndex(rows)
+    assert {id(e) for e in index.search(query)} == scan(rows, query)
+
+
+def test_search_does_not_match_across_description_and_category():
+    index = TrigramIndex([Expense(1.0, "coffee", "Food")])
+    assert index.search("eef") == []  # "coffee" + "Food" would only match glued together
+    assert len(index.search("ffee")) == 1
+
+
+def test_search_follows_adds_batches_and_removals():
+    rows = sample_rows(200)
+    index = TrigramIndex(rows[:50])
+    for exp in rows[50:100]:
+        index.add(exp)
+    index.add_many(rows[100:])
+    for exp in rows[::4]:
+        index.remove(exp)
+    kept = [e for i, e in enumerate(rows) if i % 4]
+    for query in ("row 1", "food", "row 10"):
+        assert {id(e) for e in index.search(query)} == scan(kept, query)
+    non_ascii = Expense(3.0, "Crème BRÛLÉE", "Food")
+    index.add(non_ascii)
+    assert index.search("brûlée") == [non_ascii]
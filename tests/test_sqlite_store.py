@@ -0,0 +1,85 @@
+import sqlite3
+
+from src.expense import Expense
+from src.indexes import MISSING_TS, parse_ts
+from src.storage import SqliteExpenseStore
+
+
+def open_store(tmp_path, rows=()):
+    store = SqliteExpenseStore(str(tmp_path / "expenses.db"))
+    ledger = store.load()
+    for amount, desc, date in rows:
+        exp = ledger.add(Expense(amount, desc, "Food", date))
+        store.append({"op": "add", "expense": exp})
+    return store, ledger
+
+
+ROWS = [
+    (1.0, "Café Crème", "2025-03-05 09:00:00"),
+    (2.0, "late bus", "2025-03-05T10:00:00"),  # ISO "T": sorts before the first row as text
+    (3.0, "ÉCOLE fees", "2025-03-06"),
+    (4.0, "undated", "sometime"),
+]
+
+
+def amounts(rows):
+    return [e.amount for e in rows]
+
+
+def test_date_range_and_sort_use_the_ts_column(tmp_path):
+    store, ledger = open_store(tmp_path, ROWS)
+    assert amounts(store.pager(sort="date_old").all()) == [4.0, 1.0, 2.0, 3.0]
+    assert amounts(store.pager(sort="date_new").all()) == [3.0, 2.0, 1.0, 4.0]
+    assert amounts(store.pager(since=parse_ts("2025-03-05 09:30:00"), sort="date_old").all()) == [2.0, 3.0]
+
+    exp = ledger.get(3)
+    old = exp.copy()
+    ledger.update(3, {"date": "2025-03-01 00:00:00"})
+    store.append({"op": "edit", "id": 3, "expense": exp, "old": old})
+    assert amounts(store.pager(sort="date_old").all()) == [4.0, 3.0, 1.0, 2.0]
+    store.close()
+
+
+def test_search_ignores_case_beyond_ascii(tmp_path):
+    store, ledger = open_store(tmp_path, ROWS)
+    assert amounts(store.pager(search="café").all()) == [1.0]
+    assert amounts(store.pager(search="CRÈME").all()) == [1.0]
+    assert amounts(store.pager(search="école").all()) == [3.0]
+    assert amounts(store.pager(search="BUS").all()) == [2.0]
+    assert amounts(store.pager(search="50%").all()) == []
+    store.close()
+
+
+def test_reload_reads_ts_from_the_table(tmp_path):
+    store, ledger = open_store(tmp_path, ROWS)
+    store.close()
+    store, ledger = open_store(tmp_path)
+    assert [e.ts for e in ledger] == [parse_ts(d) or MISSING_TS for _, _, d in ROWS]
+    store.close()
+
+
+def test_old_databases_get_a_ts_column(tmp_path):
+    path = str(tmp_path / "expenses.db")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(
+            "CREATE TABLE expenses (id INTEGER PRIMARY KEY AUTOINCREMENT, amount REAL NOT NULL DEFAULT 0,"
+            " description TEXT NOT NULL DEFAULT '', category TEXT NOT NULL DEFAULT 'Other',"
+            " date TEXT NOT NULL DEFAULT '')"
+        )
+        conn.execute("CREATE INDEX idx_expenses_date ON expenses(date)")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('migrated_json', '0')")
+        conn.executemany(
+            "INSERT INTO expenses (amount, description, category, date) VALUES (?, ?, 'Food', ?)",
+            [(a, d, date) for a, d, date in ROWS],
+        )
+    conn.close()
+
+    store = SqliteExpenseStore(path)
+    ledger = store.load()
+    assert [e.ts for e in ledger] == [parse_ts(d) or MISSING_TS for _, _, d in ROWS]
+    assert amounts(store.pager(sort="date_new").all()) == [3.0, 2.0, 1.0, 4.0]
+    indexes = {row[1] for row in store.conn.execute("PRAGMA index_list(expenses)")}
+    assert "idx_expenses_ts" in indexes and "idx_expenses_date" not in indexes
+    store.close()
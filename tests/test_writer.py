@@ -0,0 +1,34 @@
+import os
+import threading
+
+from src.storage import BackgroundWriter, atomic_write
+
+
+def test_writer_coalesces_jobs_with_the_same_key():
+    writer = BackgroundWriter()
+    gate = threading.Event()
+    ran = []
+    writer.submit("block", gate.wait)  # keeps the writer busy while the others queue up
+    for i in range(5):
+        writer.submit("snapshot", lambda i=i: ran.append(("snapshot", i)))
+    writer.submit("journal", lambda: ran.append(("journal", 0)))
+    gate.set()
+    writer.close()
+    assert ran == [("snapshot", 4), ("journal", 0)]
+
+
+def test_writer_runs_jobs_inline_once_closed():
+    writer = BackgroundWriter()
+    writer.close()
+    ran = []
+    writer.submit("late", lambda: ran.append(1))
+    assert ran == [1]
+
+
+def test_atomic_write_replaces_the_whole_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    atomic_write(path, b"old contents")
+    atomic_write(path, b"new")
+    with open(path, "rb") as f:
+        assert f.read() == b"new"
+    assert not os.path.exists(path + ".tmp")